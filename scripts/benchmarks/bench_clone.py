@@ -0,0 +1,61 @@
+'''Compare a --sparse checkout of kgateway with the full shallow clone.
+
+Clones one ref both ways with clone_repository, as generate-ref-docs.py
+does for every version, and prints the best wall time, the bytes of git
+objects received and the files written by each:
+
+    python3 scripts/benchmarks/bench_clone.py [repo url] [ref]
+
+With no arguments it clones the offline kit's stand-in repository, which
+is tiny, so the numbers only show the overhead of the extra git commands.
+Pass https://github.com/kgateway-dev/kgateway.git and a branch such as main
+to measure the real tree. The sparse patterns cover every doc stage.
+'''
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_pipeline import silenced
+from harness import load_script_module
+
+REPEAT = 3
+
+
+def main(argv):
+    gen_ref_docs = load_script_module('generate-ref-docs.py', 'generate_ref_docs')
+    patterns = gen_ref_docs.sparse_patterns(gen_ref_docs.STAGE_SPARSE_PATTERNS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if len(argv) > 1:
+            repo_url, ref = argv[1], argv[2] if len(argv) > 2 else 'main'
+        else:
+            kit = load_script_module('tests/offline/kit.py', 'offline_kit')
+            repo_url, ref = kit.make_repo(tmp / 'repo'), 'main'
+        gen_ref_docs.KGATEWAY_REPO_URL = repo_url
+
+        results = {}
+        for name, sparse in (('full shallow clone', None), ('sparse, blob-less clone', patterns)):
+            best = float('inf')
+            for _ in range(REPEAT):
+                checkout = str(tmp / 'kgateway')
+                with silenced():
+                    start = time.perf_counter()
+                    gen_ref_docs.clone_repository(ref, checkout, sparse=sparse)
+                    best = min(best, time.perf_counter() - start)
+                stats = gen_ref_docs.checkout_stats(checkout)
+                gen_ref_docs.safe_rmtree(checkout)
+            results[name] = (best, *stats)
+
+        full = results['full shallow clone']
+        print(f'{ref} from {repo_url}')
+        for name, (seconds, files, object_bytes) in results.items():
+            print(f'{name:<26}{seconds * 1000:9.1f} ms {files:8,} files {object_bytes / 1024:10,.0f} KiB objects'
+                  f'   ({seconds / full[0]:.0%} time, {files / full[1]:.0%} files, '
+                  f'{object_bytes / max(full[2], 1):.0%} bytes)')
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,61 @@
+'''Benchmark the Go tokenizer and parser in generate-shared-types.py.
+
+Point it at a kgateway checkout to measure the real api/v1alpha1 trees:
+
+    python3 scripts/benchmarks/bench_go_lexer.py path/to/kgateway
+
+Without an argument it uses the synthetic 20k-line file from
+bench_parse_go.py. Every .go file under api/v1alpha1 is tokenized and parsed,
+and the total is reported in MB/s.
+'''
+
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_parse_go import synthetic_go_source
+from harness import load_script_module, measure, report
+
+
+def go_sources(kgateway_dir):
+    '''Return {label: [.go files]} for each API tree in a kgateway checkout.'''
+    api_dir = Path(kgateway_dir) / "api" / "v1alpha1"
+    trees = {"api/v1alpha1": sorted(api_dir.glob("*.go"))}
+    for sub in sorted(p for p in api_dir.iterdir() if p.is_dir()):
+        trees[f"api/v1alpha1/{sub.name}"] = sorted(sub.glob("*.go"))
+    return {label: files for label, files in trees.items() if files}
+
+
+def bench_tree(shared_types, label, files):
+    contents = [f.read_text(encoding="utf-8") for f in files]
+    size = sum(len(c.encode("utf-8")) for c in contents)
+
+    def tokenize():
+        for content in contents:
+            for _ in shared_types.tokenize_go(content):
+                pass
+
+    def parse():
+        for f in files:
+            shared_types.parse_go_file(f)
+
+    seconds, peak = measure(tokenize, repeat=3)
+    report(f"tokenize_go[{label}]", seconds, peak, size)
+    seconds, peak = measure(parse, repeat=3)
+    report(f"parse_go_file[{label}]", seconds, peak, size)
+
+
+def main(argv):
+    shared_types = load_script_module("generate-shared-types.py", "generate_shared_types")
+    if len(argv) > 1:
+        for label, files in go_sources(argv[1]).items():
+            bench_tree(shared_types, label, files)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        go_file = Path(tmp) / "types.go"
+        go_file.write_text(synthetic_go_source(20000), encoding="utf-8")
+        bench_tree(shared_types, "synthetic 20k lines", [go_file])
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
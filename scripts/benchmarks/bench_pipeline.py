@@ -0,0 +1,102 @@
+'''Benchmark a full generate-ref-docs.py run against the offline kit.
+
+Builds the stand-in kgateway repository and docs root from
+scripts/tests/offline/ with VERSIONS versions (or the number given), then
+times main() end to end, with the stub doc tools in place of Go:
+
+    python3 scripts/benchmarks/bench_pipeline.py [versions]
+
+Scenarios: cold runs with fresh caches, sequential, with the stages of each
+version one after another (--stage-jobs 1) and with --jobs, a cold run from
+a --git-cache mirror, and a warm run where every version is
+restored from the generation cache. The pipeline's own output is discarded.
+'''
+
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import load_script_module
+
+VERSIONS = 6
+REPEAT = 3
+
+
+@contextlib.contextmanager
+def silenced():
+    '''Send Python and child-process output (git, the stubs) to /dev/null.'''
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = (os.dup(1), os.dup(2))
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        os.dup2(devnull.fileno(), 1)
+        os.dup2(devnull.fileno(), 2)
+        try:
+            yield
+        finally:
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            for fd in saved:
+                os.close(fd)
+
+
+def kit_versions(count):
+    '''versions.json entries 2.0.x .. 2.<count-1>.x, newest first on main.'''
+    versions = [{'version': f'2.{minor}.x', 'linkVersion': f'2.{minor}.x', 'url': f'2.{minor}.x'}
+                for minor in reversed(range(count))]
+    versions[0].update(linkVersion='main', url='main')
+    return versions
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else VERSIONS
+    kit = load_script_module('tests/offline/kit.py', 'offline_kit')
+    gen_ref_docs = load_script_module('generate-ref-docs.py', 'generate_ref_docs')
+    # Pool workers unpickle process functions by module name.
+    sys.modules['generate_ref_docs'] = gen_ref_docs
+    versions = kit_versions(count)
+    jobs = min(count, max(2, os.cpu_count() or 1))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        repo_url = kit.make_repo(tmp / 'repo', versions)
+        docs_root = kit.make_docs_root(tmp / 'docs', versions)
+        cwd = os.getcwd()
+        os.chdir(docs_root)
+        runs = iter(range(10 ** 6))
+
+        def run(*extra, cache_dir=None):
+            cache_dir = cache_dir or tmp / f'cache-{next(runs)}'
+            with silenced():
+                gen_ref_docs.main(kit.pipeline_args(repo_url, cache_dir, *extra))
+
+        def fresh_git_cache():
+            return run('--git-cache', str(tmp / f'git-{next(runs)}'))
+
+        warm_cache = tmp / 'cache-warm'
+        run(cache_dir=warm_cache)
+        scenarios = [
+            ('cold, sequential', run),
+            ('cold, --stage-jobs 1', lambda: run('--stage-jobs', '1')),
+            (f'cold, --jobs {jobs}', lambda: run('--jobs', str(jobs))),
+            ('cold, --git-cache mirror', fresh_git_cache),
+            ('warm, generation cache', lambda: run(cache_dir=warm_cache)),
+        ]
+        try:
+            for name, fn in scenarios:
+                best = float('inf')
+                for _ in range(REPEAT):
+                    start = time.perf_counter()
+                    fn()
+                    best = min(best, time.perf_counter() - start)
+                print(f'pipeline[{count} versions, {name}]'.ljust(56)
+                      + f'{best * 1000:9.1f} ms  {best * 1000 / count:7.1f} ms/version')
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
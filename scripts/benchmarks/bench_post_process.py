@@ -0,0 +1,28 @@
+'''Benchmark _post_process_api_docs on the checked-in API reference files.
+
+Measures the in-memory string pipeline, so a regression in either wall
+time or peak memory is visible.
+'''
+
+import contextlib
+import io
+import os
+import sys
+
+from harness import API_DOCS, load_script_module, measure, report
+
+
+def main():
+    gen = load_script_module("generate-ref-docs.py", "generate_ref_docs")
+    # The link fix-ups path is relative to the repository root.
+    os.chdir(gen.__file__.rsplit("/scripts/", 1)[0])
+    for doc in API_DOCS:
+        content = doc.read_text(encoding="utf-8")
+        label = doc.parts[-3]
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds, peak = measure(lambda: gen._post_process_api_docs(content))
+        report(f"post_process[{label}] string", seconds, peak, len(content))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
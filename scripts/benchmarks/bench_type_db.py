@@ -0,0 +1,55 @@
+'''Benchmark type-db.py queries on a synthetic multi-version database.
+
+Records 20 versions of 500 types with 8 fields each, then times the lookup,
+refs and diff queries, which should each take well under a millisecond.
+'''
+
+import sys
+import tempfile
+from pathlib import Path
+
+from harness import load_script_module, measure, report
+
+
+VERSIONS = [f"2.{minor}.x" for minor in range(20)]
+TYPES_PER_VERSION = 500
+
+
+def synthetic_types(shared_types, version_index):
+    types = []
+    for n in range(TYPES_PER_VERSION):
+        fields = [
+            shared_types.FieldInfo(
+                name=f"Field{f}",
+                go_type=f"*Policy{(n + f + 1) % TYPES_PER_VERSION}" if f % 2 else "string",
+                json_name=f"field{f}",
+                description=f"Field {f} of Policy{n}.",
+                required=(f + version_index) % 3 == 0,
+            )
+            for f in range(8)
+        ]
+        types.append(shared_types.TypeInfo(name=f"Policy{n}", kind="struct", fields=fields, source="shared"))
+    return types
+
+
+def main():
+    shared_types = load_script_module("generate-shared-types.py", "generate_shared_types")
+    type_db = load_script_module("type-db.py", "type_db")
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = type_db.connect(Path(tmp) / "types.sqlite")
+        for i, version in enumerate(VERSIONS):
+            type_db.record_types(conn, version, f"{i:040d}", synthetic_types(shared_types, i))
+        print(f"{len(VERSIONS)} versions x {TYPES_PER_VERSION} types x 8 fields")
+
+        for name, fn in [
+            ("lookup", lambda: type_db.lookup(conn, "Policy250")),
+            ("refs", lambda: type_db.references(conn, "Policy250")),
+            ("refs --version", lambda: type_db.references(conn, "Policy250", "2.7.x")),
+            ("diff", lambda: type_db.diff_fields(conn, "Policy250", "2.3.x", "2.17.x")),
+        ]:
+            seconds, peak = measure(fn, repeat=50)
+            report(f"type_db {name}", seconds, peak)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+'''Benchmark the memory held by parsed TypeInfo and FieldInfo objects.
+
+Point it at a kgateway checkout to measure the real api/v1alpha1 trees:
+
+    python3 scripts/benchmarks/bench_type_memory.py path/to/kgateway
+
+Without an argument it uses the synthetic 20k-line file from
+bench_parse_go.py. Each tree is parsed as if for VERSIONS versions at once,
+both straight from source and rebuilt from parse-cache JSON (the path most
+versions take), and the memory still allocated afterwards is reported per
+type under tracemalloc.
+'''
+
+import gc
+import json
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import asdict
+from pathlib import Path
+
+from bench_go_lexer import go_sources
+from bench_parse_go import synthetic_go_source
+from harness import load_script_module
+
+VERSIONS = 10
+
+
+def retained(build):
+    '''Return (result of build(), bytes it still holds once built).'''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = build()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def bench_tree(shared_types, label, files):
+    contents = [f.read_text(encoding="utf-8") for f in files]
+    cached = [json.dumps([asdict(t) for t in shared_types.parse_go_source(c)]) for c in contents]
+
+    def from_source():
+        return [shared_types.parse_go_source(c) for _ in range(VERSIONS) for c in contents]
+
+    def from_cache():
+        return [shared_types._types_from_dicts(json.loads(c)) for _ in range(VERSIONS) for c in cached]
+
+    for name, build in [("parse_go_source", from_source), ("_types_from_dicts", from_cache)]:
+        parsed, size = retained(build)
+        types = sum(len(file_types) for file_types in parsed)
+        fields = sum(len(t.fields) for file_types in parsed for t in file_types)
+        print(f"{name}[{label}] x{VERSIONS:<3} {types:7d} types {fields:7d} fields"
+              f"  {size / 1024:9.0f} KiB  {size / max(types, 1):7.0f} B/type")
+        del parsed
+
+
+def main(argv):
+    shared_types = load_script_module("generate-shared-types.py", "generate_shared_types")
+    if len(argv) > 1:
+        for label, files in go_sources(argv[1]).items():
+            bench_tree(shared_types, label, files)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        go_file = Path(tmp) / "types.go"
+        go_file.write_text(synthetic_go_source(20000), encoding="utf-8")
+        bench_tree(shared_types, "synthetic 20k lines", [go_file])
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from harness import SCRIPTS_DIR, Baseline, load_script_module
+
+
+_BASELINE = Baseline(update=bool(os.environ.get("REF_DOCS_BENCH_UPDATE")))
+
+
+@pytest.fixture(scope="session")
+def baseline():
+    yield _BASELINE
+    _BASELINE.save()
+
+
+@pytest.fixture(scope="session")
+def gen_ref_docs():
+    module = load_script_module("generate-ref-docs.py", "generate_ref_docs")
+    # Its default path is relative to the repository root
+    module._load_link_fixups(str(SCRIPTS_DIR / "link-fixups.json"))
+    return module
+
+
+@pytest.fixture(scope="session")
+def gen_shared_types():
+    return load_script_module("generate-shared-types.py", "generate_shared_types")
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _BASELINE.results:
+        terminalreporter.section("benchmarks")
+        for line in _BASELINE.results:
+            terminalreporter.write_line(line)
+    if _BASELINE.uncompared:
+        terminalreporter.write_line(
+            f"{len(_BASELINE.uncompared)} benchmark(s) were recorded as the baseline in {_BASELINE.path}, "
+            "not compared; run the suite again on this machine to check for regressions"
+        )
@@ -0,0 +1,142 @@
+'''Shared helpers for the scripts/benchmarks/ micro-benchmarks.
+
+Benchmarks are plain scripts, run from the repository root:
+
+    python3 scripts/benchmarks/bench_post_process.py
+
+The regression suite in test_hot_paths.py runs under pytest and compares
+each result against a JSON baseline recorded on the same machine (see
+Baseline):
+
+    python3 -m pytest scripts/benchmarks -q
+'''
+
+import gc
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+API_DOCS = sorted(REPO_ROOT.glob("content/docs/envoy/*/reference/api.md"))
+# The scripts import script_modules.py from their own directory
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+# Wall time depends on the machine, and the api.md inputs change whenever the
+# docs are regenerated, so there is no checked-in reference: the baseline is
+# recorded and compared on one machine and is git-ignored. Override with
+# REF_DOCS_BENCH_BASELINE.
+BASELINE_PATH = Path(os.environ.get("REF_DOCS_BENCH_BASELINE") or Path(__file__).with_name("baseline.json"))
+# Allowed slowdown and memory growth over the baseline, as fractions. Wall
+# time on a shared machine varies far more between runs than traced memory.
+TIME_THRESHOLD = float(os.environ.get("REF_DOCS_BENCH_TIME_THRESHOLD") or 1.0)
+MEMORY_THRESHOLD = float(os.environ.get("REF_DOCS_BENCH_MEMORY_THRESHOLD") or 0.2)
+# Differences below these are noise, whatever the ratio.
+TIME_FLOOR_SECONDS = 0.002
+MEMORY_FLOOR_BYTES = 64 * 1024
+
+
+def load_script_module(filename, module_name):
+    '''Load a dashed script such as generate-ref-docs.py as a module.'''
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(fn, repeat=5):
+    '''Return (best wall time in seconds, peak traced memory in bytes) for fn().
+
+    Wall time is the best of `repeat` untraced runs, with the garbage collector
+    off as in timeit. Peak memory comes from one extra run under tracemalloc,
+    which slows the code down too much to time.
+    '''
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def format_report(name, seconds, peak_bytes, size_bytes=None):
+    line = f"{name:<48} {seconds * 1000:9.1f} ms  peak {peak_bytes / 1024:9.0f} KiB"
+    if size_bytes:
+        line += f"  {size_bytes / seconds / 1e6:7.1f} MB/s"
+    return line
+
+
+def report(name, seconds, peak_bytes, size_bytes=None):
+    print(format_report(name, seconds, peak_bytes, size_bytes))
+
+
+class Baseline:
+    '''Recorded {benchmark name: {"seconds", "peak_bytes"}} results.
+
+    check() compares a new result against the recorded one, and records it
+    if the benchmark is new or update is set. save() writes the file back
+    when anything was recorded. The results only mean something when the
+    baseline was recorded on the same machine; a benchmark without one is
+    recorded, not compared, and listed in `uncompared`.
+    '''
+
+    def __init__(self, path=BASELINE_PATH, time_threshold=TIME_THRESHOLD,
+                 memory_threshold=MEMORY_THRESHOLD, update=False):
+        self.path = Path(path)
+        self.time_threshold = time_threshold
+        self.memory_threshold = memory_threshold
+        self.update = update
+        try:
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.entries = {}
+        self.changed = False
+        self.results = []  # Report lines of this run
+        self.uncompared = []  # Benchmarks recorded without a comparison
+
+    def measure(self, name, fn, repeat=5, size_bytes=None):
+        '''Measure fn() and check it; return a list of regression messages.'''
+        seconds, peak = measure(fn, repeat)
+        line = format_report(name, seconds, peak, size_bytes)
+        self.results.append(line)
+        print(line)
+        return self.check(name, seconds, peak)
+
+    def check(self, name, seconds, peak_bytes):
+        '''Return a list of regression messages; empty if within threshold.'''
+        recorded = self.entries.get(name)
+        if recorded is None or self.update:
+            self.entries[name] = {"seconds": seconds, "peak_bytes": peak_bytes}
+            self.changed = True
+            self.uncompared.append(name)
+            return []
+        problems = []
+        if (seconds > recorded["seconds"] * (1 + self.time_threshold)
+                and seconds - recorded["seconds"] > TIME_FLOOR_SECONDS):
+            problems.append(f"{name}: {seconds * 1000:.1f} ms, baseline {recorded['seconds'] * 1000:.1f} ms")
+        if (peak_bytes > recorded["peak_bytes"] * (1 + self.memory_threshold)
+                and peak_bytes - recorded["peak_bytes"] > MEMORY_FLOOR_BYTES):
+            problems.append(f"{name}: peak {peak_bytes / 1024:.0f} KiB, "
+                            f"baseline {recorded['peak_bytes'] / 1024:.0f} KiB")
+        return problems
+
+    def save(self):
+        if self.changed:
+            self.path.write_text(json.dumps(self.entries, indent=2, sort_keys=True) + "\n", encoding="utf-8")
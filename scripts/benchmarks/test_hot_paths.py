@@ -0,0 +1,99 @@
+'''Regression suite for the doc-generation hot paths.
+
+Each benchmark runs against the checked-in API reference files and against
+the largest of them scaled up 10x and 100x, or against synthetic Go sources
+at the same scales. Wall time and peak memory are compared with the JSON
+baseline (harness.Baseline); the first run records it. Set
+REF_DOCS_BENCH_SCALES (default 1,10,100) to limit the scales.
+
+    python3 -m pytest scripts/benchmarks -q
+'''
+
+import contextlib
+import io
+import os
+
+import pytest
+
+from bench_parse_go import synthetic_go_source
+from harness import API_DOCS
+
+
+SCALES = [int(s) for s in (os.environ.get("REF_DOCS_BENCH_SCALES") or "1,10,100").split(",")]
+# Fewer timed runs as the input grows
+REPEAT = {1: 5, 10: 3}
+# Lines of Go source at scale 1, about one real api/v1alpha1 file
+GO_SOURCE_LINES = 2000
+
+LARGEST_API_DOC = max(API_DOCS, key=lambda doc: doc.stat().st_size) if API_DOCS else None
+API_DOC_CASES = [(doc, 1) for doc in API_DOCS] + [
+    (LARGEST_API_DOC, scale) for scale in SCALES if scale > 1 and LARGEST_API_DOC
+]
+
+
+def _api_doc_id(case):
+    doc, scale = case
+    return f"{doc.parts[-3]} x{scale}"
+
+
+@pytest.fixture(params=API_DOC_CASES, ids=_api_doc_id)
+def api_doc(request):
+    doc, scale = request.param
+    return _api_doc_id(request.param), doc.read_text(encoding="utf-8") * scale, scale
+
+
+@pytest.fixture(params=SCALES, ids=lambda scale: f"x{scale}")
+def go_source(request, tmp_path):
+    go_file = tmp_path / "types.go"
+    go_file.write_text(synthetic_go_source(GO_SOURCE_LINES * request.param), encoding="utf-8")
+    return f"{GO_SOURCE_LINES * request.param} lines", go_file, request.param
+
+
+def _run(baseline, name, fn, scale, size_bytes=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        problems = baseline.measure(name, fn, REPEAT.get(scale, 1), size_bytes)
+    assert not problems, "regressed beyond the baseline: " + "; ".join(problems)
+
+
+def test_post_process_api_docs(baseline, gen_ref_docs, api_doc):
+    label, content, scale = api_doc
+    _run(baseline, f"_post_process_api_docs[{label}]",
+         lambda: gen_ref_docs._post_process_api_docs(content), scale, len(content))
+
+
+def test_flatten_br_inside_code_spans(baseline, gen_ref_docs, api_doc):
+    label, content, scale = api_doc
+    _run(baseline, f"_flatten_br_inside_code_spans[{label}]",
+         lambda: gen_ref_docs._flatten_br_inside_code_spans(content), scale, len(content))
+
+
+def test_iter_code_spans(baseline, gen_ref_docs, api_doc):
+    label, content, scale = api_doc
+    lines = [line for line in content.split("\n") if "`" in line]
+
+    def spans():
+        for line in lines:
+            for _ in gen_ref_docs._iter_code_spans(line):
+                pass
+
+    _run(baseline, f"_iter_code_spans[{label}]", spans, scale, len(content))
+
+
+def test_apply_link_fixups(baseline, gen_ref_docs, api_doc):
+    label, content, scale = api_doc
+    _run(baseline, f"_apply_link_fixups[{label}]",
+         lambda: gen_ref_docs._apply_link_fixups(content), scale, len(content))
+
+
+def test_parse_go_file(baseline, gen_shared_types, go_source):
+    label, go_file, scale = go_source
+    _run(baseline, f"parse_go_file[{label}]",
+         lambda: gen_shared_types.parse_go_file(go_file), scale, go_file.stat().st_size)
+
+
+def test_generate_markdown(baseline, gen_shared_types, go_source):
+    label, go_file, scale = go_source
+    types = gen_shared_types.parse_go_file(go_file)
+    referenced = {t.name for t in types}
+    _run(baseline, f"generate_markdown[{label}]",
+         lambda: gen_shared_types.generate_markdown(types, referenced, set()), scale)
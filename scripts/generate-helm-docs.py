@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Render the Helm values reference page of a chart from its values.yaml.
+
+Reads install/helm/<chart>/values.yaml and the helm-docs comments above each
+key, and renders the page published under
+assets/kgw-docs/pages/reference/helm/<version>/ directly: a
+`| Key | Type | Description | Default |` table sorted by key, or a callout
+for a chart with no values. It replaces `helm-docs --dry-run` plus the
+header stripping and column swapping that generate-ref-docs.py used to do
+on its output.
+
+The comments follow the helm-docs conventions:
+
+    # -- Set the log level.        description of the key below
+    #    Continues here.           continuation, joined with a space
+    # -- (string) Image tag.       type hint, overrides the inferred type
+    # @default -- the app version  Default column text instead of the value
+    # @ignored                     leave the key and its children out
+    # controller.image -- Desc.    description given by key, anywhere
+
+A documented key always gets a row. An undocumented leaf (or empty map or
+list) gets one unless a map or list above it is documented, which covers
+it. Defaults are rendered as Go's encoding/json would render them.
+
+Usage:
+    generate-helm-docs.py <chart dir>
+"""
+
+import json
+import re
+import sys
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+
+import yaml
+
+
+NO_VALUES_PAGE = (
+    '\n\n{{< callout type="info" >}}\n'
+    'No configurable values are currently available for this chart.\n'
+    '{{< /callout >}}'
+)
+
+VALUES_HEADER = (
+    "\n## Values\n\n"
+    "| Key | Type | Description | Default |\n"
+    "|-----|------|-------------|---------|\n"
+)
+
+# The patterns helm-docs uses. A description starts at `# -- text`; the
+# optional group catches annotations written the same way (`# @default --`),
+# which are not descriptions. `# key -- text` gives a description by key.
+# Both need whitespace around `--`, so `# use --flag` or `foo--bar` inside a
+# description does not start a new one.
+DESCRIPTION_RE = re.compile(r"^\s*#\s+(@[^\s]+\s+)?--\s+(.*)$")
+KEY_DESCRIPTION_RE = re.compile(r"^\s*#\s*(\w[\w.\[\]-]*)\s+--\s+(.*)$")
+CONTINUATION_RE = re.compile(r"^\s*#\s?(.*)$")
+DEFAULT_RE = re.compile(r"^\s*#\s*@default\s*--\s*(.*)$")
+# Annotations helm-docs understands but that do not change this page.
+OTHER_ANNOTATION_RE = re.compile(r"^\s*#\s*@(?:raw|section|notationType)\b")
+IGNORED_RE = re.compile(r"^\s*#\s*@ignored\b")
+TYPE_HINT_RE = re.compile(r"^\((.*?)\)\s*(.*)$")
+
+
+@dataclass(frozen=True, slots=True)
+class ValueRow:
+    key: str
+    type: str
+    description: str
+    default: str  # As shown in the table, e.g. `"info"`
+
+
+@dataclass(frozen=True, slots=True)
+class ValueDoc:
+    description: str = ""
+    type_hint: str = ""
+    default: str = ""  # From @default, shown as written
+
+
+class _Loader(yaml.SafeLoader):
+    """SafeLoader that resolves scalars like the Go YAML library behind helm-docs.
+
+    Only true/false are booleans (yes, no, on and off stay strings), and
+    dates stay strings instead of becoming datetime objects.
+    """
+
+
+_Loader.yaml_implicit_resolvers = {
+    first: [
+        (tag, regexp) for tag, regexp in resolvers
+        if tag not in ("tag:yaml.org,2002:bool", "tag:yaml.org,2002:timestamp")
+    ]
+    for first, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()
+}
+_Loader.add_implicit_resolver(
+    "tag:yaml.org,2002:bool", re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"), list("tTfF")
+)
+
+
+def _go_float(value: float) -> str:
+    """Format a float like Go's encoding/json: no trailing .0, exponent only for tiny or huge values."""
+    if value != value or value in (float("inf"), float("-inf")):
+        return str(value)
+    if value != 0 and (abs(value) < 1e-6 or abs(value) >= 1e21):
+        return re.sub(r"e([+-])0(\d)$", r"e\1\2", repr(value))
+    text = format(Decimal(repr(value)), "f")
+    return text.rstrip("0").rstrip(".") if "." in text else text
+
+
+def _go_string(value: str) -> str:
+    """Quote a string like Go's encoding/json, which also escapes <, > and &."""
+    text = json.dumps(value, ensure_ascii=False)
+    for char, escape in (("<", "\\u003c"), (">", "\\u003e"), ("&", "\\u0026"),
+                         ("\u2028", "\\u2028"), ("\u2029", "\\u2029")):
+        text = text.replace(char, escape)
+    return text
+
+
+def go_json(value) -> str:
+    """Render a parsed YAML value as compact JSON with sorted keys, as Go's json.Marshal does."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return _go_float(value)
+    if isinstance(value, list):
+        return "[" + ",".join(go_json(item) for item in value) + "]"
+    if isinstance(value, dict):
+        items = sorted((str(key), item) for key, item in value.items())
+        return "{" + ",".join(f"{_go_string(key)}:{go_json(item)}" for key, item in items) + "}"
+    return _go_string(str(value))
+
+
+def type_name(value) -> str:
+    """The helm-docs type of a value; null counts as a string."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, list):
+        return "list"
+    if isinstance(value, dict):
+        return "object"
+    return "string"
+
+
+def parse_comment(comment_lines: list[str]) -> tuple[str, ValueDoc | None]:
+    """Parse a comment block into (key, doc).
+
+    The description starts at the last `# --` (or `# key --`) line of the
+    block, and every later comment line continues it. key is empty for a
+    `# --` description, which documents the key below the block. doc is None
+    when the block has no description.
+    """
+    start = None
+    for i, line in enumerate(comment_lines):
+        match = DESCRIPTION_RE.match(line)
+        if match and not match.group(1):
+            start, key, description = i, "", match.group(2)
+            continue
+        match = KEY_DESCRIPTION_RE.match(line)
+        if match:
+            start, key, description = i, match.group(1), match.group(2)
+    if start is None:
+        return "", None
+
+    default = ""
+    for line in comment_lines[start + 1:]:
+        default_match = DEFAULT_RE.match(line)
+        if default_match:
+            default = default_match.group(1)
+        elif not OTHER_ANNOTATION_RE.match(line):
+            description += " " + CONTINUATION_RE.match(line).group(1)
+
+    type_hint = ""
+    hint_match = TYPE_HINT_RE.match(description)
+    if hint_match:
+        type_hint, description = hint_match.groups()
+    return key, ValueDoc(description.strip(), type_hint, default)
+
+
+def _comment_blocks(lines: list[str]):
+    """Yield (index of the first non-comment line after it, block) for each run of comment lines."""
+    block = []
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("#"):
+            block.append(line)
+        elif block:
+            yield i, block
+            block = []
+    if block:
+        yield len(lines), block
+
+
+def _docs_by_key(lines: list[str]) -> dict[str, ValueDoc]:
+    """Descriptions written as `# some.key -- text`, which may sit anywhere in the file."""
+    docs = {}
+    for _, block in _comment_blocks(lines):
+        key, doc = parse_comment(block)
+        if key and doc:
+            docs[key] = doc
+    return docs
+
+
+class _RowBuilder:
+    def __init__(self, text: str):
+        self.lines = text.splitlines()
+        # Comment blocks keyed by the line right below them
+        self.head_comments = dict(_comment_blocks(self.lines))
+        self.docs_by_key = _docs_by_key(self.lines)
+        self.loader = _Loader(text)
+        self.rows: list[ValueRow] = []
+
+    def build(self) -> list[ValueRow]:
+        try:
+            root = self.loader.get_single_node()
+            if isinstance(root, yaml.MappingNode):
+                self._children(root, "", document_leaves=True)
+        finally:
+            self.loader.dispose()
+        return sorted(self.rows, key=lambda row: row.key)
+
+    def _head_comment(self, mark) -> list[str]:
+        """The comment block right above a node that starts its line (not one inside a flow collection)."""
+        if self.lines[mark.line][:mark.column].strip() not in ("", "-"):
+            return []
+        return self.head_comments.get(mark.line, [])
+
+    def _children(self, node, prefix: str, document_leaves: bool) -> None:
+        if isinstance(node, yaml.MappingNode):
+            for key_node, value_node in node.value:
+                key = f"{prefix}.{key_node.value}" if prefix else str(key_node.value)
+                self._add(key, key_node.start_mark, value_node, document_leaves)
+        else:
+            for i, item in enumerate(node.value):
+                self._add(f"{prefix}[{i}]", item.start_mark, item, document_leaves)
+
+    def _add(self, key: str, mark, node, document_leaves: bool) -> None:
+        comment = self._head_comment(mark)
+        if any(IGNORED_RE.match(c) for c in comment):
+            return
+        comment_key, doc = parse_comment(comment)
+        doc = self.docs_by_key.get(key) or (doc if not comment_key else None)
+        documented = doc is not None and bool(doc.description or doc.default)
+        has_children = isinstance(node, (yaml.MappingNode, yaml.SequenceNode)) and bool(node.value)
+        if documented or (document_leaves and not has_children):
+            value = self.loader.construct_object(node, deep=True)
+            doc = doc or ValueDoc()
+            self.rows.append(ValueRow(
+                key=key,
+                type=doc.type_hint or type_name(value),
+                description=doc.description,
+                default=doc.default or f"`{go_json(value) if value is not None else 'nil'}`",
+            ))
+        if has_children:
+            # As in helm-docs, documenting a map or list documents its
+            # undocumented leaves too, so they get no rows of their own.
+            self._children(node, key, document_leaves and not documented)
+
+
+def values_rows(text: str) -> list[ValueRow]:
+    """Every row of the values table for the content of a values.yaml, sorted by key."""
+    return _RowBuilder(text).build()
+
+
+def render_values_page(rows: list[ValueRow]) -> str:
+    """The published values page for a chart's rows."""
+    if not rows:
+        return NO_VALUES_PAGE
+    table = "".join(f"| {r.key} | {r.type} | {r.description} | {r.default} |\n" for r in rows)
+    return VALUES_HEADER + table
+
+
+def render_chart_page(chart_dir: Path) -> str:
+    """Render the values page of the chart in chart_dir; a chart without values.yaml has no values."""
+    values_file = Path(chart_dir) / "values.yaml"
+    text = values_file.read_text(encoding="utf-8") if values_file.exists() else ""
+    return render_values_page(values_rows(text))
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: generate-helm-docs.py <chart dir>")
+        sys.exit(1)
+    sys.stdout.write(render_chart_page(Path(sys.argv[1])))
+
+
+if __name__ == "__main__":
+    main()
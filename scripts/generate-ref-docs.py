@@ -6,17 +6,89 @@ This script processes versions from hugo.yaml and generates documentation
 for each version by cloning the kgateway repository and running doc generators.
 """
 
+import argparse
+import contextlib
+import glob
+import hashlib
+import io
 import json
 import sys
+import tempfile
+import time
 import subprocess
 import os
 import re
 import platform
+import shlex
 import shutil
 import stat
-
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from script_modules import import_script
+
+try:
+    import resource
+except ImportError:  # Windows: spans are recorded without rusage
+    resource = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: mirror worktrees are added without a lock
+    fcntl = None
+
+
+# Upstream repository the docs are generated from. Override with
+# KGATEWAY_REPO_URL to point at a fork or a local file:// mirror.
+KGATEWAY_REPO_URL = os.environ.get('KGATEWAY_REPO_URL') or 'https://github.com/kgateway-dev/kgateway.git'
+
+# Helm charts to document, as 'directory:filename' where directory is under
+# install/helm/ and filename is the generated page name.
+HELM_CHARTS = [
+    'kgateway:kgateway',
+    'kgateway-crds:kgateway-crds',
+]
+
+# What each doc stage reads from the kgateway checkout, as non-cone
+# sparse-checkout patterns for --sparse. crd-ref-docs loads api/v1alpha1 as a
+# Go package, so it needs the module files. findmetrics is built with `go run`
+# and scans the Go sources for metric definitions, which kgateway keeps under
+# pkg/ (internal/ before 2.1). Test files define no documented metrics.
+STAGE_SPARSE_PATTERNS = {
+    'api docs': ['/api/v1alpha1/', '/go.mod', '/go.sum'],
+    'helm docs': [f'/install/helm/{chart.split(":")[0]}/' for chart in HELM_CHARTS],
+    'metrics docs': ['/go.mod', '/go.sum', '/pkg/**/*.go', '/internal/**/*.go',
+                     '!/pkg/**/*_test.go', '!/internal/**/*_test.go'],
+}
+
+# Pinned Go doc tools, by the name used in logs and as the binary name.
+GO_TOOLS = {
+    'crd-ref-docs': 'github.com/elastic/crd-ref-docs@v0.1.0',
+}
+
+# Every external doc tool. findmetrics is built from the kgateway checkout
+# itself with `go run`. Any of them can be replaced by another command (see
+# tool_command), for example by the offline stubs in scripts/tests/offline/.
+DOC_TOOLS = (*GO_TOOLS, 'findmetrics')
+
+# API packages of the 2.2.x+ split API reference, mapped to the content/docs/
+# directory that gets each package's api.md. Other packages are skipped.
+API_PACKAGE_DOC_DIRS = {
+    'gateway.kgateway.dev/v1alpha1': 'envoy',
+}
+
+API_DOC_FRONT_MATTER = (
+    '---\n'
+    'title: API reference\n'
+    'weight: 10\n'
+    'description: Reference documentation for the kgateway API custom resources.\n'
+    '---\n\n'
+    '{{< reuse "/kgw-docs/snippets/api-ref-docs-intro.md" >}}\n\n'
+)
 
 _LINK_FIXUPS_CACHE = None
+_GO_ENV_CACHE = None
 
 
 def _load_link_fixups(path='scripts/link-fixups.json'):
@@ -49,36 +121,144 @@ def _apply_link_fixups(content):
     source for already-released versions, so we rewrite them here. See
     scripts/link-fixups.json for the mapping and rationale.
     '''
-    total = 0
-    for fixup in _load_link_fixups():
-        old = fixup.get('old')
-        new = fixup.get('new')
-        if not old or new is None:
-            continue
-        occurrences = content.count(old)
-        if occurrences:
-            content = content.replace(old, new)
-            total += occurrences
+    content, total = _link_fixup_matcher().rewrite(content)
     if total:
         print(f'    ✓ Applied {total} link fixup(s)')
     return content
 
 
-def _apply_link_fixups_to_file(path):
-    '''Rewrite known-broken links in an already-written file.
+def _link_fixup_pairs():
+    '''Return the usable fix-ups as (old, new) pairs, in file order'''
+    return [(f.get('old'), f.get('new')) for f in _load_link_fixups()
+            if f.get('old') and f.get('new') is not None]
+
+
+def _overlaps(a, b):
+    '''True if an occurrence of a and an occurrence of b can share characters'''
+    return a in b or b in a or _straddles(a, b) or _straddles(b, a)
+
+
+def _straddles(a, b):
+    '''True if a can start before b and end inside it'''
+    return any(a.endswith(b[:k]) for k in range(1, min(len(a), len(b))))
+
 
-    Called after generate-shared-types.py appends to the API reference. That
-    appended section is read straight from Go doc comments, so it never went
-    through the fix-up pass in _post_process_api_docs.
+def _fixups_interact(earlier, later):
+    '''True if a single alternation over both fix-ups could differ from
+    applying earlier to the whole document before later.
+
+    A later 'old' that is contained in the earlier one is safe, since the
+    alternation tries the earlier (longer) entry first at every position, as
+    long as the later 'old' cannot start before an earlier match and run into
+    it. Any other overlap between the 'old' strings, an earlier 'new' that
+    could form part of the later 'old', or an earlier deletion (which joins
+    the text around it) is not.
     '''
-    if not os.path.exists(path):
+    (old, new), later_old = earlier, later[0]
+    if later_old in old:
+        clash = _straddles(later_old, old)
+    else:
+        clash = _overlaps(old, later_old)
+    return clash or not new or _overlaps(new, later_old)
+
+
+class LinkFixupMatcher:
+    '''Every link fix-up compiled into as few single-pass regexes as possible.
+
+    Fix-ups are defined as plain substring replacements applied top to bottom.
+    Consecutive entries that cannot interact are merged into one alternation
+    regex, so a document is scanned once per group rather than twice per
+    entry. An entry that interacts with one already in the current group (see
+    _fixups_interact) starts a new group, which keeps the result identical to
+    the sequential replacements.
+
+    hits counts the replacements made per (old, new) pair, so fix-ups that
+    never match any generated doc can be reported as stale. scans counts the
+    rewrite calls, to tell "never matched" apart from "never ran".
+    '''
+    __slots__ = ('pairs', 'hits', 'scans', '_groups', '_lock')
+
+    def __init__(self, pairs):
+        self.pairs = list(pairs)
+        self.hits = [0] * len(self.pairs)
+        self.scans = 0
+        self._groups = []
+        # Stages of one version rewrite links from several threads at once
+        self._lock = threading.Lock()
+        group = []
+        for index, (old, new) in enumerate(self.pairs):
+            if any(_fixups_interact(self.pairs[i], (old, new)) for i in group):
+                self._compile_group(group)
+                group = []
+            group.append(index)
+        self._compile_group(group)
+
+    def _compile_group(self, group):
+        if not group:
+            return
+        pattern = re.compile('|'.join(re.escape(self.pairs[i][0]) for i in group))
+        index_of = {}
+        for i in group:
+            index_of.setdefault(self.pairs[i][0], i)
+        self._groups.append((pattern, index_of))
+
+    def rewrite(self, content):
+        '''Apply every fix-up to content; return (content, replacements made)'''
+        matched = []
+        for pattern, index_of in self._groups:
+            content = pattern.sub(lambda m: self._replace(m, index_of, matched), content)
+        with self._lock:
+            self.scans += 1
+            for index in matched:
+                self.hits[index] += 1
+        return content, len(matched)
+
+    def _replace(self, match, index_of, matched):
+        index = index_of[match.group()]
+        matched.append(index)
+        return self.pairs[index][1]
+
+    def reset(self):
+        with self._lock:
+            self.hits = [0] * len(self.pairs)
+            self.scans = 0
+
+    def hit_counts(self):
+        '''Return {old: replacements made} for every fix-up, or {} if no
+        content has been scanned yet'''
+        counts = {}
+        if not self.scans:
+            return counts
+        for (old, _), hits in zip(self.pairs, self.hits):
+            counts[old] = counts.get(old, 0) + hits
+        return counts
+
+
+_LINK_FIXUP_MATCHER = None
+
+
+def _link_fixup_matcher():
+    '''Return the matcher for the loaded fix-ups, compiling it on first use.'''
+    global _LINK_FIXUP_MATCHER
+    fixups = _load_link_fixups()
+    if _LINK_FIXUP_MATCHER is None or _LINK_FIXUP_MATCHER[0] is not fixups:
+        _LINK_FIXUP_MATCHER = (fixups, LinkFixupMatcher(_link_fixup_pairs()))
+    return _LINK_FIXUP_MATCHER[1]
+
+
+def report_stale_link_fixups(hit_counts):
+    '''Print the fix-ups that rewrote nothing in this run.
+
+    A fix-up that never matches usually means the upstream comment changed
+    or the versions that needed it dropped out of versions.json, so the entry
+    can be removed from scripts/link-fixups.json.
+    '''
+    stale = [old for old, hits in hit_counts.items() if not hits]
+    if not stale:
         return
-    with open(path) as f:
-        content = f.read()
-    fixed = _apply_link_fixups(content)
-    if fixed != content:
-        with open(path, 'w') as f:
-            f.write(fixed)
+    print(f'⚠ {len(stale)} link fix-up(s) matched nothing in this run:')
+    for old in stale:
+        print(f'   {old}')
 
 
 def safe_rmtree(path):
@@ -92,44 +272,291 @@ def safe_rmtree(path):
 
 
 
-def resolve_tag_for_version(version, link_version):
-    '''Resolve the git tag to use for a given version (for release triggers)'''
+def default_cache_dir():
+    '''Directory for caches that persist between runs.
+
+    $REF_DOCS_CACHE_DIR, else $XDG_CACHE_HOME/kgateway-ref-docs, else
+    ~/.cache/kgateway-ref-docs. Deliberately outside the docs checkout so that
+    cache files never end up in the generated docs PR.
+    '''
+    if os.environ.get('REF_DOCS_CACHE_DIR'):
+        return os.environ['REF_DOCS_CACHE_DIR']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'kgateway-ref-docs')
+
+
+# With --trace, every stage and subprocess is recorded as a span in Chrome
+# trace-event format (open the file in https://ui.perfetto.dev or
+# chrome://tracing). Set through the environment so parallel workers inherit
+# it; each worker returns its own events to the parent.
+_TRACE_EVENTS = [] if os.environ.get('REF_DOCS_TRACE') else None
+
+
+def enable_trace():
+    '''Start recording trace spans, dropping any recorded so far'''
+    global _TRACE_EVENTS
+    _TRACE_EVENTS = []
+
+
+def take_trace_events():
+    '''Return the spans recorded so far and start a new list'''
+    global _TRACE_EVENTS
+    if _TRACE_EVENTS is None:
+        return []
+    events, _TRACE_EVENTS = _TRACE_EVENTS, []
+    return events
+
+
+def _rusage():
+    '''(own CPU seconds, children CPU seconds, children peak RSS in KiB)
+
+    Own CPU is this thread's where the platform reports it (Linux), so spans
+    of stages running side by side on their own threads don't count each
+    other's work. Children are always counted for the whole process.
+    '''
+    if resource is None:
+        return None
+    own = resource.getrusage(getattr(resource, 'RUSAGE_THREAD', resource.RUSAGE_SELF))
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in KiB on Linux but in bytes on macOS
+    max_rss = children.ru_maxrss // 1024 if sys.platform == 'darwin' else children.ru_maxrss
+    return own.ru_utime + own.ru_stime, children.ru_utime + children.ru_stime, max_rss
+
+
+@contextlib.contextmanager
+def trace_span(name, category='stage', **args):
+    '''Record the enclosed block as a complete ("X") trace event.
+
+    Besides wall time, the span's args get the CPU time used by this process
+    and by the child processes that finished inside the span. The kernel only
+    keeps the peak RSS of the largest child so far, so child_max_rss_kb is
+    that high-water mark when the span ends: exact for the child that set it.
+    '''
+    if _TRACE_EVENTS is None:
+        yield
+        return
+    before = _rusage()
+    start = time.monotonic_ns()
+    try:
+        yield
+    finally:
+        end = time.monotonic_ns()
+        if before:
+            after = _rusage()
+            args.update(cpu_s=round(after[0] - before[0], 6), child_cpu_s=round(after[1] - before[1], 6))
+            if after[1] > before[1]:
+                args['child_max_rss_kb'] = after[2]
+        _TRACE_EVENTS.append({
+            'name': name, 'cat': category, 'ph': 'X',
+            'ts': start // 1000, 'dur': (end - start) // 1000,
+            'pid': os.getpid(), 'tid': threading.get_native_id(), 'args': args,
+        })
+
+
+def trace_process_name(name):
+    '''Label this process's track in the trace viewer'''
+    if _TRACE_EVENTS is not None:
+        _TRACE_EVENTS.append({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': name}})
+
+
+def _command_name(cmd):
+    '''Short span name for a command: "git clone", "go run", "crd-ref-docs"'''
+    name = os.path.basename(str(cmd[0]))
+    args = [str(a) for a in cmd[1:]]
+    if name == 'git' and args[:1] == ['-C']:
+        args = args[2:]
+    if name in ('git', 'go') and args:
+        name += f' {args[0]}'
+    return name
+
+
+def traced_run(cmd, **kwargs):
+    '''subprocess.run, recorded as a trace span with the child's rusage.
+
+    On a stage thread (see run_version_stages), output the caller leaves
+    inherited is captured into the stage's log instead, so it is printed
+    with the rest of that stage rather than interleaved on the terminal.
+    '''
+    log = _stage_log()
+    captured = []
+    if log is not None and not kwargs.get('capture_output'):
+        captured = [stream for stream in ('stdout', 'stderr') if kwargs.get(stream) is None]
+        for stream in captured:
+            kwargs[stream] = subprocess.PIPE
+        if len(captured) == 2:
+            kwargs['stderr'] = subprocess.STDOUT
+    check = kwargs.pop('check', False) if captured else False
+    with trace_span(_command_name(cmd), 'subprocess', cmd=' '.join(str(a) for a in cmd)):
+        result = subprocess.run(cmd, **kwargs)
+    for stream in captured:
+        output = getattr(result, stream)
+        if output:
+            log.write(output if isinstance(output, str) else output.decode(errors='replace'))
+        setattr(result, stream, None)
+    if check:
+        result.check_returncode()
+    return result
+
+
+def write_trace(path, events):
+    '''Write events as a trace-event JSON file'''
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def format_trace_summary(events):
+    '''Per-span-name totals, most wall time first.
+
+    Nested spans are each counted in full, so a stage's time includes its
+    subprocesses and sub-stages.
+    '''
+    totals = {}  # name -> [count, wall us, cpu s, child cpu s, child max rss kb]
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        total = totals.setdefault(event['name'], [0, 0, 0.0, 0.0, 0])
+        args = event['args']
+        total[0] += 1
+        total[1] += event['dur']
+        total[2] += args.get('cpu_s', 0.0)
+        total[3] += args.get('child_cpu_s', 0.0)
+        total[4] = max(total[4], args.get('child_max_rss_kb', 0))
+    rows = [f'{"stage":<28} {"count":>5} {"wall":>10} {"cpu":>9} {"child cpu":>10} {"child rss":>10}']
+    for name, (count, wall, cpu, child_cpu, rss) in sorted(totals.items(), key=lambda kv: kv[1][1], reverse=True):
+        rss_text = f'{rss / 1024:.0f} MiB' if rss else '-'
+        rows.append(f'{name[:28]:<28} {count:>5} {wall / 1e6:>9.2f}s {cpu:>8.2f}s {child_cpu:>9.2f}s {rss_text:>10}')
+    return '\n'.join(rows)
+
+
+def _parse_ls_remote(output):
+    '''Parse `git ls-remote` output into {'heads': {name: sha}, 'tags': {name: sha}}.
+
+    For annotated tags, ls-remote lists both the tag object and the peeled
+    commit (`refs/tags/v2.2.1^{}`); the peeled commit SHA wins.
+    '''
+    refs = {'heads': {}, 'tags': {}}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) != 2:
+            continue
+        sha, ref = parts
+        if ref.startswith('refs/heads/'):
+            refs['heads'][ref[len('refs/heads/'):]] = sha
+        elif ref.startswith('refs/tags/'):
+            name = ref[len('refs/tags/'):]
+            if name.endswith('^{}'):
+                refs['tags'][name[:-3]] = sha
+            else:
+                refs['tags'].setdefault(name, sha)
+    return refs
+
+
+def list_remote_refs(repo_url=None, cache_file=None, ttl=0):
+    '''List every branch and tag of the kgateway repo with one `git ls-remote`.
+
+    With cache_file and a positive ttl (seconds), a listing of the same
+    repo_url that is younger than ttl is read from disk instead, so re-runs
+    within a few minutes skip the network entirely. A listing read from disk
+    has 'from_cache' set, since its SHAs may be behind the remote (see
+    live_commit_for_ref). Raises subprocess.CalledProcessError if ls-remote
+    fails.
+    '''
+    repo_url = repo_url or KGATEWAY_REPO_URL
+    if cache_file and ttl > 0 and os.path.exists(cache_file):
+        try:
+            with open(cache_file) as f:
+                cached = json.load(f)
+            age = time.time() - cached['fetched_at']
+            if cached['repo_url'] == repo_url and 0 <= age < ttl:
+                print(f'Using cached ref listing from {cache_file} ({age:.0f}s old)')
+                return {**cached['refs'], 'from_cache': True}
+        except (json.JSONDecodeError, KeyError, TypeError, OSError):
+            pass  # Unreadable cache: just fetch again
+    
+    result = traced_run(['git', 'ls-remote', '--heads', '--tags', repo_url],
+                            capture_output=True, text=True, check=True)
+    refs = _parse_ls_remote(result.stdout)
+    
+    if cache_file and ttl > 0:
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'repo_url': repo_url, 'fetched_at': time.time(), 'refs': refs}, f)
+        os.replace(tmp_file, cache_file)
+    return refs
+
+
+def live_commit_for_ref(ref, repo_url=None):
+    '''Return the commit SHA a branch or tag points to on the remote now.
+
+    Lists only that ref, so it is cheap enough to run per version. Returns
+    None if the ref does not exist; raises subprocess.CalledProcessError if
+    ls-remote fails.
+    '''
+    repo_url = repo_url or KGATEWAY_REPO_URL
+    result = traced_run(['git', 'ls-remote', repo_url, f'refs/heads/{ref}', f'refs/tags/{ref}', f'refs/tags/{ref}^{{}}'],
+                        capture_output=True, text=True, check=True)
+    return commit_for_ref(ref, _parse_ls_remote(result.stdout))
+
+
+_STABLE_TAG_RE = re.compile(r'^v(\d+)\.(\d+)\.(\d+)$')
+
+
+def build_tag_index(refs):
+    '''Index stable release tags by version family, newest first.
+
+    {'2.2.x': ['v2.2.5', 'v2.2.1'], ...}. Prerelease and other suffixed tags
+    (-rc, -beta, -main, -agw, ...) are not stable releases and are left out.
+    '''
+    index = {}
+    for tag in refs['tags']:
+        m = _STABLE_TAG_RE.match(tag)
+        if m:
+            major, minor, patch = (int(n) for n in m.groups())
+            index.setdefault(f'{major}.{minor}.x', []).append(((major, minor, patch), tag))
+    return {family: [tag for _, tag in sorted(tags, reverse=True)] for family, tags in index.items()}
+
+
+def commit_for_ref(ref, refs):
+    '''Return the commit SHA a branch or tag name points to, or None if unknown'''
+    if not refs or not ref:
+        return None
+    return refs['heads'].get(ref) or refs['tags'].get(ref)
+
+
+def resolve_tag_for_version(version, link_version, refs=None):
+    '''Resolve the git tag to use for a given version (for release triggers)
+
+    refs is a listing from list_remote_refs; without one, the remote is
+    listed on the spot.
+    '''
     if link_version == 'main':
         return 'main'
     
-    # For other linkVersions, get the latest tag matching the version pattern
-    try:
-        result = subprocess.run(['git', 'ls-remote', '--tags', '--sort=-version:refname', 'https://github.com/kgateway-dev/kgateway.git'], 
-                              capture_output=True, text=True, check=True)
-        if result.stdout.strip():
-            # Filter tags that match our version pattern
-            # Create regex pattern: 2.1.x becomes v2\.1\.\d+
-            version_pattern = version.replace('.x', r'\.\d+')
-            pattern = f'v{version_pattern}'
-            matching_tags = []
-            for line in result.stdout.strip().split('\n'):
-                if 'refs/tags/' in line:
-                    tag_name = line.split('/')[-1]
-                    if re.match(pattern, tag_name) and not any(suffix in tag_name for suffix in ['-rc', '-beta', '-main', '-agw']):
-                        matching_tags.append(tag_name)
-            
-            if matching_tags:
-                # Sort by version and take the latest
-                matching_tags.sort(key=lambda x: [int(n) for n in x.replace('v', '').split('.')], reverse=True)
-                return matching_tags[0]
-            else:
-                print(f'No stable tags found for version {version}')
-                return None
-        else:
-            print(f'No tags found in repository for version {version}')
+    if refs is None:
+        try:
+            refs = list_remote_refs()
+        except subprocess.CalledProcessError as e:
+            print(f'Error fetching tags for version {version}: {e}')
             return None
-    except subprocess.CalledProcessError as e:
-        print(f'Error fetching tags for version {version}: {e}')
+    
+    if not refs['tags']:
+        print(f'No tags found in repository for version {version}')
+        return None
+    
+    matching_tags = build_tag_index(refs).get(version)
+    if not matching_tags:
+        print(f'No stable tags found for version {version}')
         return None
+    return matching_tags[0]
+
 
+def resolve_branch_for_version(version, link_version, refs=None):
+    '''Resolve the git branch to use for a given version (for manual triggers)
 
-def resolve_branch_for_version(version, link_version):
-    '''Resolve the git branch to use for a given version (for manual triggers)'''
+    refs is a listing from list_remote_refs; without one, the remote is
+    listed on the spot.
+    '''
     if link_version == 'main':
         return 'main'
     
@@ -138,32 +565,250 @@ def resolve_branch_for_version(version, link_version):
     branch_name = f'v{version}'
     
     # Verify the branch exists in the remote repository
-    try:
-        result = subprocess.run(['git', 'ls-remote', '--heads', 'https://github.com/kgateway-dev/kgateway.git', branch_name], 
-                              capture_output=True, text=True, check=True)
-        if result.stdout.strip():
-            print(f'   Found branch: {branch_name}')
-            return branch_name
-        else:
-            print(f'   Warning: Branch {branch_name} not found, trying to use it anyway')
+    if refs is None:
+        try:
+            refs = list_remote_refs()
+        except subprocess.CalledProcessError as e:
+            print(f'   Warning: Error checking branch {branch_name}: {e}')
             # Still return the branch name - clone will fail if it doesn't exist
             return branch_name
-    except subprocess.CalledProcessError as e:
-        print(f'   Warning: Error checking branch {branch_name}: {e}')
+    
+    if branch_name in refs['heads']:
+        print(f'   Found branch: {branch_name}')
+    else:
         # Still return the branch name - clone will fail if it doesn't exist
-        return branch_name
+        print(f'   Warning: Branch {branch_name} not found, trying to use it anyway')
+    return branch_name
+
+
+def _go_env():
+    '''Return the Go toolchain identity (version, OS, arch) as one string (cached)'''
+    global _GO_ENV_CACHE
+    if _GO_ENV_CACHE is None:
+        result = traced_run(['go', 'env', 'GOVERSION', 'GOOS', 'GOARCH'],
+                                capture_output=True, text=True, check=True)
+        _GO_ENV_CACHE = '-'.join(result.stdout.split())
+    return _GO_ENV_CACHE
+
+
+def go_tool_binary(name, cache_dir=None):
+    '''Return the path to a pinned Go tool, building it on first use.
+
+    Binaries are cached under <cache_dir>/tools/<go version-os-arch>/<module@version>/,
+    so each tool is compiled once per Go toolchain instead of on every
+    `go run` call (once per chart, per version, per run). The build goes to a
+    temp directory and is renamed into place, so parallel workers racing to
+    build the same tool never see a half-written binary.
+    '''
+    module = GO_TOOLS[name]
+    cache_dir = cache_dir or default_cache_dir()
+    exe = f'{name}.exe' if platform.system() == 'Windows' else name
+    tool_dir = os.path.join(cache_dir, 'tools', _go_env(), module.replace('/', '_'))
+    binary = os.path.join(tool_dir, exe)
+    if os.path.exists(binary):
+        return binary
+    
+    os.makedirs(tool_dir, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f'.build-{name}-', dir=tool_dir)
+    try:
+        start = time.monotonic()
+        traced_run(['go', 'install', module], check=True,
+                       env={**os.environ, 'GOBIN': os.path.abspath(build_dir)})
+        os.replace(os.path.join(build_dir, exe), binary)
+        print(f'    ✓ Built {name} ({module}) in {time.monotonic() - start:.1f}s')
+    finally:
+        safe_rmtree(build_dir)
+    return binary
+
+
+def run_go_tool(name, args, **kwargs):
+    '''Run a pinned Go tool from the binary cache, or its replacement command
+    (see tool_command); kwargs go to subprocess.run'''
+    command = tool_command(name) or [go_tool_binary(name)]
+    start = time.monotonic()
+    result = traced_run([*command, *args], **kwargs)
+    print(f'    {name} ran in {time.monotonic() - start:.1f}s')
+    return result
+
 
+def _tool_env_var(name):
+    return 'REF_DOCS_TOOL_' + name.upper().replace('-', '_')
 
-def clone_repository(ref, kgateway_dir='kgateway'):
-    '''Clone the kgateway repository at the specified branch or tag'''
+
+def tool_command(name):
+    '''The command line that replaces a doc tool, or None to use the real one.
+
+    Set with --tool NAME=COMMAND or $REF_DOCS_TOOL_<NAME> (upper case, dashes
+    as underscores, e.g. REF_DOCS_TOOL_CRD_REF_DOCS). COMMAND is split like a
+    shell command line, and the tool's usual arguments are appended to it.
+    '''
+    override = os.environ.get(_tool_env_var(name))
+    return shlex.split(override) if override else None
+
+
+def tool_overrides():
+    '''{tool name: replacement command} for every overridden doc tool'''
+    return {name: os.environ[_tool_env_var(name)] for name in DOC_TOOLS if os.environ.get(_tool_env_var(name))}
+
+
+def warm_go_tools(cache_dir=None):
+    '''Build every pinned tool into the cache (for CI to pre-populate it)'''
+    for name in GO_TOOLS:
+        print(f'{name}: {go_tool_binary(name, cache_dir)}')
+
+
+def sparse_patterns(stage_names):
+    '''The sparse-checkout patterns covering every path the given stages read'''
+    patterns = []
+    for name in stage_names:
+        patterns += [p for p in STAGE_SPARSE_PATTERNS[name] if p not in patterns]
+    return patterns
+
+
+def checkout_stats(kgateway_dir):
+    '''(files in the working tree, bytes of git objects) of a checkout.
+
+    The object bytes are what the clone received. A worktree of the mirror
+    keeps its objects in the mirror, so it has none of its own.
+    '''
+    files = 0
+    for root, dirs, names in os.walk(kgateway_dir):
+        if root == kgateway_dir:
+            dirs[:] = [d for d in dirs if d != '.git']
+            names = [n for n in names if n != '.git']  # A worktree's .git is a file
+        files += len(names)
+    object_bytes = 0
+    for root, _, names in os.walk(os.path.join(kgateway_dir, '.git', 'objects')):
+        object_bytes += sum(os.path.getsize(os.path.join(root, n)) for n in names)
+    return files, object_bytes
+
+
+def _sparse_checkout(kgateway_dir, patterns, *checkout_args):
+    '''Limit a checkout made with --no-checkout to patterns, then check it out'''
+    traced_run(['git', '-C', kgateway_dir, 'sparse-checkout', 'set', '--no-cone', *patterns], check=True)
+    traced_run(['git', '-C', kgateway_dir, 'checkout', '-q', *checkout_args], check=True)
+
+
+def clone_repository(ref, kgateway_dir='kgateway', mirror_dir=None, sparse=None):
+    '''Clone the kgateway repository at the specified branch or tag
+
+    With mirror_dir, check the ref out as a worktree of the local bare mirror
+    (see ensure_mirror) instead of cloning from the network. With sparse, a
+    list of sparse-checkout patterns (see sparse_patterns), only the matching
+    paths are written, and a fresh clone is blob-less (--filter=blob:none), so
+    it only downloads the file contents of those paths.
+    '''
     # Clean up any existing directory
     safe_rmtree(kgateway_dir)
     
+    start = time.monotonic()
+    mode = ' (sparse)' if sparse else ''
+    no_checkout = ['--no-checkout'] if sparse else []
+    if mirror_dir:
+        with _mirror_lock(mirror_dir):
+            # git -C resolves a relative worktree path against the mirror, not the cwd
+            traced_run(['git', '-C', mirror_dir, 'worktree', 'add', '--detach', '--force', *no_checkout,
+                        os.path.abspath(kgateway_dir), ref], check=True)
+            if sparse:
+                _sparse_checkout(kgateway_dir, sparse, '--detach', ref)
+        files, _ = checkout_stats(kgateway_dir)
+        print(f'   Checked out {ref} from mirror{mode} in {time.monotonic() - start:.1f}s: {files:,} files')
+        return
+    
     # Clone repository
+    partial = ['--filter=blob:none', *no_checkout] if sparse else []
     if ref == 'main':
-        subprocess.run(['git', 'clone', '--branch', 'main', '--depth', '1', 'https://github.com/kgateway-dev/kgateway.git', kgateway_dir], check=True)
+        traced_run(['git', 'clone', '--branch', 'main', '--depth', '1', *partial, KGATEWAY_REPO_URL, kgateway_dir],
+                   check=True)
     else:
-        subprocess.run(['git', 'clone', '--depth', '1', '--branch', ref, 'https://github.com/kgateway-dev/kgateway.git', kgateway_dir], check=True)
+        traced_run(['git', 'clone', '--depth', '1', '--branch', ref, *partial, KGATEWAY_REPO_URL, kgateway_dir],
+                   check=True)
+    if sparse:
+        # Fetches the blobs of the matching paths in one batch
+        _sparse_checkout(kgateway_dir, sparse, ref)
+    files, object_bytes = checkout_stats(kgateway_dir)
+    print(f'   Cloned {ref}{mode} in {time.monotonic() - start:.1f}s: {files:,} files, '
+          f'{object_bytes / 1e6:.1f} MB of objects')
+
+
+def remove_checkout(kgateway_dir='kgateway', mirror_dir=None):
+    '''Remove a checkout made by clone_repository, including its worktree entry.
+
+    A worktree is removed by path, which only touches its own entry in the
+    mirror. Entries left behind by a failed removal are pruned by the next
+    ensure_mirror; a prune here could delete the entry of a worktree that a
+    parallel worker is still adding.
+    '''
+    if mirror_dir and os.path.exists(kgateway_dir):
+        with _mirror_lock(mirror_dir):
+            traced_run(['git', '-C', mirror_dir, 'worktree', 'remove', '--force', os.path.abspath(kgateway_dir)],
+                       check=False)
+    safe_rmtree(kgateway_dir)
+
+
+@contextlib.contextmanager
+def _mirror_lock(mirror_dir):
+    '''Hold the mirror's worktree lock, across threads and parallel workers.
+
+    `git worktree add` and `remove` read every worktree entry of the mirror,
+    and fail on one that another process is still creating, so checkouts
+    from the mirror take turns.
+    '''
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(mirror_dir, 'refdocs-worktree.lock'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def ensure_mirror(cache_dir, repo_url=None):
+    '''Create or update a bare mirror of kgateway under cache_dir.
+
+    The first run does a full `git clone --mirror` (cold); later runs only
+    fetch new objects into the existing mirror (warm). Every version is then
+    checked out from the mirror as a worktree, so objects shared between
+    versions are downloaded once instead of once per version per run.
+    Returns the mirror path.
+
+    This is also the only place that changes the mirror's shared state:
+    stale worktree entries from interrupted runs are pruned, and per-worktree
+    config (which `git sparse-checkout` needs) is turned on, before any
+    parallel worker adds a worktree.
+    '''
+    repo_url = repo_url or KGATEWAY_REPO_URL
+    mirror_dir = os.path.abspath(os.path.join(cache_dir, 'kgateway.git'))
+    start = time.monotonic()
+    if os.path.exists(os.path.join(mirror_dir, 'HEAD')):
+        traced_run(['git', '-C', mirror_dir, 'remote', 'set-url', 'origin', repo_url], check=True)
+        traced_run(['git', '-C', mirror_dir, 'fetch', '--prune', '--tags', 'origin'], check=True)
+        print(f'✓ Updated kgateway mirror in {mirror_dir} (warm) in {time.monotonic() - start:.1f}s')
+    else:
+        os.makedirs(cache_dir, exist_ok=True)
+        safe_rmtree(mirror_dir)
+        traced_run(['git', 'clone', '--mirror', repo_url, mirror_dir], check=True)
+        print(f'✓ Cloned kgateway mirror into {mirror_dir} (cold) in {time.monotonic() - start:.1f}s')
+    traced_run(['git', '-C', mirror_dir, 'worktree', 'prune'], check=True)
+    _enable_worktree_config(mirror_dir)
+    return mirror_dir
+
+
+def _enable_worktree_config(mirror_dir):
+    '''Turn on extensions.worktreeConfig as `git sparse-checkout` does on first use.
+
+    Like git, this moves core.bare into the mirror's own config.worktree, so
+    it does not apply to the worktrees.
+    '''
+    git = ['git', '-C', mirror_dir, 'config']
+    enabled = traced_run([*git, '--bool', 'extensions.worktreeConfig'], capture_output=True, text=True)
+    if enabled.stdout.strip() == 'true':
+        return
+    traced_run([*git, 'extensions.worktreeConfig', 'true'], check=True)
+    traced_run([*git, '--worktree', 'core.bare', 'true'], check=True)
+    traced_run([*git, '--local', '--unset', 'core.bare'], check=False)
 
 
 def is_version_2_2_or_later(version):
@@ -182,75 +827,58 @@ def is_version_2_2_or_later(version):
         return False
 
 
-def extract_package_section(content, package_name):
-    '''Extract a specific package section from generated markdown'''
-    lines = content.split('\n')
-    
-    # Find the Packages section header
-    packages_start = None
-    packages_end = None
-    
-    for i, line in enumerate(lines):
-        if line.strip() == '## Packages':
-            packages_start = i
-        elif packages_start is not None and line.strip().startswith('## ') and not line.strip() == '## Packages':
-            packages_end = i
-            break
-    
-    if packages_start is None:
-        return None
-    
-    if packages_end is None:
-        packages_end = len(lines)
-    
-    # Extract and filter the Packages list
-    packages_section = ['## Packages']
-    found_package = False
-    
-    for i in range(packages_start + 1, packages_end):
-        line = lines[i]
-        # Check if this line contains the target package
-        if package_name in line:
-            packages_section.append(line)
-            found_package = True
-        elif found_package and line.strip() == '':
-            # Add empty line after packages list
-            packages_section.append('')
-            break
-    
-    if not found_package:
-        return None
-    
-    # Find the package section header
-    # Pattern: ## package.name/v1alpha1
-    package_header_pattern = rf'^## {re.escape(package_name)}$'
-    
-    package_start_idx = None
-    
-    # Find the start of the package section
-    for i, line in enumerate(lines):
-        if re.match(package_header_pattern, line.strip()):
-            package_start_idx = i
-            break
-    
-    if package_start_idx is None:
-        return None
+def split_package_sections(content):
+    '''Split generated markdown into one section per API package, in one pass.
+
+    Returns {package name: section}, where each section is the '## Packages'
+    list filtered down to the lines naming that package, followed by the
+    package's own '## <package>' section up to the next '## ' header. Only
+    packages that have both a list entry and a section are included.
+    '''
+    # Offset of every line that starts a '## ' header
+    starts = [0] if content.startswith('## ') else []
+    pos = content.find('\n## ')
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = content.find('\n## ', pos + 1)
     
-    # Find the end of the package section (next ## header or end of file)
-    package_end_idx = len(lines)
-    for i in range(package_start_idx + 1, len(lines)):
-        if lines[i].startswith('## '):
-            package_end_idx = i
-            break
+    packages_list = None  # Lines under '## Packages'
+    sections = {}  # package name -> its text, header included
+    for start, next_start in zip(starts, starts[1:] + [len(content) + 1]):
+        end = next_start - 1  # Drop the newline before the next header
+        header_end = content.find('\n', start, end)
+        if header_end == -1:
+            header_end = end
+        name = content[start + 3:header_end].strip()
+        if name == 'Packages':
+            if packages_list is None:
+                packages_list = content[header_end + 1:end].split('\n') if header_end < end else []
+        elif name not in sections:
+            sections[name] = content[start:end]
     
-    # Extract the package section content
-    package_section_lines = lines[package_start_idx:package_end_idx]
+    if packages_list is None:
+        return {}
     
-    # Combine packages section and package content
-    result = '\n'.join(packages_section + package_section_lines)
+    result = {}
+    for name, section in sections.items():
+        # The list entries for this package, up to the blank line after them
+        entries = []
+        for line in packages_list:
+            if name in line:
+                entries.append(line)
+            elif entries and line.strip() == '':
+                entries.append('')
+                break
+        if entries:
+            result[name] = '\n'.join(['## Packages'] + entries + [section])
     return result
 
 
+def extract_package_section(content, package_name):
+    '''Extract a specific package section from generated markdown'''
+    return split_package_sections(content).get(package_name)
+
+
 def _iter_code_spans(line):
     '''Yield (start, end, content) for every inline code span in one line.
 
@@ -266,27 +894,27 @@ def _iter_code_spans(line):
     `start` is the index of the opening backtick run, `end` the index of the
     closing run, so line[start:end+N] is the whole span including delimiters.
     '''
-    i, n = 0, len(line)
-    while i < n:
-        if line[i] == '`':
-            j = i
-            while j < n and line[j] == '`':
-                j += 1
-            run = j - i
-            close = line.find('`' * run, j)
-            # Skip closing candidates that are part of a LONGER backtick run.
-            while close != -1:
-                k = close
-                while k < n and line[k] == '`':
-                    k += 1
-                if k - close == run:
-                    break
-                close = line.find('`' * run, k)
-            if close != -1:
-                yield i, close, line[j:close]
-                i = close + run
-                continue
-        i += 1
+    n = len(line)
+    i = line.find('`')
+    while i != -1:
+        j = i
+        while j < n and line[j] == '`':
+            j += 1
+        run = j - i
+        close = line.find('`' * run, j)
+        # Skip closing candidates that are part of a LONGER backtick run.
+        while close != -1:
+            k = close
+            while k < n and line[k] == '`':
+                k += 1
+            if k - close == run:
+                break
+            close = line.find('`' * run, k)
+        if close != -1:
+            yield i, close, line[j:close]
+            i = line.find('`', close + run)
+        else:
+            i = line.find('`', i + 1)
 
 
 def _flatten_br_inside_code_spans(content):
@@ -317,321 +945,459 @@ def _flatten_br_inside_code_spans(content):
     a backslash escape is not processed, so `\\{\\{inja\\}\\}` reaches the reader
     with its backslashes showing.
     '''
-    out = []
-    for line in content.split('\n'):
-        if '<br' not in line or '`' not in line:
-            out.append(line)
+    return '\n'.join(_flatten_br_in_line(line) for line in content.split('\n'))
+
+
+def _flatten_br_in_line(line):
+    '''_flatten_br_inside_code_spans for a single line'''
+    if '<br' not in line or '`' not in line:
+        return line
+    rebuilt, cursor = [], 0
+    for start, end, body in _iter_code_spans(line):
+        if '<br' not in body:
             continue
-        rebuilt, cursor = [], 0
-        for start, end, body in _iter_code_spans(line):
-            if '<br' not in body:
-                continue
-            ticks = start
-            while ticks < len(line) and line[ticks] == '`':
-                ticks += 1
-            delim = line[start:ticks]
-            fixed = re.sub(r'\s*<br\s*/?>\s*', ' ', body)
-            fixed = re.sub(r'^\s*(?:yaml|json|sh|bash|yml)\s+', '', fixed)
-            fixed = fixed.replace('\\{', '{').replace('\\}', '}')
-            fixed = re.sub(r'\s+', ' ', fixed).strip()
-            rebuilt.append(line[cursor:start])
-            rebuilt.append(f'{delim}{fixed}{delim}')
-            cursor = end + len(delim)
-        rebuilt.append(line[cursor:])
-        out.append(''.join(rebuilt))
-    return '\n'.join(out)
-
-
-def _post_process_api_docs(api_file):
-    '''Apply post-processing to API docs file'''
-    # Format the generated docs with sed commands
-    # macOS sed requires an extension argument, use '' for in-place editing
-    # Use an empty string (not '') to avoid creating backup files
-    if platform.system() == 'Darwin':
-        subprocess.run(['sed', '-i', '', 's/Required: {}/Required/g', api_file], check=True)
-        subprocess.run(['sed', '-i', '', 's/Optional: {}/Optional/g', api_file], check=True)
-        subprocess.run(['sed', '-i', '', '/^# API Reference$/,/^$/d', api_file], check=True)
+        ticks = start
+        while ticks < len(line) and line[ticks] == '`':
+            ticks += 1
+        delim = line[start:ticks]
+        fixed = re.sub(r'\s*<br\s*/?>\s*', ' ', body)
+        fixed = re.sub(r'^\s*(?:yaml|json|sh|bash|yml)\s+', '', fixed)
+        fixed = fixed.replace('\\{', '{').replace('\\}', '}')
+        fixed = re.sub(r'\s+', ' ', fixed).strip()
+        rebuilt.append(line[cursor:start])
+        rebuilt.append(f'{delim}{fixed}{delim}')
+        cursor = end + len(delim)
+    rebuilt.append(line[cursor:])
+    return ''.join(rebuilt)
+
+
+# ── API doc post-processing pipeline ─────────────────────────────────────
+# _post_process_api_docs streams the document through a chain of generator
+# stages, one line at a time. Every stage keeps a constant amount of state (at
+# most one line of lookahead), so the document is never split and re-joined
+# between stages. API_DOC_STAGES lists the stages in the order they run; the
+# order matters. The link fix-ups are not a stage: _render_api_doc applies
+# them once to the finished page.
+#
+# The individual rewrites and checks the stages apply are named rules in
+# API_DOC_RULES, compiled once at import. With --rule-stats, every rule
+# counts its hits and the time spent in it, so dead rules can be deleted and
+# expensive ones targeted.
+
+# Set by --rule-stats (via the environment, so parallel workers inherit it)
+_RULE_STATS_ENABLED = bool(os.environ.get('REF_DOCS_RULE_STATS'))
+
+
+class ApiDocRule:
+    '''A named rewrite or check in the API doc pipeline.
+
+    A 'rewrite' rule maps text to text and hits when it changes the text. A
+    'match' rule returns a bool and hits when it returns True (for example, a
+    line the stage then drops). Counters only run while rule stats are
+    enabled.
+    '''
+
+    __slots__ = ('name', 'kind', 'fn', 'hits', 'seconds', '_lock')
+
+    def __init__(self, name, kind, fn):
+        self.name = name
+        self.kind = kind
+        self.fn = fn
+        self.hits = 0
+        self.seconds = 0.0
+        # Concurrent stages of one version can apply the same rule
+        self._lock = threading.Lock()
+
+    def __call__(self, text):
+        if not _RULE_STATS_ENABLED:
+            return self.fn(text)
+        start = time.perf_counter()
+        result = self.fn(text)
+        elapsed = time.perf_counter() - start
+        hit = (result != text) if self.kind == 'rewrite' else bool(result)
+        with self._lock:
+            self.seconds += elapsed
+            self.hits += hit
+        return result
+
+    def reset(self):
+        with self._lock:
+            self.hits, self.seconds = 0, 0.0
+
+
+API_DOC_RULES = {}
+
+
+def _rule(name, kind='rewrite'):
+    '''Decorator: register fn as a named API doc rule'''
+    def register(fn):
+        assert name not in API_DOC_RULES, f'duplicate rule {name}'
+        API_DOC_RULES[name] = ApiDocRule(name, kind, fn)
+        return API_DOC_RULES[name]
+    return register
+
+
+def _sub_rule(name, pattern, repl, trigger):
+    '''Register a regex substitution that only runs on text containing trigger'''
+    regex = re.compile(pattern)
+    return _rule(name)(lambda text: regex.sub(repl, text) if trigger in text else text)
+
+
+def enable_rule_stats():
+    '''Reset every rule's counters and start counting'''
+    global _RULE_STATS_ENABLED
+    _RULE_STATS_ENABLED = True
+    for rule in API_DOC_RULES.values():
+        rule.reset()
+
+
+def _report_rule_stats():
+    '''Print and reset the rule stats for the document just processed'''
+    if _RULE_STATS_ENABLED:
+        print('    Rule stats:')
+        print(format_rule_stats())
+        enable_rule_stats()
+
+
+def format_rule_stats():
+    '''Per-rule hits and cumulative time, slowest rule first'''
+    rows = [f'    {"rule":<32} {"hits":>7} {"time":>10}']
+    for rule in sorted(API_DOC_RULES.values(), key=lambda r: r.seconds, reverse=True):
+        note = '  (never fired)' if not rule.hits else ''
+        rows.append(f'    {rule.name:<32} {rule.hits:>7} {rule.seconds * 1000:>7.2f} ms{note}')
+    return '\n'.join(rows)
+
+
+# Former `sed` edits
+_REQUIRED_EMPTY_BRACES = _rule('required-empty-braces')(lambda text: text.replace('Required: {}', 'Required'))
+_OPTIONAL_EMPTY_BRACES = _rule('optional-empty-braces')(lambda text: text.replace('Optional: {}', 'Optional'))
+_API_REFERENCE_HEADING = _rule('api-reference-heading', 'match')(lambda line: line == '# API Reference')
+
+# Replace complex struct type definitions with simple "struct"
+# Pattern matches: _Underlying type:_ _[struct{...}](#struct{...})_
+# Note: the struct body contains slice notation like `[]GrpcStatus`, so we cannot
+# use `[^\]]+` to consume it — that stops at the first `]` of the slice. Use a
+# non-greedy match anchored by `}](` to consume the whole struct body.
+_STRUCT_UNDERLYING_LINK = _sub_rule(
+    'struct-underlying-link', r'_Underlying type:_ _\[struct\{.+?\}\]\([^\)]+\)_',
+    '_Underlying type:_ _struct_', trigger='struct')
+# Handle empty struct{} patterns
+_EMPTY_STRUCT_UNDERLYING_LINK = _sub_rule(
+    'empty-struct-underlying-link', r'_Underlying type:_ _\[struct\{\}\]\(#struct\{\}\)_',
+    '_Underlying type:_ _struct_', trigger='struct')
+# crd-ref-docs renders signed integer fields as plain `_integer_`, but leaves
+# unsigned Go builtins (uint, uint8, uint16, uint32, uint64) as self-links to a
+# `#uintNN` anchor that is never emitted, so the link checker flags a broken
+# anchor. Render them as plain `_integer_` to match the signed-int convention.
+_UINT_SELF_LINK = _sub_rule(
+    'uint-self-link', r'_\[uint(?:8|16|32|64)?\]\(#uint(?:8|16|32|64)?\)_',
+    '_integer_', trigger='uint')
+# Also handle cases without the link wrapper
+_STRUCT_UNDERLYING_PLAIN = _sub_rule(
+    'struct-underlying-plain', r'_Underlying type:_ _struct\{[^\}]+\}_',
+    '_Underlying type:_ _struct_', trigger='struct')
+
+# A Go comment leaking into the validation column: // followed by +optional,
+# +required, +kubebuilder, etc. Plain // (URLs like https://, regex patterns)
+# is NOT a Go comment.
+_GO_COMMENT_RE = re.compile(r'//\s*(?:\+|kubebuilder|optional|required)')
+_JSON_TAG_RE = re.compile(r'`json:')
+_STRUCT_FIELD_TYPE_RE = re.compile(r'[*][A-Z][a-zA-Z0-9_]*\s+`')
+_TRAILING_XVALIDATION_RE = re.compile(r' <br />XValidation.*$')
+_ENUM_OPEN_RE = re.compile(r'Enum:\s*\[([^\]]*)')
+_TRAILING_BR_ENUM_RE = re.compile(r' <br />Enum:\s*\[[^\]]*$')
+_TRAILING_ENUM_RE = re.compile(r'Enum:\s*\[[^\]]*$')
+
+# Cutting Go code out of a validation cell: remove everything after the first
+# Go code pattern, keeping only the valid rules before it.
+_VALIDATION_GO_COMMENT = _rule('validation-go-comment')(
+    lambda col: _GO_COMMENT_RE.split(col)[0].strip())
+# Split on struct field definitions
+_VALIDATION_JSON_TAG = _rule('validation-json-tag')(
+    lambda col: _JSON_TAG_RE.split(col)[0].strip())
+# Split on struct field type definitions (e.g. `Version *HTTPVersion`)
+_VALIDATION_HTTP_VERSION_FIELD = _rule('validation-httpversion-field')(
+    lambda col: _STRUCT_FIELD_TYPE_RE.split(col)[0].strip())
+# Split on incomplete validation rules
+_VALIDATION_XVALIDATION = _rule('validation-xvalidation')(
+    lambda col: col.split(' <br />XValidation')[0].strip())
+# Remove trailing incomplete validation rules
+_VALIDATION_TRAILING_XVALIDATION = _sub_rule(
+    'validation-trailing-xvalidation', r' <br />XValidation.*$', '', trigger='XValidation')
+
+
+@_rule('validation-incomplete-enum')
+def _VALIDATION_INCOMPLETE_ENUM(col):
+    '''Remove Enum values that got cut off (e.g. "Enum: [HTTP1;HTTP2" without closing bracket).
+
+    Checks for an incomplete enum anywhere in the validation, not just at the start.
+    '''
+    if 'Enum:' in col and '[' in col:
+        enum_match = _ENUM_OPEN_RE.search(col)
+        # Incomplete if there's no closing bracket after the enum content
+        if enum_match and ']' not in col[enum_match.end():]:
+            # Remove it entirely to avoid broken syntax, with or without a leading <br />
+            col = _TRAILING_BR_ENUM_RE.sub('', col).strip()
+            col = _TRAILING_ENUM_RE.sub('', col).strip()
+    return col
+
+
+@_rule('go-continuation-line', 'match')
+def _GO_CONTINUATION_LINE(line):
+    '''An indented line that continues a table cell with leaked Go code (or closes it).'''
+    stripped = line.strip()
+    if not stripped or stripped.startswith('|') or not line.startswith(('\t', ' ')):
+        return False
+    return bool(_GO_COMMENT_RE.search(line) or '`json:' in line or '*HTTPVersion' in line or
+                'XValidation' in line or stripped.startswith(']') or
+                'kubebuilder' in line.lower())
+
+
+_XVALIDATION_CELL = _sub_rule('xvalidation-cell', r' <br />XValidation \|', '', trigger='XValidation')
+_INCOMPLETE_HTTP_ENUM = _sub_rule('incomplete-http-enum', r'Enum: \[HTTP1;HTTP2$', '', trigger='HTTP2')
+
+_REQUIRED_DEDUPE_RES = [re.compile(p) for p in (
+    r'Required\s*<br\s*/>\s*', r'Required\s+', r'<br\s*/>\s*Required', r'\s+Required',
+)]
+_OPTIONAL_DEDUPE_RES = [re.compile(p) for p in (
+    r'Optional\s*<br\s*/>\s*', r'Optional\s+', r'<br\s*/>\s*Optional', r'\s+Optional',
+)]
+
+
+@_rule('required-optional-dedupe')
+def _REQUIRED_OPTIONAL_DEDUPE(line):
+    '''Keep only one of "Required" / "Optional" in a validation cell.
+
+    A field should be either Required OR Optional, not both. If both are
+    present: with a default value it's Optional, otherwise prefer Required
+    (since +required is explicit).
+    '''
+    if 'Required' not in line or 'Optional' not in line or not _is_table_row(line):
+        return line
+    parts = line.split('|')
+    if len(parts) < 5:  # At least: empty | Field | Description | Default | Validation |
+        return line
+    validation_col = parts[-2].strip()
+    default_col = parts[-3].strip()
+    if 'Required' not in validation_col or 'Optional' not in validation_col:
+        return line
+    for pattern in _REQUIRED_DEDUPE_RES if default_col else _OPTIONAL_DEDUPE_RES:
+        validation_col = pattern.sub('', validation_col)
+    # Reconstruct the line with cleaned validation column
+    parts[-2] = ' ' + validation_col + ' '
+    return '|'.join(parts)
+
+
+@_rule('final-continuation-line', 'match')
+def _FINAL_CONTINUATION_LINE(line):
+    '''A non-row line holding Go code or closing a cell, checked after a table row.'''
+    stripped = line.strip()
+    return bool(not stripped.startswith('|') and (
+        _GO_COMMENT_RE.search(line) or '`json:' in line or
+        '*HTTPVersion' in line or 'XValidation' in line or
+        stripped == ']' or stripped == '] |' or
+        'kubebuilder' in line.lower()
+    ))
+
+
+_FENCE_RE = re.compile(r'```[a-zA-Z0-9]*')
+_TABLE_CODE_FENCE = _rule('table-code-fence')(
+    lambda line: _FENCE_RE.sub('', line) if line.startswith('|') and '```' in line else line)
+_ESCAPED_BR = _sub_rule('escaped-br', r'\\(<br\s*/?>)', r'\1', trigger='\\<br')
+_BR_IN_CODE_SPAN = _rule('br-in-code-span')(lambda line: _flatten_br_in_line(line))
+
+
+def _iter_lines(content):
+    '''Lazily yield the same items as content.split('\n').'''
+    start = 0
+    while True:
+        end = content.find('\n', start)
+        if end == -1:
+            yield content[start:]
+            return
+        yield content[start:end]
+        start = end + 1
+
+
+def _is_table_row(line):
+    return '|' in line and line.strip().startswith('|')
+
+
+def _stage_header_cleanup(lines):
+    '''Former `sed` edits: `Required: {}` / `Optional: {}` and the `# API Reference` block.
+
+    Deletes from the `# API Reference` line through the next empty line, like
+    `sed '/^# API Reference$/,/^$/d'`. When the text ends with a newline, the
+    last item of split('\n') is not a real line, so it is never dropped; when
+    the real last line is dropped, an empty item stands in for it so the
+    output keeps the trailing newline sed would have kept.
+    '''
+    in_range = False
+    lines = iter(lines)
+    line = next(lines, None)
+    while line is not None:
+        following = next(lines, None)
+        line = _OPTIONAL_EMPTY_BRACES(_REQUIRED_EMPTY_BRACES(line))
+        if in_range:
+            in_range = line != ''
+            drop = True
+        else:
+            drop = in_range = _API_REFERENCE_HEADING(line)
+        if not drop:
+            yield line
+        elif following is None:
+            yield ''
+        line = following
+
+
+def _stage_underlying_types(lines):
+    '''Simplify struct underlying types and unsigned integer self-links.'''
+    for line in lines:
+        line = _STRUCT_UNDERLYING_LINK(line)
+        line = _EMPTY_STRUCT_UNDERLYING_LINK(line)
+        line = _UINT_SELF_LINK(line)
+        line = _STRUCT_UNDERLYING_PLAIN(line)
+        yield line
+
+
+def _clean_validation_column(validation_col):
+    '''Cut Go code that leaked into a validation cell back to the valid rules.
+
+    Returns None if the cell has no Go code artifacts.
+    '''
+    has_go_comment = bool(_GO_COMMENT_RE.search(validation_col))
+    if has_go_comment:
+        clean_validation = _VALIDATION_GO_COMMENT(validation_col)
+    elif '`json:' in validation_col:
+        clean_validation = _VALIDATION_JSON_TAG(validation_col)
+    elif '*HTTPVersion' in validation_col:
+        clean_validation = _VALIDATION_HTTP_VERSION_FIELD(validation_col)
+    elif '<br />XValidation' in validation_col:
+        clean_validation = _VALIDATION_XVALIDATION(validation_col)
+    elif validation_col.endswith('HTTP2'):
+        # Ends with HTTP2: likely an incomplete enum, cleaned up below
+        clean_validation = validation_col.strip()
     else:
-        subprocess.run(['sed', '-i', 's/Required: {}/Required/g', api_file], check=True)
-        subprocess.run(['sed', '-i', 's/Optional: {}/Optional/g', api_file], check=True)
-        subprocess.run(['sed', '-i', '/^# API Reference$/,/^$/d', api_file], check=True)
-    
-    # Additional post-processing to clean up complex struct types and Go code artifacts
-    with open(api_file, 'r') as f:
-        content = f.read()
-    
-    # Replace complex struct type definitions with simple "struct"
-    # Pattern matches: _Underlying type:_ _[struct{...}](#struct{...})_
-    # Note: the struct body contains slice notation like `[]GrpcStatus`, so we cannot
-    # use `[^\]]+` to consume it — that stops at the first `]` of the slice. Use a
-    # non-greedy match anchored by `}](` to consume the whole struct body.
-    content = re.sub(
-        r'_Underlying type:_ _\[struct\{.+?\}\]\([^\)]+\)_',
-        '_Underlying type:_ _struct_',
-        content
-    )
-    
-    # Handle empty struct{} patterns
-    content = re.sub(
-        r'_Underlying type:_ _\[struct\{\}\]\(#struct\{\}\)_',
-        '_Underlying type:_ _struct_',
-        content
-    )
+        return None
 
-    # crd-ref-docs renders signed integer fields as plain `_integer_`, but leaves
-    # unsigned Go builtins (uint, uint8, uint16, uint32, uint64) as self-links to a
-    # `#uintNN` anchor that is never emitted, so the link checker flags a broken
-    # anchor. Render them as plain `_integer_` to match the signed-int convention.
-    content = re.sub(
-        r'_\[uint(?:8|16|32|64)?\]\(#uint(?:8|16|32|64)?\)_',
-        '_integer_',
-        content
-    )
-    
-    # Also handle cases without the link wrapper
-    content = re.sub(
-        r'_Underlying type:_ _struct\{[^\}]+\}_',
-        '_Underlying type:_ _struct_',
-        content
-    )
-    
-    # Clean up Go code comments and struct definitions that leak into validation column
-    # The issue is that table cells can span multiple lines, and Go code is being appended
-    # We need to process line by line and remove continuation lines that contain Go code
-    
-    lines = content.split('\n')
-    cleaned_lines = []
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i]
-        
-        # Check if this is a table row (contains |)
-        if '|' in line and line.strip().startswith('|'):
-            # Check if the validation column (last column before final |) contains Go code artifacts
+    clean_validation = _VALIDATION_TRAILING_XVALIDATION(clean_validation)
+    clean_validation = _VALIDATION_INCOMPLETE_ENUM(clean_validation)
+    # Ensure no line breaks are embedded in the validation column
+    return clean_validation.replace('\n', ' ').replace('\r', ' ').strip()
+
+
+def _stage_validation_column(lines):
+    '''Clean Go code out of validation cells and drop the lines it spills onto.
+
+    Table cells can span multiple lines when Go code is appended to them, but
+    markdown tables require single-line rows. After every table row, indented
+    continuation lines holding Go code are dropped, together with any empty
+    lines between or after them.
+    '''
+    skipping, skipped = False, 0
+    for line in lines:
+        if skipping:
+            if (line.strip() == '' and skipped) or _GO_CONTINUATION_LINE(line):
+                skipped += 1
+                continue
+            skipping = False
+
+        if _is_table_row(line):
             parts = line.split('|')
             if len(parts) >= 5:  # At least: empty | Field | Description | Default | Validation |
-                validation_col = parts[-2].strip() if len(parts) > 1 else ''
-                
-                # Check if validation column has Go code patterns or if there are continuation lines
-                # Be careful: // in URLs (https://) or regex patterns is NOT a Go comment
-                # Go comments typically have // followed by +optional, +required, +kubebuilder, or whitespace
-                has_go_comment = bool(re.search(r'//\s*(?:\+|kubebuilder|optional|required)', validation_col))
-                has_go_code = (has_go_comment or '`json:' in validation_col or 
-                              '*HTTPVersion' in validation_col or 
-                              validation_col.endswith('HTTP2') or
-                              '<br />XValidation' in validation_col)
-                
-                if has_go_code:
-                    # Clean up the validation column - keep only valid parts on a single line
-                    # Remove everything after the first Go code pattern
-                    # Be careful: only split on // when it's clearly a Go comment (followed by +optional, +required, etc.)
-                    # Don't split on // that's part of URLs (https://) or regex patterns
-                    # Pattern matches: // followed by +optional, +required, +kubebuilder, or whitespace+text (Go comment)
-                    # But NOT // that's part of a URL pattern like https://
-                    go_comment_pattern = r'//\s*(?:\+|kubebuilder|optional|required)'
-                    # Also match // at the end of validation (incomplete, likely a comment)
-                    # But preserve // in URLs and regex patterns
-                    if re.search(go_comment_pattern, validation_col):
-                        # Split on Go comment pattern
-                        clean_validation = re.split(go_comment_pattern, validation_col)[0].strip()
-                    elif '`json:' in validation_col:
-                        # Split on struct field definitions
-                        clean_validation = re.split(r'`json:', validation_col)[0].strip()
-                    elif '*HTTPVersion' in validation_col or 'Version *HTTPVersion' in validation_col:
-                        # Split on struct field type definitions
-                        clean_validation = re.split(r'[*][A-Z][a-zA-Z0-9_]*\s+`', validation_col)[0].strip()
-                    elif '<br />XValidation' in validation_col:
-                        # Split on incomplete validation rules
-                        clean_validation = re.split(r' <br />XValidation', validation_col)[0].strip()
-                    else:
-                        # If validation ends with HTTP2 or incomplete enum, clean it up
-                        clean_validation = validation_col.strip()
-                    
-                    # Remove trailing incomplete validation rules
-                    clean_validation = re.sub(r' <br />XValidation.*$', '', clean_validation)
-                    # Remove trailing Enum values that got cut off (e.g., "Enum: [HTTP1;HTTP2" without closing bracket)
-                    # Check if there's an incomplete enum anywhere in the validation (not just at the start)
-                    if 'Enum:' in clean_validation and '[' in clean_validation:
-                        # Find the enum pattern and check if it's incomplete (no closing bracket)
-                        enum_match = re.search(r'Enum:\s*\[([^\]]*)', clean_validation)
-                        if enum_match:
-                            # Check if the enum is incomplete (doesn't have a closing bracket after the content)
-                            enum_end_pos = enum_match.end()
-                            # Check if there's a closing bracket after this position
-                            remaining = clean_validation[enum_end_pos:]
-                            if ']' not in remaining:
-                                # Incomplete enum - remove it entirely to avoid broken syntax
-                                clean_validation = re.sub(r' <br />Enum:\s*\[[^\]]*$', '', clean_validation).strip()
-                                # Also handle case where Enum is at the end without <br />
-                                clean_validation = re.sub(r'Enum:\s*\[[^\]]*$', '', clean_validation).strip()
-                    # Ensure no line breaks are embedded in the validation column
-                    clean_validation = clean_validation.replace('\n', ' ').replace('\r', ' ').strip()
+                clean_validation = _clean_validation_column(parts[-2].strip())
+                if clean_validation is not None:
                     # Reconstruct the line with cleaned validation column
                     parts[-2] = ' ' + clean_validation + ' '
                     line = '|'.join(parts)
-                
-                # Check for continuation lines (lines that start with tab/space and contain Go code)
-                # These are part of the same table cell. Markdown tables require single-line rows,
-                # so we must remove all continuation lines.
-                j = i + 1
-                continuation_lines_to_skip = 0
-                while j < len(lines):
-                    next_line = lines[j]
-                    next_stripped = next_line.strip()
-                    
-                    # Stop if we hit a new table row (starts with |)
-                    if next_stripped.startswith('|'):
-                        break
-                    
-                    # Check if this is a continuation line (starts with tab/space) containing Go code
-                    # or closing a table cell (like "] |")
-                    # Also skip empty lines that appear between continuation lines
-                    if next_stripped == '':
-                        # Empty line - skip it if we're in the middle of continuation lines
-                        if continuation_lines_to_skip > 0:
-                            continuation_lines_to_skip += 1
-                            j += 1
-                            continue
-                        else:
-                            # Empty line but not part of continuation - stop
-                            break
-                    elif (next_line.startswith('\t') or (next_line.startswith(' ') and not next_stripped.startswith('|'))):
-                        # Check if it contains Go code patterns or is closing a table cell
-                        # Be careful: only match // when it's clearly a Go comment, not URLs
-                        has_go_comment_in_line = bool(re.search(r'//\s*(?:\+|kubebuilder|optional|required)', next_line))
-                        if (has_go_comment_in_line or '`json:' in next_line or '*HTTPVersion' in next_line or 
-                            'XValidation' in next_line or 'Version *HTTPVersion' in next_line or
-                            next_stripped == ']' or next_stripped == '] |' or
-                            next_stripped.startswith(']') or 'kubebuilder' in next_line.lower()):
-                            continuation_lines_to_skip += 1
-                            j += 1
-                            continue
-                    
-                    # If we get here, it's not a continuation line
-                    break
-                
-                # Skip all the continuation lines we found
-                if continuation_lines_to_skip > 0:
-                    i += continuation_lines_to_skip
-        
-        cleaned_lines.append(line)
-        i += 1
-    
-    content = '\n'.join(cleaned_lines)
-    
-    # Final cleanup: remove any remaining incomplete validation rules
-    content = re.sub(r' <br />XValidation \|', '', content)
-    content = re.sub(r'Enum: \[HTTP1;HTTP2$', '', content, flags=re.MULTILINE)
-    
-    # Clean up duplicate "Required <br />Optional" patterns
-    # A field should be either Required OR Optional, not both
-    # If both are present, use heuristics to determine which is correct:
-    # - If there's a default value, it's Optional
-    # - Otherwise, prefer Required (since +required is explicit)
-    lines = content.split('\n')
-    cleaned_validation_lines = []
+                skipping, skipped = True, 0
+        yield line
+
+
+def _stage_incomplete_rules(lines):
+    '''Remove any remaining incomplete validation rules.'''
     for line in lines:
-        if '|' in line and line.strip().startswith('|'):
-            # Check if this is a table row with validation column
-            parts = line.split('|')
-            if len(parts) >= 5:  # At least: empty | Field | Description | Default | Validation |
-                validation_col = parts[-2].strip() if len(parts) > 1 else ''
-                default_col = parts[-3].strip() if len(parts) > 2 else ''
-                
-                # Check if validation column has both Required and Optional
-                if 'Required' in validation_col and 'Optional' in validation_col:
-                    # Determine which one to keep
-                    # If there's a default value, it's Optional; otherwise, it's Required
-                    if default_col and default_col.strip():
-                        # Has a default value, so it should be Optional
-                        # Remove "Required <br />" or "Required" from the validation column
-                        validation_col = re.sub(r'Required\s*<br\s*/>\s*', '', validation_col)
-                        validation_col = re.sub(r'Required\s+', '', validation_col)
-                        validation_col = re.sub(r'<br\s*/>\s*Required', '', validation_col)
-                        validation_col = re.sub(r'\s+Required', '', validation_col)
-                    else:
-                        # No default value, so it should be Required
-                        # Remove "Optional <br />" or "Optional" from the validation column
-                        validation_col = re.sub(r'Optional\s*<br\s*/>\s*', '', validation_col)
-                        validation_col = re.sub(r'Optional\s+', '', validation_col)
-                        validation_col = re.sub(r'<br\s*/>\s*Optional', '', validation_col)
-                        validation_col = re.sub(r'\s+Optional', '', validation_col)
-                    
-                    # Reconstruct the line with cleaned validation column
-                    parts[-2] = ' ' + validation_col + ' '
-                    line = '|'.join(parts)
-        
-        cleaned_validation_lines.append(line)
-    
-    content = '\n'.join(cleaned_validation_lines)
-    
-    # Final pass: ensure all table rows are on a single line
-    # Remove any remaining continuation lines that might have been missed
-    lines = content.split('\n')
-    final_lines = []
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        # If this is a table row and the next line is a continuation (not starting with |),
-        # we need to skip it to maintain single-line table rows
-        if '|' in line and line.strip().startswith('|') and i + 1 < len(lines):
-            next_line = lines[i + 1]
-            next_stripped = next_line.strip()
-            # If next line doesn't start a new table row and contains Go code or closes a cell, skip it
-            # Be careful: only match // when it's clearly a Go comment, not URLs
-            has_go_comment_in_line = bool(re.search(r'//\s*(?:\+|kubebuilder|optional|required)', next_line))
-            if not next_stripped.startswith('|') and (
-                has_go_comment_in_line or '`json:' in next_line or 
-                '*HTTPVersion' in next_line or 'XValidation' in next_line or
-                next_stripped == ']' or next_stripped == '] |' or
-                'kubebuilder' in next_line.lower()
-            ):
-                i += 1
-                continue
-        final_lines.append(line)
-        i += 1
-    
-    content = '\n'.join(final_lines)
-
-    # ── Markdown-leak fixes ──────────────────────────────────────────────
-    # crd-ref-docs renders multi-line field comments into single table cells
-    # by replacing newlines with "<br />". Two patterns from that leak into
-    # the rendered HTML as literal text:
-    #
-    # 1. A fenced code block (```...```) inside a comment ends up inside a
-    #    table cell. Markdown can't put a code block in a cell, so it escapes
-    #    the cell contents and the surrounding "<br />" surface as literal
-    #    "&lt;br /&gt;" text. Strip the fence tokens on table-row lines (those
-    #    starting with "|") so the example renders as <br />-separated text.
-    #    Real, standalone fenced blocks have ``` on their own line (never
-    #    starting with "|") and are left untouched.
-    fixed_lines = []
-    for line in content.split('\n'):
-        if line.startswith('|') and '```' in line:
-            line = re.sub(r'```[a-zA-Z0-9]*', '', line)
-        fixed_lines.append(line)
-    content = '\n'.join(fixed_lines)
-
-    # 2. A backslash-escaped "\<br />" renders as the literal text "<br />"
-    #    (Goldmark turns "\<" into a literal "<"). Unescape it to a real break.
-    content = re.sub(r'\\(<br\s*/?>)', r'\1', content)
-
-    # 3. A "<br />" left INSIDE an inline code span is shown to the reader as the
-    #    characters "<br />", because markdown does not interpret HTML in a code
-    #    span. Must run AFTER step 2, so that an escaped break is normalized to a
-    #    real one first and this pass sees a single shape.
-    content = _flatten_br_inside_code_spans(content)
-
-    # Rewrite any known-broken links restored from upstream source comments.
-    content = _apply_link_fixups(content)
-
-    with open(api_file, 'w') as f:
-        f.write(content)
-
-
-def generate_api_docs(version, link_version, url_path, kgateway_dir='kgateway'):
-    '''Generate API reference documentation'''
+        yield _INCOMPLETE_HTTP_ENUM(_XVALIDATION_CELL(line))
+
+
+def _stage_required_optional(lines):
+    '''Keep only one of "Required" / "Optional" in each validation cell.'''
+    for line in lines:
+        yield _REQUIRED_OPTIONAL_DEDUPE(line)
+
+
+def _stage_final_continuations(lines):
+    '''Final pass: ensure all table rows are on a single line.
+
+    Catches continuations the validation stage missed (rows with fewer than
+    five cells). Holds one line of lookahead: a table row is dropped when the
+    line after it does not start a new row and contains Go code or closes a
+    cell.
+    '''
+    previous = None
+    for line in lines:
+        if previous is not None:
+            if not (_is_table_row(previous) and _FINAL_CONTINUATION_LINE(line)):
+                yield previous
+        previous = line
+    if previous is not None:
+        yield previous
+
+
+def _stage_markdown_leaks(lines):
+    '''Fix crd-ref-docs markup that leaks into the rendered HTML as literal text.
+
+    crd-ref-docs renders multi-line field comments into single table cells by
+    replacing newlines with "<br />". Three patterns from that leak through:
+
+    1. A fenced code block (```...```) inside a comment ends up inside a table
+       cell. Markdown can't put a code block in a cell, so it escapes the cell
+       contents and the surrounding "<br />" surface as literal "&lt;br /&gt;"
+       text. Strip the fence tokens on table-row lines (those starting with
+       "|") so the example renders as <br />-separated text. Real, standalone
+       fenced blocks have ``` on their own line and are left untouched.
+    2. A backslash-escaped "\\<br />" renders as the literal text "<br />"
+       (Goldmark turns "\\<" into a literal "<"). Unescape it to a real break.
+    3. A "<br />" left INSIDE an inline code span is shown to the reader as the
+       characters "<br />", because markdown does not interpret HTML in a code
+       span. Must run AFTER step 2, so that an escaped break is normalized to
+       a real one first and this pass sees a single shape.
+    '''
+    for line in lines:
+        yield _BR_IN_CODE_SPAN(_ESCAPED_BR(_TABLE_CODE_FENCE(line)))
+
+
+API_DOC_STAGES = (
+    _stage_header_cleanup,
+    _stage_underlying_types,
+    _stage_validation_column,
+    _stage_incomplete_rules,
+    _stage_required_optional,
+    _stage_final_continuations,
+    _stage_markdown_leaks,
+)
+
+
+def _post_process_api_lines(lines):
+    '''Chain every API_DOC_STAGES stage over an iterator of lines'''
+    for stage in API_DOC_STAGES:
+        lines = stage(lines)
+    return lines
+
+
+def _post_process_api_docs(content):
+    '''Apply post-processing to API docs content and return the result'''
+    content = '\n'.join(_post_process_api_lines(_iter_lines(content)))
+    _report_rule_stats()
+    return content
+
+
+def generate_api_docs(version, link_version, url_path, kgateway_dir='kgateway', work_dir='.'):
+    '''Generate API reference documentation
+
+    work_dir holds the per-run crd-ref-docs config and its out.md, so parallel
+    versions never share (and clobber) the same temporary files.
+    '''
     print(f'  → Generating API docs for version {version}')
     
     # Check if the API directory exists
@@ -649,25 +1415,26 @@ def generate_api_docs(version, link_version, url_path, kgateway_dir='kgateway'):
     kube_version = os.environ.get('KUBE_VERSION') or '1.31'
     config_content = config_content.replace('${KUBE_VERSION}', kube_version)
     
-    with open(f'crd-ref-docs-config-{link_version}.yaml', 'w') as f:
+    config_file = os.path.join(work_dir, f'crd-ref-docs-config-{link_version}.yaml')
+    out_file = os.path.join(work_dir, 'out.md')
+    with open(config_file, 'w') as f:
         f.write(config_content)
     
-    subprocess.run([
-        'go', 'run', 'github.com/elastic/crd-ref-docs@v0.1.0',
+    run_go_tool('crd-ref-docs', [
         f'--source-path={api_path}',
         '--renderer=markdown',
-        '--output-path=./',
-        f'--config=crd-ref-docs-config-{link_version}.yaml'
+        f'--output-path={os.path.join(work_dir, "")}',
+        f'--config={config_file}'
     ], check=True)
     
-    os.remove(f'crd-ref-docs-config-{link_version}.yaml')
+    os.remove(config_file)
     
     # Read the generated content once
-    with open('./out.md') as f:
+    with open(out_file) as f:
         generated_content = f.read()
     
     # Clean up temporary file
-    os.remove('./out.md')
+    os.remove(out_file)
     
     # Check if version is 2.2.x or later
     split_api = is_version_2_2_or_later(version)
@@ -676,35 +1443,22 @@ def generate_api_docs(version, link_version, url_path, kgateway_dir='kgateway'):
         # For 2.2.x+, split by package
         print(f'    Version {version} uses split API - generating separate docs per package')
         
-        # Extract gateway.kgateway.dev/v1alpha1 package
-        envoy_content = extract_package_section(generated_content, 'gateway.kgateway.dev/v1alpha1')
-        if envoy_content:
-            target_path = f'content/docs/envoy/{url_path}/reference/'
+        package_sections = split_package_sections(generated_content)
+        for package, doc_dir in API_PACKAGE_DOC_DIRS.items():
+            package_content = package_sections.get(package)
+            if not package_content:
+                print(f'    ⚠ Warning: Could not extract {package} package')
+                continue
+            target_path = f'content/docs/{doc_dir}/{url_path}/reference/'
             os.makedirs(target_path, exist_ok=True)
             api_file = f'{target_path}api.md'
             
-            with open(api_file, 'w') as f:
-                f.write('---\n')
-                f.write('title: API reference\n')
-                f.write('weight: 10\n')
-                f.write('description: Reference documentation for the kgateway API custom resources.\n')
-                f.write('---\n\n')
-                f.write('{{< reuse "/kgw-docs/snippets/api-ref-docs-intro.md" >}}\n\n')
-                f.write(envoy_content)
+            changed = write_output(api_file, _render_api_doc(package_content, kgateway_dir))
             
-            # Apply post-processing
-            _post_process_api_docs(api_file)
-            
-            # Generate shared types documentation (e.g. CELExpression, PolicyStatus, HeaderModifiers)
-            _generate_shared_types(api_file, kgateway_dir)
-
-            # The appended shared types come straight from Go doc comments, so
-            # re-run the link fix-ups over the finished file.
-            _apply_link_fixups_to_file(api_file)
-
-            print(f'    ✓ Generated envoy API docs in {api_file}')
-        else:
-            print(f'    ⚠ Warning: Could not extract gateway.kgateway.dev/v1alpha1 package')
+            print(f'    ✓ Generated {doc_dir} API docs in {api_file}' + ('' if changed else ' (unchanged)'))
+        
+        for package in sorted(package_sections.keys() - API_PACKAGE_DOC_DIRS.keys()):
+            print(f'    Skipping package {package}: no docs directory in API_PACKAGE_DOC_DIRS')
         
         return True
     else:
@@ -717,69 +1471,129 @@ def generate_api_docs(version, link_version, url_path, kgateway_dir='kgateway'):
             
             api_file = f'{target_path}api.md'
             
-            # Create API reference file with frontmatter
-            with open(api_file, 'w') as f:
-                f.write('---\n')
-                f.write('title: API reference\n')
-                f.write('weight: 10\n')
-                f.write('description: Reference documentation for the kgateway API custom resources.\n')
-                f.write('---\n\n')
-                f.write('{{< reuse "/kgw-docs/snippets/api-ref-docs-intro.md" >}}\n\n')
-                f.write(generated_content)
-            
-            # Apply post-processing
-            _post_process_api_docs(api_file)
+            changed = write_output(api_file, _render_api_doc(generated_content, kgateway_dir))
             
-            # Generate shared types documentation (e.g. CELExpression, PolicyStatus, HeaderModifiers)
-            _generate_shared_types(api_file, kgateway_dir)
-
-            # The appended shared types come straight from Go doc comments, so
-            # re-run the link fix-ups over the finished file.
-            _apply_link_fixups_to_file(api_file)
-
-            print(f'    ✓ Generated API docs in {api_file}')
+            print(f'    ✓ Generated API docs in {api_file}' + ('' if changed else ' (unchanged)'))
         
         return True
 
 
-def _generate_shared_types(api_file, kgateway_dir='kgateway'):
-    '''Append shared types documentation to the API reference file.'''
+def _render_api_doc(section, kgateway_dir='kgateway'):
+    '''Build the finished API reference page in memory.
+
+    The page goes through front matter, post-processing, the appended shared
+    types and the link fix-ups without touching disk, so the caller writes
+    it exactly once.
+    '''
+    with trace_span('post-process'):
+        content = _post_process_api_docs(API_DOC_FRONT_MATTER + section)
+    
+    # Generate shared types documentation (e.g. CELExpression, PolicyStatus, HeaderModifiers)
+    with trace_span('shared types'):
+        content = _generate_shared_types(content, kgateway_dir)
+
+    # Once, over the finished page: the appended shared types come straight
+    # from Go doc comments and need the fix-ups as much as the section does.
+    with trace_span('link fix-ups'):
+        return _apply_link_fixups(content)
+
+
+def _shared_types_module():
+    return import_script('generate-shared-types.py')
+
+
+def _shared_type_dirs(kgateway_dir):
+    '''Return (source_dir, extra_dirs) holding a version's Go API types, or None'''
     shared_dir = f'{kgateway_dir}/api/v1alpha1/shared'
     kgateway_source_dir = f'{kgateway_dir}/api/v1alpha1/kgateway'
     flat_dir = f'{kgateway_dir}/api/v1alpha1'
     if os.path.exists(shared_dir):
         # 2.2.x+ split layout: shared/ and kgateway/ subpackages.
-        args = [shared_dir, api_file, kgateway_source_dir]
-    elif os.path.exists(flat_dir):
+        return shared_dir, [kgateway_source_dir]
+    if os.path.exists(flat_dir):
         # Older versions (e.g. 2.0.x, 2.1.x) use a flat api/v1alpha1 layout with no
         # shared/ subpackage. Parse the flat directory so the appender can still
         # document types that crd-ref-docs referenced but did not render; otherwise
         # their intra-page anchors (e.g. #grpcstatus, #policystatus) stay dead.
-        args = [flat_dir, api_file]
-    else:
-        return
+        return flat_dir, []
+    return None
+
+
+def _generate_shared_types(content, kgateway_dir='kgateway'):
+    '''Return the API reference content with shared types documentation appended.'''
+    dirs = _shared_type_dirs(kgateway_dir)
+    if not dirs:
+        return content
+    source_dir, extra_dirs = dirs
+    shared_types = _shared_types_module()
     try:
-        subprocess.run([
-            'python3', 'scripts/generate-shared-types.py',
-            *args,
-        ], check=True)
-    except subprocess.CalledProcessError as e:
+        return shared_types.append_shared_types(content, Path(source_dir), [Path(d) for d in extra_dirs],
+                                                cache_dir=Path(default_cache_dir()) / 'go-parse')
+    except Exception as e:
         print(f'    Warning: generate-shared-types failed: {e}')
+        return content
+
+
+def fill_parse_cache(kgateway_dir='kgateway'):
+    '''Parse a version's Go API types into the shared types parse cache.
+
+    Called on the main thread before the stages start. The API stage and the
+    type database parse the same files on a stage thread, where
+    parse_go_files does not start its process pool, so the files are parsed
+    here, in the pool, and the stages read the results from the cache.
+    '''
+    dirs = _shared_type_dirs(kgateway_dir)
+    if not dirs:
+        return
+    source_dir, extra_dirs = dirs
+    files = [go_file for directory in (source_dir, *extra_dirs) for go_file in sorted(Path(directory).glob('*.go'))
+             if not go_file.name.startswith('zz_generated')]
+    try:
+        _shared_types_module().parse_go_files(files, cache_dir=Path(default_cache_dir()) / 'go-parse')
+    except Exception as e:
+        print(f'    Warning: could not fill the parse cache: {e}')
+
+
+def record_version_types(version, commit, kgateway_dir='kgateway'):
+    '''Add a version's Go API types to the cross-version type database.
+
+    The database (see scripts/type-db.py) is filled one version at a time as
+    versions are generated; a version whose commit is already recorded is
+    skipped. Parsing reuses the shared types parse cache, so this rarely
+    parses anything.
+    '''
+    dirs = _shared_type_dirs(kgateway_dir)
+    if not dirs or not commit:
+        return
+    source_dir, extra_dirs = dirs
+    sources = [(Path(source_dir), 'shared')] + [(Path(d), os.path.basename(d)) for d in extra_dirs]
+    type_db = import_script('type-db.py')
+    try:
+        conn = type_db.connect(type_db.default_db_path())
+        try:
+            type_db.record_sources(conn, version, commit, sources,
+                                   cache_dir=Path(default_cache_dir()) / 'go-parse')
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f'    Warning: could not record types in the type database: {e}')
+
+
+def _helm_docs_module():
+    return import_script('generate-helm-docs.py')
 
 
 def generate_helm_docs(version, link_version, url_path, kgateway_dir='kgateway'):
-    '''Generate Helm chart reference documentation'''
+    '''Generate Helm chart reference documentation
+
+    Each chart's values page is rendered in-process from its values.yaml by
+    generate-helm-docs.py, already in the published layout.
+    '''
     print(f'  → Generating Helm docs for version {version}')
     
-    # Generate Helm docs for each chart
-    # Format: 'directory:filename' where directory is under install/helm/
-    charts = [
-        'kgateway:kgateway',
-        'kgateway-crds:kgateway-crds',
-    ]
     generated_any = False
     
-    for chart in charts:
+    for chart in HELM_CHARTS:
         dir_name, file_name = chart.split(':')
         helm_path = f'{kgateway_dir}/install/helm/{dir_name}'
         
@@ -788,83 +1602,16 @@ def generate_helm_docs(version, link_version, url_path, kgateway_dir='kgateway')
             print(f'    Warning: Helm directory {helm_path} does not exist, skipping {file_name}')
             continue
         
-        result = subprocess.run([
-            'go', 'run', 'github.com/norwoodj/helm-docs/cmd/helm-docs@v1.14.2',
-            f'--chart-search-root={helm_path}',
-            '--dry-run'
-        ], capture_output=True, text=True, check=True)
-        
-        # Write the raw helm-docs output to assets directory
         # Use actual version numbers (2.2.x, 2.1.x, etc.) not linkVersion (main, latest)
         # This prevents overwriting when promoting versions
-        assets_path = f'assets/kgw-docs/pages/reference/helm/{version}/'
-        os.makedirs(assets_path, exist_ok=True)
+        helm_file = f'assets/kgw-docs/pages/reference/helm/{version}/{file_name}.md'
         
-        helm_file = f'{assets_path}{file_name}.md'
-        
-        with open(helm_file, 'w') as f:
-            f.write(result.stdout)
-        
-        # Remove badge line and following empty line
-        # macOS sed requires an extension argument, use empty string for in-place editing
-        if platform.system() == 'Darwin':
-            subprocess.run(['sed', '-i', '', '/!\\[Version:/,/^$/d', helm_file], check=True)
-            # Remove the title (# heading) and description lines from the top
-            # These will be hardcoded in the content files instead
-            # Remove lines 1-3 which contain: title, blank line, description
-            subprocess.run(['sed', '-i', '', '1,3d', helm_file], check=True)
-        else:
-            subprocess.run(['sed', '-i', '/!\\[Version:/,/^$/d', helm_file], check=True)
-            subprocess.run(['sed', '-i', '1,3d', helm_file], check=True)
-        
-        # Add a note for charts with no configurable values (like kgateway-crds)
-        with open(helm_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Normalize any bare type=info callouts before further processing
-        content = content.replace('{{< callout type=info >}}', '{{< callout type="info" >}}')
-        
-        # If no values table, append callout (once). Otherwise normalize callout quotes.
-        if '## Values' not in content or ('## Values' in content and '|-----|' not in content):
-            note = '\n\n{{< callout type="info" >}}\nNo configurable values are currently available for this chart.\n{{< /callout >}}\n'
-            if '{{< callout' not in content:
-                content = content.rstrip() + note
-        
-        # Swap Default and Description columns in the values table
-        swapped_lines = []
-        in_table = False
-        for line in content.splitlines():
-            stripped = line.strip()
-            if stripped.startswith('| Key ') and 'Default' in line and 'Description' in line:
-                in_table = True
-                swapped_lines.append('| Key | Type | Description | Default |')
-                continue
-            if in_table and stripped.startswith('|-----'):
-                swapped_lines.append('|-----|------|-------------|---------|')
-                continue
-            if in_table:
-                if not stripped.startswith('|'):
-                    in_table = False
-                    swapped_lines.append(line)
-                    continue
-                parts = [p.strip() for p in line.split('|')]
-                # Expect 6 elements with leading/trailing blanks; ensure we have enough
-                if len(parts) >= 6:
-                    key, typ, default, desc = parts[1], parts[2], parts[3], parts[4]
-                    swapped_lines.append(f'| {key} | {typ} | {desc} | {default} |')
-                else:
-                    swapped_lines.append(line)
-            else:
-                swapped_lines.append(line)
-        content = '\n'.join(swapped_lines)
-
         # Rewrite any known-broken links restored from upstream values.yaml comments.
-        content = _apply_link_fixups(content)
+        content = _apply_link_fixups(_helm_docs_module().render_chart_page(helm_path))
 
-        with open(helm_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        changed = write_output(helm_file, content)
         
-        print(f'    ✓ Generated Helm docs in {helm_file}')
+        print(f'    ✓ Generated Helm docs in {helm_file}' + ('' if changed else ' (unchanged)'))
         
         generated_any = True
     
@@ -884,21 +1631,574 @@ def generate_metrics_docs(version, link_version, url_path, kgateway_dir='kgatewa
         return False
     
     # Run the metrics finder tool
-    result = subprocess.run([
-        'go', 'run', metrics_tool_path, 
-        '--markdown', f'./{kgateway_dir}'
+    command = tool_command('findmetrics') or ['go', 'run', metrics_tool_path]
+    result = traced_run([
+        *command,
+        '--markdown', os.path.join('.', kgateway_dir)
     ], capture_output=True, text=True, check=True)
     
     metrics_content = _apply_link_fixups(result.stdout)
 
-    with open(f'assets/kgw-docs/snippets/{link_version}/metrics-control-plane.md', 'w') as f:
-        f.write(metrics_content)
+    metrics_file = f'assets/kgw-docs/snippets/{link_version}/metrics-control-plane.md'
+    changed = write_output(metrics_file, metrics_content)
     
-    print(f'    ✓ Generated metrics docs in assets/kgw-docs/snippets/{link_version}/metrics-control-plane.md')
+    print(f'    ✓ Generated metrics docs in {metrics_file}' + ('' if changed else ' (unchanged)'))
     return True
 
 
-def main():
+# Output files produced in this process, for the run's output manifest:
+# {path: {'sha256': hex digest, 'changed': whether the file on disk changed}}
+_OUTPUTS = {}
+
+
+def write_output(path, content):
+    '''Write a generated doc file only if its content changed.
+
+    The content is compared by SHA-256 with the file already on disk. An
+    unchanged file is left alone, so its mtime stays put for Hugo and for
+    CI diffs. A changed file is written to a temporary file next to it and
+    renamed over it, so readers never see a half-written page. Either way
+    the file is recorded for the output manifest. Returns True if the file
+    changed.
+    '''
+    data = content.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+    try:
+        with open(path, 'rb') as f:
+            changed = hashlib.sha256(f.read()).hexdigest() != digest
+    except FileNotFoundError:
+        changed = True
+    if changed:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+    _OUTPUTS[path] = {'sha256': digest, 'changed': changed}
+    return changed
+
+
+def take_outputs():
+    '''Return the outputs recorded by write_output so far and start a new record'''
+    outputs = dict(_OUTPUTS)
+    _OUTPUTS.clear()
+    return outputs
+
+
+def write_output_manifest(path, outputs):
+    '''Write the run's output manifest: every produced file, its hash and
+    whether it changed, so later steps can rebuild or test only what changed'''
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'files': dict(sorted(outputs.items()))}, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def version_output_paths(version, link_version, url_path):
+    '''Every file that generating one version can write, relative to the docs root'''
+    paths = [f'content/docs/envoy/{url_path}/reference/api.md']
+    for chart in HELM_CHARTS:
+        _, file_name = chart.split(':')
+        paths.append(f'assets/kgw-docs/pages/reference/helm/{version}/{file_name}.md')
+    paths.append(f'assets/kgw-docs/snippets/{link_version}/metrics-control-plane.md')
+    return paths
+
+
+def generation_cache_key(version_info, commit):
+    '''Key identifying the generated output for one version.
+
+    Covers the resolved kgateway commit plus every local input that shapes the
+    output: the generator scripts, the crd-ref-docs config, the link fix-ups,
+    KUBE_VERSION and any replaced doc tools. Also covers where the output goes
+    (version, linkVersion, url), since the same commit is rendered under
+    different paths when a version is promoted.
+    '''
+    digest = hashlib.sha256()
+    inputs = sorted(glob.glob('scripts/*.py')) + ['scripts/crd-ref-docs-config.yaml', 'scripts/link-fixups.json']
+    for path in inputs:
+        digest.update(path.encode())
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    digest.update(json.dumps({
+        'commit': commit,
+        'kube_version': os.environ.get('KUBE_VERSION') or '1.31',
+        'tools': tool_overrides(),
+        'version': version_info['version'],
+        'linkVersion': version_info['linkVersion'],
+        'url': version_info['url'],
+    }, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _generation_cache_path(cache_dir, version):
+    return os.path.join(cache_dir, 'generated', version)
+
+
+def _generated_manifest(version_info, key, cache_dir):
+    '''The manifest of a version's cached docs if stored under key and complete, else None'''
+    entry_dir = _generation_cache_path(cache_dir, version_info['version'])
+    try:
+        with open(os.path.join(entry_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if manifest.get('key') != key:
+        return None
+    for rel_path in manifest['files']:
+        if not os.path.exists(os.path.join(entry_dir, 'files', rel_path)):
+            return None
+    return manifest
+
+
+def restore_generated(version_info, key, cache_dir):
+    '''Restore a version's previously generated docs if the cache key matches.
+
+    Returns the recorded success count, or None on a cache miss.
+    '''
+    manifest = _generated_manifest(version_info, key, cache_dir)
+    if manifest is None:
+        return None
+    entry_dir = _generation_cache_path(cache_dir, version_info['version'])
+    for rel_path in manifest['files']:
+        with open(os.path.join(entry_dir, 'files', rel_path), encoding='utf-8') as f:
+            changed = write_output(rel_path, f.read())
+        print(f'    ✓ Restored {rel_path}' + ('' if changed else ' (unchanged)'))
+    return manifest['success_count']
+
+
+def store_generated(version_info, key, cache_dir, files, success_count):
+    '''Save a version's generated docs under its cache key'''
+    entry_dir = _generation_cache_path(cache_dir, version_info['version'])
+    safe_rmtree(entry_dir)
+    for rel_path in files:
+        cached_path = os.path.join(entry_dir, 'files', rel_path)
+        os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+        shutil.copyfile(rel_path, cached_path)
+    with open(os.path.join(entry_dir, 'manifest.json'), 'w') as f:
+        json.dump({
+            'key': key,
+            'version': version_info['version'],
+            'success_count': success_count,
+            'files': files,
+        }, f, indent=2)
+
+
+def stage_jobs():
+    '''How many doc stages of one version may run at once ($REF_DOCS_STAGE_JOBS, default 3)'''
+    return max(1, int(os.environ.get('REF_DOCS_STAGE_JOBS') or 3))
+
+
+class _StageLogs(io.TextIOBase):
+    '''Stand-in for sys.stdout while stages run on their own threads.
+
+    Prints from a stage thread go to that stage's buffer, so each stage's
+    log can be printed as one block; prints from any other thread pass
+    through. Child processes write to the file descriptors, not to
+    sys.stdout, so traced_run captures their output into the buffer (see
+    _stage_log).
+    '''
+
+    def __init__(self, target):
+        self.target = target
+        self.local = threading.local()
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        return (getattr(self.local, 'buffer', None) or self.target).write(text)
+
+    def flush(self):
+        self.target.flush()
+
+    def run(self, fn):
+        '''Call fn with its prints captured; return (result, error, log)'''
+        self.local.buffer = buffer = io.StringIO()
+        try:
+            return fn(), None, buffer.getvalue()
+        except Exception as e:
+            return None, e, buffer.getvalue()
+        finally:
+            self.local.buffer = None
+
+
+def _stage_log():
+    '''The log buffer of the stage running on this thread, or None'''
+    stdout = sys.stdout
+    return getattr(stdout.local, 'buffer', None) if isinstance(stdout, _StageLogs) else None
+
+
+def run_version_stages(stages, jobs=None):
+    '''Run one version's doc stages side by side; yield their results in order.
+
+    stages is a list of (name, fn) pairs. The stages read the same checkout
+    and write disjoint outputs, and most of their time goes to child
+    processes (crd-ref-docs, go run findmetrics), so up to jobs of them
+    (default: stage_jobs()) run at once on a thread pool. Each stage runs in
+    its own trace span and its prints are buffered, so this yields
+    (name, result, error, log) per stage in the order given, as soon as that
+    stage and every one before it is done. An exception is returned as the
+    stage's error instead of stopping the other stages.
+    '''
+    jobs = jobs or stage_jobs()
+    _link_fixup_matcher()  # Compile it once, before the stages race to
+    logs = _StageLogs(sys.stdout)
+
+    def run(name, fn):
+        def traced():
+            with trace_span(name):
+                return fn()
+        return logs.run(traced)
+
+    sys.stdout = logs
+    try:
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='stage') as pool:
+            futures = [pool.submit(run, name, fn) for name, fn in stages]
+            for (name, _), future in zip(stages, futures):
+                result, error, log = future.result()
+                yield name, result, error, log
+    finally:
+        sys.stdout = logs.target
+
+
+def process_version(version_info, is_release_trigger, workspace='.', mirror_dir=None, refs=None,
+                    cache_dir=None):
+    '''Resolve, clone, and generate all doc types for one version.
+
+    workspace is the directory that holds this version's kgateway checkout and
+    temporary files. Sequential runs use the current directory; parallel runs
+    give every version its own workspace. With mirror_dir, the checkout is a
+    worktree of the local mirror instead of a fresh clone. refs is the shared
+    listing from list_remote_refs, so resolving needs no network round trip.
+    With cache_dir, a version whose cache key (see generation_cache_key) is
+    unchanged since the last run is restored from the cache instead of being
+    cloned and regenerated. Returns the number of doc types generated, or None
+    if the version was skipped. Raises subprocess.CalledProcessError if the
+    checkout fails; main() then skips the version with a warning, or fails
+    the run with --strict.
+    '''
+    with trace_span(f'version {version_info["version"]}', 'version'):
+        return _process_version(version_info, is_release_trigger, workspace, mirror_dir, refs, cache_dir)
+
+
+def _process_version(version_info, is_release_trigger, workspace, mirror_dir, refs, cache_dir):
+    version = version_info['version']
+    link_version = version_info['linkVersion']
+    url_path = version_info['url']
+    # Worktrees of the mirror get their admin entry named after the checkout
+    # directory, so give each version its own name.
+    checkout_name = f'kgateway-{version}' if mirror_dir else 'kgateway'
+    kgateway_dir = os.path.join(workspace, checkout_name) if workspace != '.' else checkout_name
+    
+    print(f'\n🔄 Processing version: {version} (linkVersion: {link_version}, path: {url_path})')
+    
+    # Resolve tag or branch based on trigger type
+    if is_release_trigger:
+        # Use tags for release triggers
+        ref = resolve_tag_for_version(version, link_version, refs)
+        ref_type = 'tag'
+    else:
+        # Use branches for manual triggers
+        ref = resolve_branch_for_version(version, link_version, refs)
+        ref_type = 'branch'
+    
+    if not ref:
+        print(f'❌ Skipping version {version} - could not resolve {ref_type}')
+        return None
+    
+    sha = commit_for_ref(ref, refs)
+    print(f'   Using {ref_type}: {ref}' + (f' ({sha[:12]})' if sha else ''))
+    
+    cache_key = generation_cache_key(version_info, sha) if cache_dir and sha else None
+    # A listing read from the ref cache can be up to --ref-cache-ttl old, so
+    # before restoring from it, check where the ref is now.
+    if cache_key and refs.get('from_cache') and _generated_manifest(version_info, cache_key, cache_dir):
+        try:
+            with trace_span('check ref'):
+                live_sha = live_commit_for_ref(ref)
+        except subprocess.CalledProcessError as e:
+            print(f'   ⚠ Could not check {ref} on the remote, regenerating: {e}')
+            live_sha = None
+        if live_sha != sha:
+            if live_sha:
+                print(f'   Note: {ref} is now at {live_sha[:12]}, not {sha[:12]} as listed; the ref listing is stale')
+            sha = live_sha
+            cache_key = generation_cache_key(version_info, sha) if sha else None
+    if cache_key:
+        with trace_span('restore cache'):
+            success_count = restore_generated(version_info, cache_key, cache_dir)
+        if success_count is not None:
+            print(f'✅ Completed version {version} - restored {success_count}/3 doc types from cache (unchanged since last run)')
+            return success_count
+    outputs = version_output_paths(version, link_version, url_path)
+    for path in outputs:
+        _OUTPUTS.pop(path, None)  # Only this run's writes go into the cache
+    
+    def api_docs():
+        try:
+            return generate_api_docs(version, link_version, url_path, kgateway_dir, work_dir=workspace)
+        finally:
+            # After the API docs, so the database is recorded alongside them
+            with trace_span('type database'):
+                record_version_types(version, sha, kgateway_dir)
+    
+    stages = [
+        ('api docs', api_docs),
+        ('helm docs', lambda: generate_helm_docs(version, link_version, url_path, kgateway_dir)),
+        ('metrics docs', lambda: generate_metrics_docs(version, link_version, url_path, kgateway_dir)),
+    ]
+    labels = {'api docs': 'API docs', 'helm docs': 'Helm docs', 'metrics docs': 'Metrics docs'}
+    sparse = sparse_patterns(name for name, _ in stages) if os.environ.get('REF_DOCS_SPARSE') else None
+    
+    # Clone repository once per version
+    try:
+        with trace_span('clone'):
+            clone_repository(ref, kgateway_dir, mirror_dir, sparse)
+            head = traced_run(['git', '-C', kgateway_dir, 'rev-parse', 'HEAD'], check=True,
+                              capture_output=True, text=True).stdout.strip()
+        print(f'   ✓ Cloned repository')
+    except subprocess.CalledProcessError as e:
+        print(f'❌ Failed to clone repository for version {version}: {e}')
+        remove_checkout(kgateway_dir, mirror_dir)
+        raise
+    
+    # The ref can move between listing and checkout, so the output is stored
+    # (and the types recorded) under the commit actually checked out.
+    if head != sha:
+        if sha:
+            print(f'   Note: {ref} is at {head[:12]}, not {sha[:12]} as listed; the ref listing is stale')
+        sha = head
+        cache_key = generation_cache_key(version_info, sha) if cache_dir else None
+    
+    # Parse the Go API types while only this thread runs (see fill_parse_cache)
+    with trace_span('parse types'):
+        fill_parse_cache(kgateway_dir)
+    
+    # Generate all documentation types for this version
+    success_count = 0
+    for name, generated, error, log in run_version_stages(stages):
+        print(log, end='')
+        if error:
+            print(f'   ⚠ {labels[name]} failed: {error}')
+            cache_key = None  # Don't cache a transient failure
+        elif generated:
+            success_count += 1
+    
+    # Clean up repository after processing this version
+    with trace_span('remove checkout'):
+        remove_checkout(kgateway_dir, mirror_dir)
+    
+    if cache_key:
+        written = [p for p in outputs if p in _OUTPUTS]
+        with trace_span('store cache'):
+            store_generated(version_info, cache_key, cache_dir, written, success_count)
+    
+    print(f'✅ Completed version {version} - generated {success_count}/3 doc types')
+    return success_count
+
+
+def _process_version_isolated(version_info, is_release_trigger, mirror_dir=None, refs=None, cache_dir=None):
+    '''Process-pool entry point: run process_version in a private workspace.
+
+    Each worker gets its own temp directory for the clone, the crd-ref-docs
+    config and out.md. Both Python prints and child-process output (git, go)
+    are redirected at the file-descriptor level into a log file, so the parent
+    can print every version's log as one contiguous block. Returns
+    (success_count, failed, log_text, link_fixup_hits, trace_events, outputs)
+    where failed is True if the version raised, and the last three items
+    cover this version alone.
+    '''
+    _link_fixup_matcher().reset()
+    take_trace_events()  # Drop any spans and outputs inherited from the parent
+    take_outputs()
+    trace_process_name(f'worker {version_info["version"]}')
+    workspace = tempfile.mkdtemp(prefix=f'refdocs-{version_info["version"]}-')
+    log_path = os.path.join(workspace, 'generate.log')
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_fds = (os.dup(1), os.dup(2))
+    try:
+        # Line-buffered, and sharing one open file description with fds 1/2,
+        # so Python prints and child output interleave in the order they happen.
+        with open(log_path, 'w', buffering=1) as log, \
+                contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            os.dup2(log.fileno(), 1)
+            os.dup2(log.fileno(), 2)
+            failed = False
+            try:
+                result = process_version(version_info, is_release_trigger, workspace, mirror_dir, refs, cache_dir)
+            except Exception as e:
+                print(f'❌ Version {version_info["version"]} failed: {e}')
+                result, failed = None, True
+            finally:
+                log.flush()
+                os.dup2(saved_fds[0], 1)
+                os.dup2(saved_fds[1], 2)
+        with open(log_path) as f:
+            return (result, failed, f.read(), _link_fixup_matcher().hit_counts(), take_trace_events(),
+                    take_outputs())
+    finally:
+        for fd in saved_fds:
+            os.close(fd)
+        safe_rmtree(workspace)
+
+
+def _process_versions_parallel(versions, is_release_trigger, jobs, mirror_dir=None, refs=None, cache_dir=None):
+    '''Process versions in a process pool, printing each log as one block.
+
+    Logs are printed in versions.json order (not completion order) so the
+    output reads the same as a sequential run. Returns the link fix-up hit
+    counts summed over all workers and the versions that failed. The
+    workers' outputs are added to this
+    process's record (see write_output), and with --trace their spans are
+    added to this process's trace.
+    '''
+    hit_counts = {}
+    failed_versions = []
+    print(f'Running with {jobs} parallel jobs')
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(_process_version_isolated, version_info, is_release_trigger, mirror_dir, refs, cache_dir)
+            for version_info in versions
+        ]
+        for version_info, future in zip(versions, futures):
+            try:
+                _, failed, log, hits, events, outputs = future.result()
+            except Exception as e:
+                print(f'\n❌ Version {version_info["version"]} failed: {e}')
+                failed_versions.append(version_info['version'])
+                continue
+            if failed:
+                failed_versions.append(version_info['version'])
+            print(log, end='')
+            sys.stdout.flush()
+            for old, count in hits.items():
+                hit_counts[old] = hit_counts.get(old, 0) + count
+            _OUTPUTS.update(outputs)
+            if _TRACE_EVENTS is not None:
+                _TRACE_EVENTS.extend(events)
+    return hit_counts, failed_versions
+
+
+def default_ref_cache_ttl():
+    '''Seconds to reuse the cached ref listing: $REF_DOCS_REF_CACHE_TTL if set.
+
+    Otherwise 0 in CI ($CI, which GitHub Actions sets) and for release
+    triggers, which must build the commit the ref points to now, and 600
+    for local re-runs.
+    '''
+    if os.environ.get('REF_DOCS_REF_CACHE_TTL'):
+        return int(os.environ['REF_DOCS_REF_CACHE_TTL'])
+    if os.environ.get('CI') or os.environ.get('GITHUB_EVENT_NAME') == 'release':
+        return 0
+    return 600
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate API, Helm, and Metrics reference docs for kgateway.dev')
+    parser.add_argument(
+        '--jobs', '-j', type=int, default=int(os.environ.get('REF_DOCS_JOBS') or 1),
+        help='Number of versions to generate in parallel (default: 1, or $REF_DOCS_JOBS)',
+    )
+    parser.add_argument(
+        '--stage-jobs', type=int, default=stage_jobs(), metavar='N',
+        help='Number of doc stages (API, Helm, metrics) of one version to run at once; 1 runs them '
+             'one after another (default: %(default)s, or $REF_DOCS_STAGE_JOBS)',
+    )
+    parser.add_argument(
+        '--git-cache', default=os.environ.get('REF_DOCS_GIT_CACHE') or None, metavar='DIR',
+        help='Keep a bare kgateway mirror in DIR and check versions out as worktrees '
+             '(default: fresh shallow clone per version, or $REF_DOCS_GIT_CACHE)',
+    )
+    parser.add_argument(
+        '--sparse', action='store_true', default=bool(os.environ.get('REF_DOCS_SPARSE')),
+        help='Check out only the kgateway paths the doc stages read, from a blob-less partial clone '
+             '(default: full shallow clone, or $REF_DOCS_SPARSE)',
+    )
+    parser.add_argument(
+        '--cache-dir', default=default_cache_dir(), metavar='DIR',
+        help='Directory for caches kept between runs (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--ref-cache-ttl', type=int, default=default_ref_cache_ttl(), metavar='SECONDS',
+        help='Reuse the cached branch/tag listing if younger than this; 0 always lists the remote '
+             '(default: $REF_DOCS_REF_CACHE_TTL, else 0 in CI and for release triggers, else 600)',
+    )
+    parser.add_argument(
+        '--no-generation-cache', action='store_true',
+        help='Regenerate every version even if its commit and the generator inputs are unchanged',
+    )
+    parser.add_argument(
+        '--rule-stats', action='store_true', default=bool(os.environ.get('REF_DOCS_RULE_STATS')),
+        help='Print per-rule hit counts and time for every API doc post-processing pass',
+    )
+    parser.add_argument(
+        '--repo-url', default=KGATEWAY_REPO_URL, metavar='URL',
+        help='kgateway repository to generate from, e.g. a fork or a local file:// repo '
+             '(default: %(default)s, or $KGATEWAY_REPO_URL)',
+    )
+    parser.add_argument(
+        '--tool', action='append', default=[], metavar='NAME=COMMAND',
+        help=f'Run COMMAND instead of a doc tool ({", ".join(DOC_TOOLS)}); may be repeated '
+             '(default: the pinned tools, or $REF_DOCS_TOOL_<NAME>)',
+    )
+    parser.add_argument(
+        '--trace', default=os.environ.get('REF_DOCS_TRACE') or None, metavar='FILE',
+        help='Write a Chrome trace-event file of every stage and subprocess, and print a per-stage '
+             'summary (default: no trace, or $REF_DOCS_TRACE)',
+    )
+    parser.add_argument(
+        '--manifest', default=os.environ.get('REF_DOCS_MANIFEST') or None, metavar='FILE',
+        help='Write the JSON list of every output file of this run, with its SHA-256 and whether it changed '
+             '(default: output-manifest.json in --cache-dir, or $REF_DOCS_MANIFEST)',
+    )
+    parser.add_argument(
+        '--strict', action='store_true', default=bool(os.environ.get('REF_DOCS_STRICT')),
+        help='Exit with an error if any version fails to check out or generate, after the others are written '
+             '(default: skip the version with a warning, or $REF_DOCS_STRICT)',
+    )
+    parser.add_argument(
+        '--warm-tools', action='store_true',
+        help='Only build the pinned Go doc tools into the cache, then exit',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    global KGATEWAY_REPO_URL
+    args = _parse_args(argv)
+    # Helpers that read the cache location (and parallel workers, which inherit
+    # the environment) must agree with --cache-dir.
+    os.environ['REF_DOCS_CACHE_DIR'] = os.path.abspath(args.cache_dir)
+    KGATEWAY_REPO_URL = os.environ['KGATEWAY_REPO_URL'] = args.repo_url
+    os.environ['REF_DOCS_STAGE_JOBS'] = str(max(1, args.stage_jobs))
+    if args.sparse:
+        os.environ['REF_DOCS_SPARSE'] = '1'
+    for tool in args.tool:
+        name, sep, command = tool.partition('=')
+        if name not in DOC_TOOLS or not sep:
+            sys.exit(f'--tool expects NAME=COMMAND with NAME one of {", ".join(DOC_TOOLS)}, got {tool!r}')
+        os.environ[_tool_env_var(name)] = command
+    if args.rule_stats:
+        os.environ['REF_DOCS_RULE_STATS'] = '1'
+        enable_rule_stats()
+    if args.trace:
+        os.environ['REF_DOCS_TRACE'] = os.path.abspath(args.trace)
+        enable_trace()
+        trace_process_name('generate-ref-docs')
+    
+    if args.warm_tools:
+        warm_go_tools()
+        return
+
     # Main processing logic - determine target version
     event_name = os.environ.get('GITHUB_EVENT_NAME', '')
     release_tag = os.environ.get('GITHUB_RELEASE_TAG', '')
@@ -941,65 +2241,73 @@ def main():
     
     print(f'Processing {len(versions)} version(s): {[v["version"] for v in versions]}')
     
-    for version_info in versions:
-        version = version_info['version']
-        link_version = version_info['linkVersion']
-        url_path = version_info['url']
-        
-        print(f'\n🔄 Processing version: {version} (linkVersion: {link_version}, path: {url_path})')
-        
-        # Resolve tag or branch based on trigger type
-        if is_release_trigger:
-            # Use tags for release triggers
-            ref = resolve_tag_for_version(version, link_version)
-            ref_type = 'tag'
-        else:
-            # Use branches for manual triggers
-            ref = resolve_branch_for_version(version, link_version)
-            ref_type = 'branch'
-        
-        if not ref:
-            print(f'❌ Skipping version {version} - could not resolve {ref_type}')
-            continue
-        
-        print(f'   Using {ref_type}: {ref}')
-        
-        # Clone repository once per version
+    mirror_dir = None
+    if args.git_cache:
+        # Fetch once up front; the per-version worktrees (possibly in parallel
+        # workers) then only read from the mirror.
         try:
-            clone_repository(ref)
-            subprocess.run(['git', '-C', 'kgateway', 'rev-parse', 'HEAD'], check=True)
-            print(f'   ✓ Cloned repository')
+            with trace_span('mirror'):
+                mirror_dir = ensure_mirror(args.git_cache)
         except subprocess.CalledProcessError as e:
-            print(f'❌ Failed to clone repository for version {version}: {e}')
-            continue
-        
-        # Generate all documentation types for this version
-        success_count = 0
-        
-        try:
-            if generate_api_docs(version, link_version, url_path):
-                success_count += 1
-        except Exception as e:
-            print(f'   ⚠ API docs failed: {e}')
-        
-        try:
-            if generate_helm_docs(version, link_version, url_path):
-                success_count += 1
-        except Exception as e:
-            print(f'   ⚠ Helm docs failed: {e}')
-        
-        try:
-            if generate_metrics_docs(version, link_version, url_path):
-                success_count += 1
-        except Exception as e:
-            print(f'   ⚠ Metrics docs failed: {e}')
-        
-        # Clean up repository after processing this version
-        safe_rmtree('kgateway')
-        
-        print(f'✅ Completed version {version} - generated {success_count}/3 doc types')
+            print(f'⚠ Could not prepare kgateway mirror, falling back to fresh clones: {e}')
+    
+    # List every branch and tag once and resolve all versions against it. The
+    # mirror was just fetched, so list it locally; otherwise use the on-disk
+    # cache of the remote listing when it is fresh enough.
+    try:
+        with trace_span('list refs'):
+            if mirror_dir:
+                refs = list_remote_refs(mirror_dir)
+            else:
+                refs = list_remote_refs(cache_file=os.path.join(args.cache_dir, 'refs.json'),
+                                        ttl=args.ref_cache_ttl)
+        print(f'Resolved {len(refs["heads"])} branches and {len(refs["tags"])} tags')
+    except subprocess.CalledProcessError as e:
+        print(f'⚠ Could not list kgateway refs, resolving per version instead: {e}')
+        refs = None
+    
+    generation_cache = None if args.no_generation_cache else args.cache_dir
+    
+    with trace_span('all versions', 'run', jobs=args.jobs):
+        if args.jobs > 1 and len(versions) > 1:
+            hit_counts, failed_versions = _process_versions_parallel(versions, is_release_trigger, args.jobs,
+                                                                     mirror_dir, refs, generation_cache)
+        else:
+            failed_versions = []
+            for version_info in versions:
+                try:
+                    process_version(version_info, is_release_trigger, mirror_dir=mirror_dir, refs=refs,
+                                    cache_dir=generation_cache)
+                except subprocess.CalledProcessError:
+                    failed_versions.append(version_info['version'])
+            hit_counts = _link_fixup_matcher().hit_counts()
+    
+    # Versions restored from the generation cache never reach the fix-up pass,
+    # so this only covers the versions regenerated in this run.
+    report_stale_link_fixups(hit_counts)
+    
+    outputs = take_outputs()
+    manifest = args.manifest or os.path.join(args.cache_dir, 'output-manifest.json')
+    write_output_manifest(manifest, outputs)
+    changed = sum(entry['changed'] for entry in outputs.values())
+    print(f'\n📝 {changed} of {len(outputs)} output files changed; manifest written to {manifest}')
+    
+    if not failed_versions:
+        print('\n🎉 All versions processed!')
+    
+    if args.trace:
+        events = take_trace_events()
+        write_trace(args.trace, events)
+        print(f'\n📈 Wrote {len(events)} trace events to {args.trace} (open in https://ui.perfetto.dev)')
+        print(format_trace_summary(events))
     
-    print('\n🎉 All versions processed!')
+    if failed_versions:
+        # As for a version whose branch or tag cannot be resolved, the other
+        # versions' docs still go out; --strict makes the run fail instead.
+        message = f'{len(failed_versions)} version(s) failed and were skipped: {failed_versions}'
+        if args.strict:
+            sys.exit(f'\n❌ {message}')
+        print(f'\n⚠ {message}')
 
 
 if __name__ == '__main__':
@@ -7,36 +7,66 @@ markdown documentation for types that crd-ref-docs cannot generate
 (types without +kubebuilder:object:root=true annotations).
 """
 
+import hashlib
+import json
 import os
 import re
 import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, replace
 from typing import Optional
 
 
-@dataclass
+# Slotted and frozen: every version of every tree keeps its parsed types in
+# memory, so instances carry no __dict__, and the usually-empty validation and
+# fields default to the shared empty tuple. Use dataclasses.replace to change one.
+@dataclass(frozen=True, slots=True)
 class FieldInfo:
     name: str
     go_type: str
     json_name: str
     description: str
     required: bool = False
-    validation: list = field(default_factory=list)
+    validation: tuple[str, ...] = ()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TypeInfo:
     name: str
     kind: str  # 'struct', 'alias', 'const'
     underlying_type: Optional[str] = None
     description: str = ""
-    fields: list = field(default_factory=list)
-    validation: list = field(default_factory=list)
+    fields: tuple[FieldInfo, ...] = ()
+    validation: tuple[str, ...] = ()
     source: str = ""  # Source directory name (e.g., 'shared', 'kgateway')
     is_enterprise: bool = False  # Whether this type is from an enterprise source
 
 
+class LineIndex:
+    """Line-start offsets of a file, for mapping a match position to its line.
+
+    Built once per file and shared by the type and field scanners, so looking
+    up a line number is a binary search rather than a rescan of the content
+    before the match.
+    """
+
+    def __init__(self, content: str):
+        self.starts = [0]
+        pos = content.find("\n")
+        while pos != -1:
+            self.starts.append(pos + 1)
+            pos = content.find("\n", pos + 1)
+
+    def line_of(self, pos: int) -> int:
+        """Return the 0-based line number of character offset pos."""
+        return bisect_right(self.starts, pos) - 1
+
+
 def extract_doc_comment(lines: list[str], end_line: int) -> str:
     """Extract documentation comment above a declaration."""
     comments = []
@@ -49,7 +79,7 @@ def extract_doc_comment(lines: list[str], end_line: int) -> str:
             if comment_text.startswith("+"):
                 i -= 1
                 continue
-            comments.insert(0, comment_text)
+            comments.append(comment_text)
             i -= 1
         elif line == "" and comments:
             # Empty line before comments - stop
@@ -58,6 +88,7 @@ def extract_doc_comment(lines: list[str], end_line: int) -> str:
             i -= 1
         else:
             break
+    comments.reverse()
     return " ".join(comments)
 
 
@@ -70,7 +101,7 @@ def extract_validation_annotations(lines: list[str], end_line: int) -> list[str]
         if line.startswith("// +kubebuilder:validation:"):
             # Extract the validation rule
             rule = line.replace("// +kubebuilder:validation:", "")
-            validations.insert(0, rule)
+            validations.append(rule)
         elif line.startswith("//"):
             pass  # Other comments, continue looking
         elif line == "":
@@ -79,149 +110,346 @@ def extract_validation_annotations(lines: list[str], end_line: int) -> list[str]
         else:
             break
         i -= 1
+    validations.reverse()
     return validations
 
 
-def parse_struct_fields(content: str, struct_start: int, struct_end: int, lines: list[str]) -> list[FieldInfo]:
-    """Parse fields from a struct definition."""
-    fields = []
-    struct_content = content[struct_start:struct_end]
-    
-    # Find the opening brace
-    brace_start = struct_content.find("{")
-    if brace_start == -1:
-        return fields
-    
-    # Get content between braces
-    brace_count = 1
-    i = brace_start + 1
-    field_content_start = i
-    
-    while i < len(struct_content) and brace_count > 0:
-        if struct_content[i] == "{":
-            brace_count += 1
-        elif struct_content[i] == "}":
-            brace_count -= 1
-        i += 1
-    
-    field_content = struct_content[field_content_start:i-1]
-    
-    # Parse each field line
-    # Match: FieldName Type `json:"name,omitempty"`
-    field_pattern = re.compile(
-        r'^\s*(\w+)\s+([^\s`]+(?:\s*\[[^\]]*\][^\s`]*)?)\s*`json:"([^"]+)"',
-        re.MULTILINE
-    )
-    
-    # Also handle embedded structs: FieldName `json:",inline"`
-    embedded_pattern = re.compile(
-        r'^\s*(\w+)\s+`json:"([^"]+)"',
-        re.MULTILINE
+VALIDATION_PREFIX = "// +kubebuilder:validation:"
+
+# Match: FieldName Type `json:"name,omitempty"`
+FIELD_PATTERN = re.compile(r'\s*(\w+)\s+([^\s`]+(?:\s*\[[^\]]*\][^\s`]*)?)\s*`json:"([^"]+)"')
+
+
+class PendingComments:
+    """Doc comment and validation annotations waiting for the next declaration.
+
+    Fed source lines top to bottom, it holds what extract_doc_comment and
+    extract_validation_annotations would find by walking back up from the
+    current line: the last paragraph of doc comments (a blank line only
+    separates paragraphs once a real comment follows it) and every
+    validation annotation since the last line of code.
+    """
+
+    def __init__(self, description: str = "", validation: list[str] | None = None):
+        self.doc = [description] if description else []
+        self.validation = list(validation or [])
+        self.blank_seen = False
+
+    def feed(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            self.blank_seen = True
+        elif line.startswith("//"):
+            if line.startswith(VALIDATION_PREFIX):
+                self.validation.append(line.replace(VALIDATION_PREFIX, ""))
+            comment_text = line[2:].strip()
+            # Skip kubebuilder annotations and other markers
+            if not comment_text.startswith("+"):
+                if self.blank_seen:
+                    self.doc = []
+                self.doc.append(comment_text)
+                self.blank_seen = False
+        else:
+            # Code ends any comment block above it
+            self.doc = []
+            self.validation = []
+            self.blank_seen = False
+
+    def description(self) -> str:
+        return " ".join(self.doc)
+
+
+# One alternative per token kind, each taking the whitespace before it along
+# so that blanks never cost a match of their own. Raw strings and block
+# comments may span lines.
+GO_TOKEN_PATTERN = re.compile(r"""
+    \s*
+    (?:
+        (?P<comment>//[^\n]*|/\*.*?\*/)
+      | (?P<string>`[^`]*`|"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+      | (?P<ident>[^\W\d]\w*)
+      | (?P<number>\.?\d(?:[eEpP][+-]|[\w.])*)
+      | (?P<op>\S)
     )
-    
-    for match in field_pattern.finditer(field_content):
-        field_name = match.group(1)
-        field_type = match.group(2).strip()
-        json_tag = match.group(3)
-        
-        # Parse json tag
-        json_parts = json_tag.split(",")
-        json_name = json_parts[0] if json_parts[0] else field_name
-        required = "omitempty" not in json_tag
-        
-        # Find the line number for this field to get its comment
-        field_line_match = re.search(
-            rf'^\s*{re.escape(field_name)}\s+',
-            content[struct_start:struct_end],
-            re.MULTILINE
-        )
+""", re.VERBOSE | re.DOTALL)
+
+
+def tokenize_go(content: str):
+    """Yield (kind, text, pos) for each token of Go source.
+
+    kind is one of comment, string, ident, number or op (a single punctuation
+    character). Braces inside comments, string literals and struct tags are
+    part of those tokens, so only real braces come out as op tokens.
+    """
+    for match in GO_TOKEN_PATTERN.finditer(content):
+        kind = match.lastgroup
+        yield kind, match.group(kind), match.start(kind)
+
+
+def parse_struct_fields(lines: list[str], open_brace: tuple[int, int], close_brace: tuple[int, int],
+                        pending: PendingComments | None = None) -> list[FieldInfo]:
+    """Parse fields from a struct body, given the (line, column) of its braces.
+
+    One forward scan over the body: comment lines go into the pending buffers
+    and each field line takes whatever is pending when it is reached. Fields
+    of nested anonymous structs are included. pending carries the comments
+    above the struct's own declaration, which is what a field on the same
+    line as the opening brace would have been documented with.
+    """
+    fields = []
+    pending = pending or PendingComments()
+    (first, open_col), (last, close_col) = open_brace, close_brace
+    for i in range(first, last + 1):
+        segment = lines[i][:close_col] if i == last else lines[i]
+        if i == first:
+            segment = segment[open_col + 1:]
         
-        description = ""
-        validation = []
-        if field_line_match:
-            # Count newlines to find line number
-            field_pos = struct_start + field_line_match.start()
-            line_num = content[:field_pos].count('\n')
-            description = extract_doc_comment(lines, line_num)
-            validation = extract_validation_annotations(lines, line_num)
+        match = FIELD_PATTERN.match(segment)
+        if match:
+            field_name = match.group(1)
+            field_type = match.group(2).strip()
+            json_tag = match.group(3)
+            
+            # Parse json tag
+            json_parts = json_tag.split(",")
+            json_name = json_parts[0] if json_parts[0] else field_name
+            required = "omitempty" not in json_tag
+            
+            fields.append(FieldInfo(
+                name=sys.intern(field_name),
+                go_type=sys.intern(field_type),
+                json_name=sys.intern(json_name),
+                description=pending.description(),
+                required=required,
+                validation=tuple(pending.validation)
+            ))
         
-        fields.append(FieldInfo(
-            name=field_name,
-            go_type=field_type,
-            json_name=json_name,
-            description=description,
-            required=required,
-            validation=validation
-        ))
+        if i == first:
+            pending = PendingComments()  # The declaration line is code
+        else:
+            pending.feed(segment)
     
     return fields
 
 
 def parse_go_file(filepath: Path, source: str = "", is_enterprise: bool = False) -> list[TypeInfo]:
     """Parse a Go file and extract type definitions."""
+    return parse_go_source(filepath.read_text(encoding="utf-8"), source, is_enterprise)
+
+
+def parse_go_source(content: str, source: str = "", is_enterprise: bool = False) -> list[TypeInfo]:
+    """Parse Go source code and extract type definitions.
+
+    A single pass over tokenize_go finds the declarations of the form
+    "type Name struct {...}", "type Name = Other" and "type Name Other" (with
+    "type" at the start of a line) and the real braces that delimit each
+    struct body.
+    """
     types = []
     
-    content = filepath.read_text(encoding="utf-8")
     lines = content.split('\n')
+    line_index = LineIndex(content)
+    
+    def position(pos: int) -> tuple[int, int]:
+        line = line_index.line_of(pos)
+        return line, pos - line_index.starts[line]
+    
+    def declaration(type_name: str, type_pos: int, **kwargs) -> TypeInfo:
+        # Doc comment and annotations sit on the lines above "type"
+        line_num = line_index.line_of(type_pos)
+        return TypeInfo(
+            name=sys.intern(type_name),
+            description=extract_doc_comment(lines, line_num),
+            validation=tuple(extract_validation_annotations(lines, line_num)),
+            source=source,
+            is_enterprise=is_enterprise,
+            **kwargs
+        )
     
-    # Find type definitions
-    # Pattern for: type Name struct { or type Name = string or type Name string
-    type_pattern = re.compile(
-        r'^type\s+(\w+)\s+(struct\s*\{|=?\s*(\w+))',
-        re.MULTILINE
-    )
-    
-    for match in type_pattern.finditer(content):
-        type_name = match.group(1)
-        type_def = match.group(2).strip()
-        
-        # Get line number for doc comment
-        line_num = content[:match.start()].count('\n')
-        description = extract_doc_comment(lines, line_num)
-        validation = extract_validation_annotations(lines, line_num)
+    depth = 0
+    state = None  # Where we are in a "type" declaration
+    type_name = type_pos = None
+    struct = None  # (TypeInfo, opening brace, depth inside the body) while in a body
+    for kind, text, pos in tokenize_go(content):
+        if state is not None:
+            # Not cleared up front: a token that breaks the declaration
+            # falls through to the structural checks below.
+            if state == "name":
+                state = None
+                if kind == "ident":
+                    type_name, state = text, "definition"
+                    continue
+            elif state == "definition":
+                state = None
+                if text == "struct":
+                    state = "struct"
+                    continue
+                if text == "=":
+                    state = "alias"
+                    continue
+                if kind == "ident":
+                    types.append(declaration(type_name, type_pos, kind="alias", underlying_type=text))
+                    continue
+            elif state == "alias":
+                state = None
+                if kind == "ident":
+                    types.append(declaration(type_name, type_pos, kind="alias", underlying_type=text))
+                    continue
+            elif state == "struct":
+                state = None
+                if text == "{":
+                    struct = (declaration(type_name, type_pos, kind="struct"), position(pos), depth + 1)
+                else:
+                    # "struct" without a body reads as a named underlying type
+                    types.append(declaration(type_name, type_pos, kind="alias", underlying_type="struct"))
         
-        if type_def.startswith("struct"):
-            # Find the end of the struct
-            brace_count = 0
-            started = False
-            end_pos = match.start()
-            for i in range(match.start(), len(content)):
-                if content[i] == "{":
-                    brace_count += 1
-                    started = True
-                elif content[i] == "}":
-                    brace_count -= 1
-                    if started and brace_count == 0:
-                        end_pos = i + 1
-                        break
-            
-            fields = parse_struct_fields(content, match.start(), end_pos, lines)
-            
-            types.append(TypeInfo(
-                name=type_name,
-                kind="struct",
-                description=description,
-                fields=fields,
-                validation=validation,
-                source=source,
-                is_enterprise=is_enterprise
-            ))
-        else:
-            # Type alias
-            underlying = match.group(3) if match.group(3) else type_def.replace("=", "").strip()
-            types.append(TypeInfo(
-                name=type_name,
-                kind="alias",
-                underlying_type=underlying,
-                description=description,
-                validation=validation,
-                source=source,
-                is_enterprise=is_enterprise
-            ))
+        if kind == "op":
+            if text == "{":
+                depth += 1
+            elif text == "}":
+                if struct and depth == struct[2]:
+                    type_info, open_brace, _ = struct
+                    fields = parse_struct_fields(
+                        lines, open_brace, position(pos),
+                        PendingComments(type_info.description, type_info.validation),
+                    )
+                    types.append(replace(type_info, fields=tuple(fields)))
+                    struct = None
+                depth = max(depth - 1, 0)  # A stray "}" must not hide later types
+        elif kind == "ident" and text == "type" and (pos == 0 or content[pos - 1] == "\n"):
+            # gofmt only puts top-level declarations at column 0, so this also
+            # recovers from a struct whose closing brace is missing.
+            if struct:
+                types.append(struct[0])  # Unterminated struct: no fields
+                struct = None
+            depth = 0
+            type_name, type_pos, state = None, pos, "name"
+    
+    if struct:
+        types.append(struct[0])
     
     return types
 
 
+# Below this many files to parse, starting a process pool costs more than it saves
+PARALLEL_PARSE_MIN_FILES = 8
+
+_PARSER_FINGERPRINT = None
+
+
+def _parser_fingerprint() -> str:
+    """Hash of this script, so a parser change invalidates the parse cache."""
+    global _PARSER_FINGERPRINT
+    if _PARSER_FINGERPRINT is None:
+        _PARSER_FINGERPRINT = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+    return _PARSER_FINGERPRINT
+
+
+def _parse_to_dicts(content: str) -> list[dict]:
+    """Process-pool entry point: parse Go source into plain, picklable dicts."""
+    return [asdict(t) for t in parse_go_source(content)]
+
+
+def _types_from_dicts(parsed: list[dict]) -> list[TypeInfo]:
+    """Rebuild parse results from their JSON form, re-interning the names."""
+    return [
+        TypeInfo(**{
+            **t,
+            "name": sys.intern(t["name"]),
+            "fields": tuple(
+                FieldInfo(**{
+                    **f,
+                    "name": sys.intern(f["name"]),
+                    "go_type": sys.intern(f["go_type"]),
+                    "json_name": sys.intern(f["json_name"]),
+                    "validation": tuple(f["validation"]),
+                })
+                for f in t["fields"]
+            ),
+            "validation": tuple(t["validation"]),
+        })
+        for t in parsed
+    ]
+
+
+def _parse_uncached(contents: list[str], jobs: int) -> list[list[dict]]:
+    """Parse each source, fanned out over a process pool when it pays off.
+
+    Only the main thread forks the pool. Called from another thread, such as
+    a doc stage of generate-ref-docs.py, the fork could copy a lock that a
+    sibling thread holds into the children, and they would deadlock on it.
+    The spawn and forkserver start methods would avoid that, but their
+    workers import this module by name, and it is loaded from a dashed file
+    name that cannot be imported. So a call from another thread parses
+    serially; generate-ref-docs.py fills the cache on its main thread before
+    the stages start, so its stages find the files already parsed.
+    """
+    if (jobs > 1 and len(contents) >= PARALLEL_PARSE_MIN_FILES
+            and threading.current_thread() is threading.main_thread()):
+        try:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(contents))) as pool:
+                return list(pool.map(_parse_to_dicts, contents))
+        except Exception as e:
+            print(f"Warning: parallel parsing failed, parsing serially: {e}")
+    return [_parse_to_dicts(content) for content in contents]
+
+
+def parse_go_files(files: list[Path], cache_dir: Path | None = None,
+                   jobs: int | None = None) -> list[list[TypeInfo]]:
+    """Parse Go files, reusing cached results for files parsed before.
+
+    With cache_dir, each file's parse result is stored as JSON under the
+    SHA-256 of its content (and of this script), so a file that is
+    byte-identical to one seen in an earlier run or another version is never
+    parsed again. The rest are parsed in a process pool of `jobs` workers
+    (default: $REF_DOCS_PARSE_JOBS, else the CPU count), or serially off the
+    main thread. Returns one list of
+    types per file, in order, with source and is_enterprise left for the
+    caller to fill in.
+    """
+    if jobs is None:
+        jobs = int(os.environ.get("REF_DOCS_PARSE_JOBS") or os.cpu_count() or 1)
+    start = time.perf_counter()
+    results = [None] * len(files)
+    misses = []  # (index, content, cache path)
+    for i, go_file in enumerate(files):
+        data = go_file.read_bytes()
+        cache_path = None
+        if cache_dir:
+            key = hashlib.sha256(_parser_fingerprint().encode() + b"\0" + data).hexdigest()
+            cache_path = Path(cache_dir) / f"{key}.json"
+            try:
+                results[i] = json.loads(cache_path.read_text(encoding="utf-8"))
+                continue
+            except (OSError, ValueError):
+                pass
+        misses.append((i, data.decode("utf-8"), cache_path))
+    
+    parsed = _parse_uncached([content for _, content, _ in misses], jobs)
+    for (i, _, cache_path), types in zip(misses, parsed):
+        results[i] = types
+        if cache_path:
+            _write_parse_cache(cache_path, types)
+    
+    if files:
+        hits = len(files) - len(misses)
+        print(f"Parse cache: {hits}/{len(files)} files unchanged ({hits / len(files):.0%} hit rate), "
+              f"parsed {len(misses)} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return [_types_from_dicts(types) for types in results]
+
+
+def _write_parse_cache(cache_path: Path, types: list[dict]) -> None:
+    """Write one cache entry atomically; parallel versions may share the cache."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(types, f)
+        os.replace(tmp, cache_path)
+    except OSError as e:
+        print(f"Warning: could not write parse cache {cache_path}: {e}")
+
+
 def format_go_type_as_link(go_type: str, documented_types: set[str] | None = None) -> str:
     """Convert a Go type to markdown with links to other types.
 
@@ -359,88 +587,86 @@ def generate_markdown(types: list[TypeInfo], referenced_types: set[str], existin
     return "\n".join(output)
 
 
-def find_documented_types(doc_file: Path) -> set[str]:
-    """Find all type names that have #### headings in the document."""
-    if not doc_file.exists():
-        return set()
-
-    content = doc_file.read_text(encoding="utf-8")
-    heading_pattern = re.compile(r'^#### (\w+)', re.MULTILINE)
-    return {m.group(1) for m in heading_pattern.finditer(content)}
-
-
-def find_all_broken_links(doc_file: Path) -> set[str]:
-    """Find all broken anchor links in a markdown file."""
-    if not doc_file.exists():
-        return set()
-
-    content = doc_file.read_text(encoding="utf-8")
+# One sweep finds both "#### TypeName" headings and [TypeName](#anchor) links.
+# Both branches start with a literal character ("#(?<=^#)" rather than "^#"),
+# so the regex engine can skip straight to candidate positions.
+DOC_INDEX_PATTERN = re.compile(
+    r'#(?<=^#)### (?P<heading>\w+)'
+    r'|\[(?P<link>[A-Z][A-Za-z0-9_]*)\]\(#(?P<anchor>[a-z][a-z0-9_]*)\)',
+    re.MULTILINE,
+)
 
-    # Exact set of type names that have a #### heading. Using an exact match
-    # (rather than a substring `"#### Foo" in content` test) is important: a
-    # link to "#grpcstatus" must not be considered satisfied by a "#### GrpcStatusFilter"
-    # heading, and "#authorization" must not be satisfied by "#### AuthorizationRequest".
-    documented = find_documented_types(doc_file)
 
-    # Find all links like [TypeName](#typename)
-    link_pattern = re.compile(r'\[([A-Z][A-Za-z0-9_]*)\]\(#([a-z][a-z0-9_]*)\)')
-
-    broken = set()
-    for match in link_pattern.finditer(content):
-        type_name = match.group(1)
-        if type_name not in documented:
-            broken.add(type_name)
-
-    return broken
+class DocIndex:
+    """Type headings and type links of a markdown document, from one scan.
 
+    source is the markdown content itself, or a path to read it from (a
+    missing file indexes as empty). headings maps each type name with a
+    "####" heading to the offset of its first heading; links holds
+    (type name, anchor, offset) for every type link, in document order.
+    """
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: generate-shared-types.py <shared_dir> <doc_file> [source_dir...]")
-        print("  shared_dir: Directory containing shared Go types")
-        print("  doc_file: Markdown file to append documentation to")
-        print("  source_dir: Additional source directories to parse for types")
-        sys.exit(1)
-    
-    shared_dir = Path(sys.argv[1])
-    doc_file = Path(sys.argv[2])
-    source_dirs = [Path(d) for d in sys.argv[3:]] if len(sys.argv) > 3 else []
-    
-    if not doc_file.exists():
-        print(f"Doc file not found: {doc_file}")
-        sys.exit(0)
-    
-    # Helper to detect if a directory is from enterprise repo
-    def is_enterprise_source(dir_path: Path) -> bool:
-        """Check if directory is from enterprise repo (contains 'enterprise' in path)."""
-        return "enterprise" in str(dir_path).lower()
-    
-    # Parse all Go files in the shared directory
-    all_types = []
-    if shared_dir.exists():
-        is_ent = is_enterprise_source(shared_dir)
-        for go_file in shared_dir.glob("*.go"):
-            if go_file.name.startswith("zz_generated"):
-                continue  # Skip generated files
-            types = parse_go_file(go_file, source="shared", is_enterprise=is_ent)
-            all_types.extend(types)
-            print(f"Parsed shared/{go_file.name}: found {len(types)} types")
-    
-    # Parse additional source directories for types
-    for source_dir in source_dirs:
+    def __init__(self, source: str | Path):
+        if isinstance(source, Path):
+            source = source.read_text(encoding="utf-8") if source.exists() else ""
+        self.headings: dict[str, int] = {}
+        self.links: list[tuple[str, str, int]] = []
+        for match in DOC_INDEX_PATTERN.finditer(source):
+            heading = match.group("heading")
+            if heading is not None:
+                self.headings.setdefault(heading, match.start())
+            else:
+                self.links.append((match.group("link"), match.group("anchor"), match.start()))
+
+    def documented_types(self) -> set[str]:
+        """Type names that have a #### heading."""
+        return set(self.headings)
+
+    def broken_links(self) -> set[str]:
+        """Type names that are linked to but have no #### heading.
+
+        Headings are matched exactly (rather than by a substring `"#### Foo" in
+        content` test): a link to "#grpcstatus" must not be considered satisfied
+        by a "#### GrpcStatusFilter" heading, and "#authorization" must not be
+        satisfied by "#### AuthorizationRequest".
+        """
+        return {name for name, _, _ in self.links if name not in self.headings}
+
+
+def is_enterprise_source(dir_path: Path) -> bool:
+    """Check if directory is from enterprise repo (contains 'enterprise' in path)."""
+    return "enterprise" in str(dir_path).lower()
+
+
+def append_shared_types(content: str, shared_dir: Path, source_dirs: list[Path] = (),
+                        cache_dir: Path | None = None, jobs: int | None = None) -> str:
+    """Return content with documentation appended for every type it links to
+    but does not document, parsed from the Go files in shared_dir and
+    source_dirs. cache_dir and jobs are passed on to parse_go_files.
+
+    This is the library entry point used by generate-ref-docs.py, which builds
+    the API reference in memory; main() wraps it for command-line use.
+    """
+    # Collect the Go files in the shared directory and the additional source
+    # directories, skipping generated files
+    go_files = []  # (path, source, is_enterprise)
+    for source_dir, source in [(shared_dir, "shared")] + [(d, d.name) for d in source_dirs]:
         if source_dir.exists():
-            dir_name = source_dir.name
             is_ent = is_enterprise_source(source_dir)
-            for go_file in source_dir.glob("*.go"):
-                if go_file.name.startswith("zz_generated"):
-                    continue
-                types = parse_go_file(go_file, source=dir_name, is_enterprise=is_ent)
-                all_types.extend(types)
-                if types:
-                    print(f"Parsed {dir_name}/{go_file.name}: found {len(types)} types")
+            go_files += [(go_file, source, is_ent) for go_file in source_dir.glob("*.go")
+                         if not go_file.name.startswith("zz_generated")]
+    
+    all_types = []
+    parsed = parse_go_files([go_file for go_file, _, _ in go_files], cache_dir, jobs)
+    for (go_file, source, is_ent), types in zip(go_files, parsed):
+        types = [replace(t, source=source, is_enterprise=is_ent) for t in types]
+        all_types.extend(types)
+        if types or source == "shared":
+            print(f"Parsed {source}/{go_file.name}: found {len(types)} types")
     
     # Find all broken links in the document
-    broken_links = find_all_broken_links(doc_file)
+    doc_index = DocIndex(content)
+    broken_links = doc_index.broken_links()
     print(f"Found {len(broken_links)} broken links: {broken_links}")
     
     # Find which types we can document
@@ -474,19 +700,15 @@ def main():
         remaining = broken_links - type_names
         if remaining:
             print(f"Warning: These broken links could not be resolved: {remaining}")
-        sys.exit(0)
+        return content
     
-    # Build set of types already documented in the file (from crd-ref-docs output)
-    existing_doc_types = find_documented_types(doc_file)
+    # Build set of types already documented in the content (from crd-ref-docs output)
+    existing_doc_types = doc_index.documented_types()
     print(f"Existing documented types: {len(existing_doc_types)}")
 
     # Generate markdown for referenced types
     markdown = generate_markdown(all_types, referenced, existing_doc_types)
     
-    # Append to doc file
-    with open(doc_file, "a", encoding="utf-8") as f:
-        f.write(markdown)
-    
     print(f"Successfully appended documentation for {len(referenced)} types")
     
     # Report any remaining broken links
@@ -494,6 +716,37 @@ def main():
     if remaining:
         print(f"Warning: These broken links could not be resolved: {remaining}")
 
+    return content + markdown
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: generate-shared-types.py <shared_dir> <doc_file> [source_dir...]")
+        print("  shared_dir: Directory containing shared Go types")
+        print("  doc_file: Markdown file to append documentation to")
+        print("  source_dir: Additional source directories to parse for types")
+        sys.exit(1)
+    
+    shared_dir = Path(sys.argv[1])
+    doc_file = Path(sys.argv[2])
+    source_dirs = [Path(d) for d in sys.argv[3:]] if len(sys.argv) > 3 else []
+    
+    if not doc_file.exists():
+        print(f"Doc file not found: {doc_file}")
+        sys.exit(0)
+    
+    # Share the parse cache with generate-ref-docs.py when it runs us
+    cache_root = os.environ.get("REF_DOCS_CACHE_DIR")
+    cache_dir = Path(cache_root) / "go-parse" if cache_root else None
+    
+    content = doc_file.read_text(encoding="utf-8")
+    updated = append_shared_types(content, shared_dir, source_dirs, cache_dir)
+    
+    # Append to doc file
+    if updated != content:
+        with open(doc_file, "a", encoding="utf-8") as f:
+            f.write(updated[len(content):])
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,26 @@
+'''Import the dashed scripts in this directory, such as generate-shared-types.py, as modules.
+
+The scripts import this file by name, so scripts/ must be on sys.path. It
+is when a script is run directly; the test and benchmark suites add it.
+'''
+
+import importlib.util
+import os
+import sys
+
+
+def import_script(filename):
+    '''Import a sibling script such as generate-shared-types.py as a module.
+
+    The dash in the filename rules out a normal import statement. The module
+    is registered in sys.modules, both to import it once and so process-pool
+    workers can unpickle its functions by name.
+    '''
+    name = filename[:-len('.py')].replace('-', '_')
+    if name not in sys.modules:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
@@ -1,4 +1,5 @@
 import importlib.util
+import sys
 from pathlib import Path
 
 import pytest
@@ -6,6 +7,8 @@ import pytest
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 SCRIPTS_DIR = REPO_ROOT / "scripts"
+# The scripts import script_modules.py from their own directory
+sys.path.insert(0, str(SCRIPTS_DIR))
 
 
 def load_script_module(filename: str, module_name: str):
@@ -25,3 +28,18 @@ def gen_ref_docs():
 @pytest.fixture
 def gen_shared_types():
     return load_script_module("generate-shared-types.py", "generate_shared_types")
+
+
+@pytest.fixture
+def gen_helm_docs():
+    return load_script_module("generate-helm-docs.py", "generate_helm_docs")
+
+
+@pytest.fixture
+def type_db():
+    return load_script_module("type-db.py", "type_db")
+
+
+@pytest.fixture
+def offline_kit():
+    return load_script_module("tests/offline/kit.py", "offline_kit")
@@ -0,0 +1,87 @@
+'''Refresh the helm-docs parity fixtures from the real kgateway charts.
+
+For each version in versions.json (or each version given), checks out the
+version's kgateway branch with only the charts generate-ref-docs.py
+documents, and runs helm-docs --dry-run on each chart at the version the
+docs pipeline pinned before it rendered the pages itself. Writes, next to
+this file:
+
+    <version>/<chart>/values.yaml   the chart's values, as checked out
+    <version>/<chart>/helm-docs.md  the helm-docs output for the chart
+    <version>/source.json           the branch, commit and helm-docs module
+
+test_generate_helm_docs.py checks that generate-helm-docs.py renders every
+values.yaml here to the page the old pipeline made from its helm-docs.md.
+Run it from anywhere; it needs network access and Go:
+
+    python3 scripts/tests/helm-docs/refresh.py [version ...]
+
+Set KGATEWAY_REPO_URL to read the charts from a fork or a local mirror.
+'''
+
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = FIXTURES_DIR.parents[1]
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from script_modules import import_script
+
+# The helm-docs that generate-ref-docs.py ran, and whose output the
+# published pages were made from
+HELM_DOCS_MODULE = 'github.com/norwoodj/helm-docs/cmd/helm-docs@v1.14.2'
+
+
+def refresh_version(gen_ref_docs, version_info, refs, work_dir):
+    '''Replace the fixtures of one version with its charts and their helm-docs output'''
+    version = version_info['version']
+    ref = gen_ref_docs.resolve_branch_for_version(version, version_info['linkVersion'], refs)
+    if not ref:
+        print(f'Skipping {version}: no branch')
+        return
+    checkout = str(Path(work_dir) / f'kgateway-{version}')
+    try:
+        gen_ref_docs.clone_repository(ref, checkout, sparse=gen_ref_docs.STAGE_SPARSE_PATTERNS['helm docs'])
+    except subprocess.CalledProcessError as e:
+        print(f'Skipping {version}: could not check out {ref}: {e}')
+        return
+    commit = subprocess.run(['git', '-C', checkout, 'rev-parse', 'HEAD'], check=True,
+                            capture_output=True, text=True).stdout.strip()
+
+    version_dir = FIXTURES_DIR / version
+    shutil.rmtree(version_dir, ignore_errors=True)
+    for chart in gen_ref_docs.HELM_CHARTS:
+        dir_name = chart.split(':')[0]
+        chart_dir = Path(checkout) / 'install' / 'helm' / dir_name
+        if not chart_dir.exists():
+            continue
+        output = subprocess.run(['go', 'run', HELM_DOCS_MODULE, f'--chart-search-root={chart_dir}', '--dry-run'],
+                                check=True, capture_output=True, text=True).stdout
+        target = version_dir / dir_name
+        target.mkdir(parents=True)
+        (target / 'helm-docs.md').write_text(output, encoding='utf-8')
+        if (chart_dir / 'values.yaml').exists():
+            shutil.copyfile(chart_dir / 'values.yaml', target / 'values.yaml')
+    (version_dir / 'source.json').write_text(json.dumps(
+        {'ref': ref, 'commit': commit, 'helm_docs': HELM_DOCS_MODULE}, indent=2) + '\n', encoding='utf-8')
+    print(f'Refreshed {version} from {ref} at {commit[:12]}')
+
+
+def main(argv):
+    gen_ref_docs = import_script('generate-ref-docs.py')
+    versions = json.loads((SCRIPTS_DIR.parent / 'versions.json').read_text(encoding='utf-8'))
+    if argv[1:]:
+        versions = [v for v in versions if v['version'] in argv[1:]]
+    refs = gen_ref_docs.list_remote_refs()
+    with tempfile.TemporaryDirectory() as work_dir:
+        for version_info in versions:
+            refresh_version(gen_ref_docs, version_info, refs, work_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,248 @@
+'''Offline fixture kit for running generate-ref-docs.py end to end.
+
+make_repo builds a local bare stand-in for the kgateway repository, with a
+branch per version (main, v2.2.x, ...) and release tags. It includes just
+enough of the tree for every stage: api/v1alpha1 (split into shared/ and
+kgateway/ from 2.2.x, flat before), both Helm charts and
+pkg/metrics, plus files no stage reads (README.md, test/e2e/, Go test
+files), which a --sparse checkout leaves out. Like GitHub, it serves
+partial clones. make_docs_root builds a docs root with
+versions.json and the generator's config files. tool_commands points
+crd-ref-docs and findmetrics at the stubs in tools/, which print the
+recorded outputs in recorded/; the Helm pages are rendered in-process from
+the kit's values.yaml. Together they run the whole multi-version
+pipeline with no network and no Go toolchain:
+
+    argv = pipeline_args(make_repo(tmp / 'repo'), tmp / 'cache')
+    os.chdir(make_docs_root(tmp / 'docs'))
+    generate_ref_docs.main(argv)
+
+Commits have fixed authors and dates, so the same kit always has the same
+commit SHAs.
+'''
+
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+KIT_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = KIT_DIR.parents[1]
+
+VERSIONS = [
+    {'version': '2.3.x', 'linkVersion': 'main', 'url': 'main'},
+    {'version': '2.2.x', 'linkVersion': 'latest', 'url': 'latest'},
+    {'version': '2.1.x', 'linkVersion': '2.1.x', 'url': '2.1.x'},
+]
+
+GIT_ENV = {
+    'GIT_CONFIG_GLOBAL': os.devnull,
+    'GIT_CONFIG_NOSYSTEM': '1',
+    'GIT_AUTHOR_NAME': 'kit',
+    'GIT_AUTHOR_EMAIL': 'kit@example.com',
+    'GIT_AUTHOR_DATE': '2025-01-01T00:00:00Z',
+    'GIT_COMMITTER_NAME': 'kit',
+    'GIT_COMMITTER_EMAIL': 'kit@example.com',
+    'GIT_COMMITTER_DATE': '2025-01-01T00:00:00Z',
+}
+
+SHARED_GO = '''package shared
+
+// CELExpression represents a Common Expression Language (CEL) expression.
+// +kubebuilder:validation:MinLength=1
+type CELExpression string
+
+// HeaderModifiers can be used to define the policy to modify request and
+// response headers.
+type HeaderModifiers struct {
+	// Request modifies request headers.
+	// +optional
+	Request *HTTPHeaderFilter `json:"request,omitempty"`
+
+	// Response modifies response headers.
+	// +optional
+	Response *HTTPHeaderFilter `json:"response,omitempty"`
+}
+'''
+
+TRAFFIC_POLICY_GO = '''package v1alpha1
+
+// TrafficPolicy applies traffic settings to routes and gateways.
+type TrafficPolicy struct {
+	Spec TrafficPolicySpec `json:"spec"`
+}
+
+// TrafficPolicySpec defines the desired state of a TrafficPolicy.
+type TrafficPolicySpec struct {
+	// match selects the requests this policy applies to.
+	// +optional
+	Match *RouteMatch `json:"match,omitempty"`
+}
+
+// RouteMatch selects the requests a TrafficPolicy applies to.
+type RouteMatch struct {
+	// matchExpressions must all be true for the rule to match.
+	MatchExpressions []CELExpression `json:"matchExpressions"`
+}
+'''
+
+VALUES_YAML = '''controller:
+  # -- Set the log level for the controller.
+  logLevel: info
+  # -- Set the number of controller pod replicas.
+  replicaCount: 1
+
+# -- List of namespace selectors. For more information, see the docs
+# https://kgateway.dev/docs/latest/install/advanced/#namespace-discovery.
+discoveryNamespaceSelectors: []
+
+image:
+  # -- Set the default image registry.
+  registry: cr.kgateway.dev/kgateway-dev
+'''
+
+FINDMETRICS_GO = '''package main
+
+func main() {}
+'''
+
+
+def is_split_api(version):
+    '''Whether a kit version uses the 2.2.x+ split api/v1alpha1 layout.'''
+    major, minor = (int(n) for n in version.split('.')[:2])
+    return (major, minor) >= (2, 2)
+
+
+def branch_for(version_info):
+    '''The branch generate-ref-docs.py resolves for a versions.json entry.'''
+    return 'main' if version_info['linkVersion'] == 'main' else f'v{version_info["version"]}'
+
+
+def tags_for(version_info):
+    '''Release tags of a version family: (name, annotated) pairs.
+
+    The main branch only gets a prerelease, so release triggers have no
+    stable tag to resolve for it; other families get an annotated .0, a
+    lightweight .1 and a prerelease that must be ignored.
+    '''
+    family = version_info['version'][:-len('.x')]
+    if version_info['linkVersion'] == 'main':
+        return [(f'v{family}.0-beta.1', False)]
+    return [(f'v{family}.0', True), (f'v{family}.1', False), (f'v{family}.2-rc.1', False)]
+
+
+def checkout_files(version):
+    '''{relative path: content} of the stand-in kgateway tree for a version.'''
+    if is_split_api(version):
+        files = {
+            'api/v1alpha1/shared/types.go': SHARED_GO,
+            'api/v1alpha1/kgateway/traffic_policy.go': TRAFFIC_POLICY_GO,
+        }
+    else:
+        files = {
+            'api/v1alpha1/types.go': SHARED_GO.replace('package shared', 'package v1alpha1'),
+            'api/v1alpha1/traffic_policy.go': TRAFFIC_POLICY_GO,
+        }
+    files.update({
+        'install/helm/kgateway/Chart.yaml': f'name: kgateway\nversion: {version}\n',
+        'install/helm/kgateway/values.yaml': VALUES_YAML,
+        'install/helm/kgateway-crds/Chart.yaml': f'name: kgateway-crds\nversion: {version}\n',
+        'pkg/metrics/cmd/findmetrics/main.go': FINDMETRICS_GO,
+        'pkg/metrics/metrics.go': 'package metrics\n',
+        'pkg/metrics/metrics_test.go': 'package metrics_test\n',
+        'go.mod': 'module github.com/kgateway-dev/kgateway/v2\n\ngo 1.24\n',
+        'README.md': f'# kgateway {version}\n',
+        'test/e2e/testdata/gateway.yaml': 'kind: Gateway\n',
+        'test/e2e/gateway_test.go': 'package e2e\n',
+        'VERSION': f'{version}\n',
+    })
+    return files
+
+
+def _git(*args, cwd=None):
+    subprocess.run(['git', *args], cwd=cwd, env={**os.environ, **GIT_ENV}, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _write_files(root, files):
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding='utf-8')
+
+
+def make_repo(path, versions=VERSIONS):
+    '''Build the bare stand-in repository at path and return its file:// URL.
+
+    file:// (rather than a plain path) keeps `git clone --depth 1` shallow,
+    as it is against GitHub.
+    '''
+    path = Path(path).resolve()
+    with tempfile.TemporaryDirectory(prefix='kgateway-kit-') as work:
+        work = Path(work)
+        _git('init', '-q', '-b', 'main', str(work))
+        for version_info in versions:
+            version = version_info['version']
+            _git('checkout', '-q', '--orphan', branch_for(version_info), cwd=work)
+            _git('rm', '-rfq', '--ignore-unmatch', '.', cwd=work)
+            _write_files(work, checkout_files(version))
+            _git('add', '-A', cwd=work)
+            _git('commit', '-q', '-m', f'kgateway {version}', cwd=work)
+            for tag, annotated in tags_for(version_info):
+                _git('tag', *(['-a', '-m', tag] if annotated else []), tag, cwd=work)
+        shutil.rmtree(path, ignore_errors=True)
+        _git('clone', '-q', '--bare', str(work), str(path))
+    _git('symbolic-ref', 'HEAD', 'refs/heads/main', cwd=path)
+    _git('config', 'uploadpack.allowFilter', 'true', cwd=path)
+    return path.as_uri()
+
+
+def push_change(repo_url, branch, files, message='Update docs inputs'):
+    '''Commit {relative path: content} on top of branch in the kit repository.
+
+    Returns the new commit SHA, which invalidates that version's generation
+    cache entry.
+    '''
+    with tempfile.TemporaryDirectory(prefix='kgateway-kit-') as work:
+        _git('clone', '-q', '--branch', branch, repo_url, work)
+        _write_files(Path(work), files)
+        _git('add', '-A', cwd=work)
+        _git('commit', '-q', '-m', message, cwd=work)
+        _git('push', '-q', 'origin', branch, cwd=work)
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=work, capture_output=True, text=True,
+                              check=True).stdout.strip()
+
+
+def make_docs_root(path, versions=VERSIONS):
+    '''Build a docs root that generate-ref-docs.py can run in; returns its path.
+
+    It has versions.json and copies of the generator's scripts/ inputs, so
+    the generation cache key covers the same files as in the real repo.
+    '''
+    path = Path(path).resolve()
+    (path / 'scripts').mkdir(parents=True, exist_ok=True)
+    for name in ('crd-ref-docs-config.yaml', 'link-fixups.json', 'generate-ref-docs.py',
+                 'generate-helm-docs.py', 'generate-shared-types.py', 'type-db.py'):
+        shutil.copy(SCRIPTS_DIR / name, path / 'scripts' / name)
+    (path / 'versions.json').write_text(json.dumps(versions), encoding='utf-8')
+    return path
+
+
+def tool_commands():
+    '''{tool name: command line} running each doc tool's stub.'''
+    return {
+        name: shlex.join([sys.executable, str(KIT_DIR / 'tools' / f'{name}.py')])
+        for name in ('crd-ref-docs', 'findmetrics')
+    }
+
+
+def pipeline_args(repo_url, cache_dir, *extra):
+    '''generate-ref-docs.py arguments for an offline run against the kit.'''
+    args = ['--repo-url', repo_url, '--cache-dir', str(cache_dir), '--ref-cache-ttl', '0']
+    for name, command in tool_commands().items():
+        args += ['--tool', f'{name}={command}']
+    return [*args, *extra]
@@ -0,0 +1,25 @@
+'''Offline stand-in for crd-ref-docs: writes the recorded markdown output.
+
+Accepts the flags generate-ref-docs.py passes and, like the real tool, fails
+when --source-path or --config does not exist.
+'''
+
+import sys
+from pathlib import Path
+
+RECORDED = Path(__file__).resolve().parent.parent / 'recorded' / 'crd-ref-docs.md'
+
+
+def main(argv):
+    flags = dict(arg[2:].split('=', 1) for arg in argv if arg.startswith('--') and '=' in arg)
+    for flag in ('source-path', 'config'):
+        if not Path(flags.get(flag, '')).exists():
+            sys.exit(f'crd-ref-docs: --{flag} {flags.get(flag)!r} does not exist')
+    output = Path(flags['output-path'])
+    if output.is_dir():
+        output = output / 'out.md'
+    output.write_text(RECORDED.read_text(encoding='utf-8'), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
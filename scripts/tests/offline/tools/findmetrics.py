@@ -0,0 +1,19 @@
+'''Offline stand-in for `go run ./pkg/metrics/cmd/findmetrics --markdown DIR`.
+
+Prints the recorded metrics table once DIR is a checkout with pkg/metrics.
+'''
+
+import sys
+from pathlib import Path
+
+RECORDED = Path(__file__).resolve().parent.parent / 'recorded' / 'findmetrics.md'
+
+
+def main(argv):
+    if argv[:1] != ['--markdown'] or len(argv) != 2 or not (Path(argv[1]) / 'pkg' / 'metrics').is_dir():
+        sys.exit(f'findmetrics: expected --markdown <kgateway checkout>, got {argv}')
+    sys.stdout.write(RECORDED.read_text(encoding='utf-8'))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,158 @@
+from pathlib import Path
+
+import pytest
+
+
+# Real chart values.yaml files and their helm-docs output, per version and
+# chart, written by helm-docs/refresh.py
+HELM_DOCS_FIXTURES = Path(__file__).resolve().parent / "helm-docs"
+FIXTURE_CHARTS = sorted(output.parent for output in HELM_DOCS_FIXTURES.glob("*/*/helm-docs.md"))
+
+
+def test_values_rows_follow_helm_docs_comments(gen_helm_docs):
+    values = "\n".join(
+        [
+            "# -- Set the log level.",
+            "#    Use debug to troubleshoot.",
+            "logLevel: info",
+            "image:",
+            "  # -- (string) Image tag; defaults to the chart version.",
+            "  # @default -- the chart appVersion",
+            "  tag:",
+            "  registry: cr.kgateway.dev",
+            "",
+            "# -- Extra labels <applied> & kept.",
+            "labels: {}",
+            'html: "<b>"',
+            "ratio: 1.0",
+            "tiny: 1.0e-7",
+            "enabled: yes",
+            "# @ignored",
+            "internal:",
+            "  secret: x",
+            "tolerations:",
+            "  - key: a",
+            "# -- Documented parent.",
+            "service:",
+            "  port: 80",
+            "  # -- Service type.",
+            "  type: ClusterIP",
+            "# Not a description, and separated from the key below.",
+            "",
+            "undocumented: null",
+        ]
+    )
+
+    rows = [(r.key, r.type, r.description, r.default) for r in gen_helm_docs.values_rows(values)]
+    assert rows == [
+        ("enabled", "string", "", '`"yes"`'),
+        ("html", "string", "", '`"\\u003cb\\u003e"`'),
+        ("image.registry", "string", "", '`"cr.kgateway.dev"`'),
+        ("image.tag", "string", "Image tag; defaults to the chart version.", "the chart appVersion"),
+        ("labels", "object", "Extra labels <applied> & kept.", "`{}`"),
+        ("logLevel", "string", "Set the log level.    Use debug to troubleshoot.", '`"info"`'),
+        ("ratio", "float", "", "`1`"),
+        ("service", "object", "Documented parent.", '`{"port":80,"type":"ClusterIP"}`'),
+        ("service.type", "string", "Service type.", '`"ClusterIP"`'),
+        ("tiny", "float", "", "`1e-7`"),
+        ("tolerations[0].key", "string", "", '`"a"`'),
+        ("undocumented", "string", "", "`nil`"),
+    ]
+
+
+def test_flow_collection_keys_do_not_take_the_comment_of_their_line(gen_helm_docs):
+    rows = gen_helm_docs.values_rows("# -- Ports.\nports: {grpc: 9977}\nother: {grpc: 1}\n")
+    assert [(r.key, r.description) for r in rows] == [("other.grpc", ""), ("ports", "Ports.")]
+
+
+def test_description_given_by_key_overrides_the_comment_above(gen_helm_docs):
+    values = "# controller.image -- Image settings.\n\ncontroller:\n  # -- Ignored.\n  image: {}\n"
+    (row,) = gen_helm_docs.values_rows(values)
+    assert (row.key, row.description) == ("controller.image", "Image settings.")
+
+
+def test_double_dashes_inside_a_description_do_not_start_a_new_one(gen_helm_docs):
+    values = "\n".join(
+        [
+            "# -- Extra flags, for example",
+            "# use --log-format=json or pass foo--bar through.",
+            "extraArgs: []",
+            "#-- Needs a space after the hash.",
+            "noSpace: 1",
+        ]
+    )
+    rows = [(r.key, r.description) for r in gen_helm_docs.values_rows(values)]
+    assert rows == [
+        ("extraArgs", "Extra flags, for example use --log-format=json or pass foo--bar through."),
+        ("noSpace", ""),
+    ]
+
+
+def test_chart_without_values_renders_the_no_values_callout(gen_helm_docs, tmp_path):
+    assert gen_helm_docs.render_chart_page(tmp_path) == gen_helm_docs.NO_VALUES_PAGE
+    (tmp_path / "values.yaml").write_text("# Nothing to configure.\n")
+    assert gen_helm_docs.render_chart_page(tmp_path) == gen_helm_docs.NO_VALUES_PAGE
+
+
+def _published_layout(helm_docs_output, no_values_page):
+    '''The page generate-ref-docs.py made from helm-docs output before it
+    rendered pages itself, less the link fix-ups: the badge line and the
+    title block removed, the no-values callout added to a chart without a
+    values table, and the Default and Description columns swapped.'''
+    lines = helm_docs_output.splitlines(keepends=True)
+    badge = next((i for i, line in enumerate(lines) if "![Version:" in line), None)
+    if badge is not None:
+        end = next((i for i in range(badge + 1, len(lines)) if not lines[i].strip("\n")), len(lines))
+        del lines[badge:end + 1]
+    content = "".join(lines[3:]).replace("{{< callout type=info >}}", '{{< callout type="info" >}}')
+    if ("## Values" not in content or "|-----|" not in content) and "{{< callout" not in content:
+        content = content.rstrip() + no_values_page + "\n"
+
+    swapped, in_table = [], False
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("| Key ") and "Default" in line and "Description" in line:
+            in_table = True
+            swapped.append("| Key | Type | Description | Default |")
+        elif in_table and stripped.startswith("|-----"):
+            swapped.append("|-----|------|-------------|---------|")
+        elif in_table and stripped.startswith("|") and len(line.split("|")) >= 6:
+            key, value_type, default, description = (part.strip() for part in line.split("|")[1:5])
+            swapped.append(f"| {key} | {value_type} | {description} | {default} |")
+        else:
+            in_table = in_table and stripped.startswith("|")
+            swapped.append(line)
+    return "\n".join(swapped)
+
+
+def test_published_layout_matches_the_old_pipeline(gen_helm_docs):
+    helm_docs_output = (
+        "# kgateway\n\n"
+        "![Version: 1.0.0](https://img.shields.io/badge/Version-1.0.0-informational?style=flat-square)\n\n"
+        "A Helm chart for the kgateway control plane.\n\n"
+        "## Values\n\n"
+        "| Key | Type | Default | Description |\n"
+        "|-----|------|---------|-------------|\n"
+        "| logLevel | string | `\"info\"` | Set the log level. |\n"
+        "| tolerations | list | `[]` |  |\n\n"
+    )
+    assert _published_layout(helm_docs_output, gen_helm_docs.NO_VALUES_PAGE) == (
+        "\n## Values\n\n"
+        "| Key | Type | Description | Default |\n"
+        "|-----|------|-------------|---------|\n"
+        "| logLevel | string | Set the log level. | `\"info\"` |\n"
+        "| tolerations | list |  | `[]` |\n"
+    )
+    no_values = "# kgateway-crds\n\n![Version: 1.0.0](https://img.shields.io/badge/x)\n\nCRDs.\n\n"
+    assert _published_layout(no_values, gen_helm_docs.NO_VALUES_PAGE) == gen_helm_docs.NO_VALUES_PAGE
+
+
+@pytest.mark.parametrize("chart", FIXTURE_CHARTS, ids=lambda p: f"{p.parent.name}/{p.name}")
+def test_renderer_matches_real_helm_docs_output(gen_helm_docs, chart):
+    '''Parity with helm-docs itself: a real chart's values.yaml must render to
+    the page the old pipeline made from helm-docs' output for it, byte for
+    byte. Run helm-docs/refresh.py to add or update the charts.'''
+    values_file = chart / "values.yaml"
+    values = values_file.read_text(encoding="utf-8") if values_file.exists() else ""
+    expected = _published_layout((chart / "helm-docs.md").read_text(encoding="utf-8"), gen_helm_docs.NO_VALUES_PAGE)
+    assert gen_helm_docs.render_values_page(gen_helm_docs.values_rows(values)) == expected
@@ -1,5 +1,15 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
 from types import SimpleNamespace
 
+import pytest
+
 
 def test_is_version_2_2_or_later(gen_ref_docs):
     assert gen_ref_docs.is_version_2_2_or_later("main") is True
@@ -37,6 +47,52 @@ def test_extract_package_section_returns_none_when_missing(gen_ref_docs):
     assert gen_ref_docs.extract_package_section(content, "missing.package/v1alpha1") is None
 
 
+def test_split_package_sections_returns_every_package_with_its_list_entry(gen_ref_docs):
+    content = "\n".join(
+        [
+            "# API Reference",
+            "## Packages",
+            "- [gateway.kgateway.dev/v1alpha1](#gatewaykgatewaydevv1alpha1)",
+            "- [agentgateway.dev/v1alpha1](#agentgatewaydevv1alpha1)",
+            "",
+            "## gateway.kgateway.dev/v1alpha1",
+            "Gateway package docs",
+            "",
+            "## agentgateway.dev/v1alpha1",
+            "Agent package docs",
+            "## unlisted.package/v1",
+            "Not in the Packages list",
+        ]
+    )
+    sections = gen_ref_docs.split_package_sections(content)
+
+    assert sections == {
+        "gateway.kgateway.dev/v1alpha1": "\n".join(
+            [
+                "## Packages",
+                "- [gateway.kgateway.dev/v1alpha1](#gatewaykgatewaydevv1alpha1)",
+                "",
+                "## gateway.kgateway.dev/v1alpha1",
+                "Gateway package docs",
+                "",
+            ]
+        ),
+        "agentgateway.dev/v1alpha1": "\n".join(
+            [
+                "## Packages",
+                "- [agentgateway.dev/v1alpha1](#agentgatewaydevv1alpha1)",
+                "",
+                "## agentgateway.dev/v1alpha1",
+                "Agent package docs",
+            ]
+        ),
+    }
+    assert gen_ref_docs.extract_package_section(content, "agentgateway.dev/v1alpha1") == sections[
+        "agentgateway.dev/v1alpha1"
+    ]
+    assert gen_ref_docs.split_package_sections("## gateway.kgateway.dev/v1alpha1\n") == {}
+
+
 def test_resolve_branch_for_version(gen_ref_docs, monkeypatch):
     calls = []
 
@@ -70,10 +126,84 @@ def test_resolve_tag_for_version_filters_rc_beta_and_returns_latest(gen_ref_docs
     assert resolved == "v2.2.5"
 
 
-def test_generate_shared_types_invokes_script_when_shared_exists(gen_ref_docs, monkeypatch, tmp_path):
-    api_file = tmp_path / "api.md"
-    api_file.write_text("api", encoding="utf-8")
+def test_build_tag_index_groups_stable_tags_by_family(gen_ref_docs):
+    refs = gen_ref_docs._parse_ls_remote(
+        "\n".join(
+            [
+                "aaa\trefs/heads/main",
+                "bbb\trefs/heads/v2.2.x",
+                "t10\trefs/tags/v2.2.10",
+                "c10\trefs/tags/v2.2.10^{}",
+                "c9\trefs/tags/v2.2.9",
+                "rc\trefs/tags/v2.2.11-rc1",
+                "agw\trefs/tags/v2.2.11-agw",
+                "c1\trefs/tags/v2.1.3",
+            ]
+        )
+    )
+
+    index = gen_ref_docs.build_tag_index(refs)
+
+    # Semver order, not string order: v2.2.10 is newer than v2.2.9.
+    assert index["2.2.x"] == ["v2.2.10", "v2.2.9"]
+    assert index["2.1.x"] == ["v2.1.3"]
+    # Annotated tags resolve to the peeled commit, not the tag object.
+    assert gen_ref_docs.commit_for_ref("v2.2.10", refs) == "c10"
+    assert gen_ref_docs.commit_for_ref("v2.2.x", refs) == "bbb"
+    assert gen_ref_docs.resolve_tag_for_version("2.2.x", "latest", refs) == "v2.2.10"
+
+
+def test_list_remote_refs_reuses_fresh_cache(gen_ref_docs, monkeypatch, tmp_path):
+    calls = []
+
+    def fake_run(cmd, capture_output, text, check):
+        calls.append(cmd)
+        return SimpleNamespace(stdout="abc\trefs/heads/main\n")
+
+    monkeypatch.setattr(gen_ref_docs.subprocess, "run", fake_run)
+    cache_file = str(tmp_path / "refs.json")
+
+    first = gen_ref_docs.list_remote_refs("file:///repo", cache_file=cache_file, ttl=600)
+    second = gen_ref_docs.list_remote_refs("file:///repo", cache_file=cache_file, ttl=600)
+    assert first == {"heads": {"main": "abc"}, "tags": {}}
+    assert second == {**first, "from_cache": True}
+    assert len(calls) == 1, "a fresh cache must skip the network"
+
+    gen_ref_docs.list_remote_refs("file:///other", cache_file=cache_file, ttl=600)
+    gen_ref_docs.list_remote_refs("file:///other", cache_file=cache_file, ttl=0)
+    assert len(calls) == 3, "a different repo URL or ttl=0 must list the remote again"
+
 
+def test_live_commit_for_ref_lists_only_that_ref(gen_ref_docs, monkeypatch):
+    calls = []
+
+    def fake_run(cmd, capture_output, text, check):
+        calls.append(cmd)
+        return SimpleNamespace(stdout="tagobj\trefs/tags/v2.2.1\nc221\trefs/tags/v2.2.1^{}\n")
+
+    monkeypatch.setattr(gen_ref_docs.subprocess, "run", fake_run)
+
+    assert gen_ref_docs.live_commit_for_ref("v2.2.1", "file:///repo") == "c221"
+    assert calls == [["git", "ls-remote", "file:///repo", "refs/heads/v2.2.1", "refs/tags/v2.2.1",
+                      "refs/tags/v2.2.1^{}"]]
+
+
+@pytest.mark.parametrize("env, expected", [
+    ({}, 600),
+    ({"CI": "true"}, 0),
+    ({"GITHUB_EVENT_NAME": "release"}, 0),
+    ({"GITHUB_EVENT_NAME": "schedule"}, 600),
+    ({"CI": "true", "REF_DOCS_REF_CACHE_TTL": "30"}, 30),
+])
+def test_ref_cache_ttl_defaults_to_zero_in_ci_and_for_releases(gen_ref_docs, monkeypatch, env, expected):
+    for name in ["CI", "GITHUB_EVENT_NAME", "REF_DOCS_REF_CACHE_TTL"]:
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    assert gen_ref_docs.default_ref_cache_ttl() == expected
+
+
+def test_generate_shared_types_appends_in_process_when_shared_exists(gen_ref_docs, monkeypatch, tmp_path):
     kgateway_dir = tmp_path / "kgateway"
     shared_dir = kgateway_dir / "api" / "v1alpha1" / "shared"
     source_dir = kgateway_dir / "api" / "v1alpha1" / "kgateway"
@@ -82,16 +212,349 @@ def test_generate_shared_types_invokes_script_when_shared_exists(gen_ref_docs, m
 
     calls = []
 
-    def fake_run(cmd, check):
-        calls.append(cmd)
+    def fake_append(content, shared, sources, cache_dir=None):
+        calls.append((shared, sources))
+        return content + "appended"
+
+    shared_types = gen_ref_docs._shared_types_module()
+    monkeypatch.setattr(shared_types, "append_shared_types", fake_append)
+    monkeypatch.setattr(gen_ref_docs.subprocess, "run", None)  # no child interpreter
+
+    result = gen_ref_docs._generate_shared_types("api", kgateway_dir=str(kgateway_dir))
+
+    assert result == "apiappended"
+    assert calls == [(shared_dir, [source_dir])]
+
+
+def test_generate_shared_types_documents_linked_types(gen_ref_docs, tmp_path):
+    flat_dir = tmp_path / "kgateway" / "api" / "v1alpha1"
+    flat_dir.mkdir(parents=True)
+    (flat_dir / "status.go").write_text(
+        "package v1alpha1\n\n// PolicyStatus is the status of a policy.\ntype PolicyStatus struct {\n"
+        "\t// Ready reports readiness.\n\tReady bool `json:\"ready\"`\n}\n",
+        encoding="utf-8",
+    )
+    content = "| `status` | _[PolicyStatus](#policystatus)_ | | |\n"
+
+    result = gen_ref_docs._generate_shared_types(content, kgateway_dir=str(tmp_path / "kgateway"))
+
+    assert result.startswith(content)
+    assert "#### PolicyStatus" in result
+
+
+def test_render_api_doc_fixes_links_once_over_the_whole_page(gen_ref_docs, monkeypatch, capsys):
+    '''The shared types section is read straight from Go doc comments after
+    the post-processing pass, so the fix-ups run over the finished page, and
+    only there: a second pass would rewrite a new link that contains its old one.'''
+    monkeypatch.setattr(
+        gen_ref_docs,
+        "_LINK_FIXUPS_CACHE",
+        [{"old": "http://old.example/x", "new": "http://old.example/x/moved"}],
+    )
+    monkeypatch.setattr(
+        gen_ref_docs, "_generate_shared_types",
+        lambda content, kgateway_dir: content + "appended type doc: http://old.example/x\n",
+    )
+
+    page = gen_ref_docs._render_api_doc("## Packages\nsection doc: http://old.example/x\n", "kgateway")
+
+    assert page.startswith(gen_ref_docs.API_DOC_FRONT_MATTER)
+    assert "section doc: http://old.example/x/moved\n" in page
+    assert page.endswith("appended type doc: http://old.example/x/moved\n")
+    assert capsys.readouterr().out.count("Applied 2 link fixup(s)") == 1
+    assert gen_ref_docs._link_fixup_matcher().hit_counts() == {"http://old.example/x": 2}
+
+
+def test_process_version_isolated_groups_logs_and_uses_private_workspace(gen_ref_docs, monkeypatch):
+    '''Parallel workers must not share a clone dir, and child-process output
+    has to land in the same per-version log as Python prints.'''
+    workspaces = []
+
+    def fake_process_version(version_info, is_release_trigger, workspace=".", mirror_dir=None, refs=None,
+                             cache_dir=None):
+        workspaces.append(workspace)
+        print(f"python output for {version_info['version']}")
+        gen_ref_docs.subprocess.run(["echo", "child output"], check=True)
+        return 3
+
+    monkeypatch.setattr(gen_ref_docs, "process_version", fake_process_version)
+
+    result, failed, log, _, _, _ = gen_ref_docs._process_version_isolated({"version": "2.2.x"}, False)
+    _, _, other_log, _, _, _ = gen_ref_docs._process_version_isolated({"version": "2.1.x"}, False)
+
+    assert result == 3 and not failed
+    assert "python output for 2.2.x" in log
+    assert "child output" in log
+    assert "2.1.x" not in log and "python output for 2.1.x" in other_log
+    assert workspaces[0] != "." and workspaces[0] != workspaces[1]
+    assert not any(Path(w).exists() for w in workspaces), "workspaces must be cleaned up"
+
+
+def _git(*args, cwd=None):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def test_mirror_cache_checks_out_refs_as_worktrees(gen_ref_docs, tmp_path):
+    '''Cold mirror clone, warm fetch of a new commit, and a worktree per ref,
+    all against a local file:// upstream so no network is needed.'''
+    upstream = tmp_path / "upstream"
+    upstream.mkdir()
+    _git("init", "-q", "-b", "main", cwd=upstream)
+    _git("config", "user.email", "t@example.com", cwd=upstream)
+    _git("config", "user.name", "t", cwd=upstream)
+    (upstream / "VERSION").write_text("2.2.0\n")
+    _git("add", "VERSION", cwd=upstream)
+    _git("commit", "-qm", "v2.2.0", cwd=upstream)
+    _git("tag", "v2.2.0", cwd=upstream)
+
+    cache = tmp_path / "cache"
+    mirror = gen_ref_docs.ensure_mirror(str(cache), repo_url=upstream.as_uri())
+
+    (upstream / "VERSION").write_text("2.3.0\n")
+    _git("commit", "-qam", "main moves on", cwd=upstream)
+    assert gen_ref_docs.ensure_mirror(str(cache), repo_url=upstream.as_uri()) == mirror
+
+    tag_dir = tmp_path / "work-tag" / "kgateway"
+    main_dir = tmp_path / "work-main" / "kgateway"
+    gen_ref_docs.clone_repository("v2.2.0", str(tag_dir), mirror)
+    gen_ref_docs.clone_repository("main", str(main_dir), mirror)
+    assert (tag_dir / "VERSION").read_text() == "2.2.0\n"
+    assert (main_dir / "VERSION").read_text() == "2.3.0\n", "warm fetch must pick up new commits"
+
+    gen_ref_docs.remove_checkout(str(tag_dir), mirror)
+    gen_ref_docs.remove_checkout(str(main_dir), mirror)
+    assert not tag_dir.exists()
+    listing = subprocess.run(
+        ["git", "-C", mirror, "worktree", "list"], capture_output=True, text=True, check=True
+    ).stdout
+    assert str(tag_dir) not in listing and str(main_dir) not in listing
+
+
+def test_generation_cache_round_trip_and_key_inputs(gen_ref_docs, monkeypatch, tmp_path):
+    '''A matching key restores the stored outputs; any input change misses.'''
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "scripts").mkdir()
+    (tmp_path / "scripts" / "link-fixups.json").write_text('{"replacements": []}')
+    version_info = {"version": "2.1.x", "linkVersion": "2.1.x", "url": "2.1.x"}
+    cache_dir = str(tmp_path / "cache")
+
+    key = gen_ref_docs.generation_cache_key(version_info, "abc123")
+    assert key == gen_ref_docs.generation_cache_key(version_info, "abc123")
+    assert key != gen_ref_docs.generation_cache_key(version_info, "def456")
+    monkeypatch.setenv("KUBE_VERSION", "1.99")
+    assert key != gen_ref_docs.generation_cache_key(version_info, "abc123")
+    monkeypatch.delenv("KUBE_VERSION")
+    (tmp_path / "scripts" / "link-fixups.json").write_text('{"replacements": [{"old": "a", "new": "b"}]}')
+    assert key != gen_ref_docs.generation_cache_key(version_info, "abc123")
+
+    api_file = Path("content/docs/envoy/2.1.x/reference/api.md")
+    api_file.parent.mkdir(parents=True)
+    api_file.write_text("generated api")
+    assert gen_ref_docs.restore_generated(version_info, key, cache_dir) is None
+
+    gen_ref_docs.store_generated(version_info, key, cache_dir, [str(api_file)], 1)
+    api_file.write_text("stale")
+    assert gen_ref_docs.restore_generated(version_info, "other-key", cache_dir) is None
+    assert gen_ref_docs.restore_generated(version_info, key, cache_dir) == 1
+    assert api_file.read_text() == "generated api"
+
+
+def test_write_output_replaces_only_changed_files(gen_ref_docs, tmp_path):
+    page = tmp_path / "reference" / "api.md"
+
+    assert gen_ref_docs.write_output(str(page), "v1") is True
+    os.utime(page, ns=(1, 1))
+    assert gen_ref_docs.write_output(str(page), "v1") is False
+    assert page.stat().st_mtime_ns == 1, "an unchanged file must not be touched"
+    assert gen_ref_docs.write_output(str(page), "v2") is True
+    assert page.read_text() == "v2" and page.stat().st_mtime_ns != 1
+    assert [p.name for p in page.parent.iterdir()] == ["api.md"], "no temporary files are left behind"
+
+    outputs = gen_ref_docs.take_outputs()
+    assert outputs == {str(page): {"sha256": hashlib.sha256(b"v2").hexdigest(), "changed": True}}
+    assert gen_ref_docs.take_outputs() == {}
+
+    manifest = tmp_path / "manifest.json"
+    gen_ref_docs.write_output_manifest(str(manifest), outputs)
+    assert json.loads(manifest.read_text()) == {"files": outputs}
+
+
+def test_go_tool_binary_builds_once_per_module_and_go_version(gen_ref_docs, monkeypatch, tmp_path):
+    builds = []
+
+    def fake_run(cmd, check, capture_output=False, text=False, env=None):
+        if cmd[:2] == ["go", "env"]:
+            return SimpleNamespace(stdout="go1.24.0\nlinux\namd64\n")
+        assert cmd[:2] == ["go", "install"]
+        builds.append(cmd[2])
+        binary = Path(env["GOBIN"]) / "crd-ref-docs"
+        binary.write_text("#!/bin/sh\n")
         return SimpleNamespace(returncode=0)
 
     monkeypatch.setattr(gen_ref_docs.subprocess, "run", fake_run)
+    monkeypatch.setattr(gen_ref_docs, "_GO_ENV_CACHE", None)
+
+    first = gen_ref_docs.go_tool_binary("crd-ref-docs", str(tmp_path))
+    second = gen_ref_docs.go_tool_binary("crd-ref-docs", str(tmp_path))
+
+    assert first == second
+    assert builds == [gen_ref_docs.GO_TOOLS["crd-ref-docs"]]
+    assert "go1.24.0-linux-amd64" in first
+    assert "crd-ref-docs@v0.1.0" in first
+    # Only the final binary is left in the tool directory, no build leftovers.
+    assert [p.name for p in Path(first).parent.iterdir()] == ["crd-ref-docs"]
+
+
+def test_post_process_api_docs_applies_former_sed_edits_in_memory(gen_ref_docs):
+    content = (
+        gen_ref_docs.API_DOC_FRONT_MATTER
+        + "# API Reference\n\n## Packages\n\n"
+        + "| `a` | | | Required: {} <br /> |\n| `b` | | | Optional: {} <br /> |\n"
+    )
+    out = gen_ref_docs._post_process_api_docs(content)
+    assert out.startswith(gen_ref_docs.API_DOC_FRONT_MATTER + "## Packages\n")
+    assert "# API Reference" not in out
+    assert "Required: {}" not in out and "| Required <br /> |" in out
+    assert "Optional: {}" not in out and "| Optional <br /> |" in out
+
+
+def test_rule_stats_count_hits_per_named_rule(gen_ref_docs, capsys):
+    gen_ref_docs.enable_rule_stats()
+    content = (
+        "| `a` | _[uint32](#uint32)_ | | |\n"
+        "| `b` | _[uint64](#uint64)_ | | Optional <br />Enum: [HTTP1;HTTP2 |\n"
+    )
+    gen_ref_docs._post_process_api_docs(content)
+
+    report = capsys.readouterr().out
+    assert "Rule stats:" in report
+    stats = {line.split()[0]: line for line in report.splitlines()[2:]}
+    assert set(stats) == set(gen_ref_docs.API_DOC_RULES)
+    assert stats["uint-self-link"].split()[1] == "2"
+    assert stats["validation-incomplete-enum"].split()[1] == "1"
+    assert stats["struct-underlying-link"].endswith("(never fired)")
+    # Counters reset after each document is reported.
+    assert gen_ref_docs.API_DOC_RULES["uint-self-link"].hits == 0
+
+
+def test_rule_stats_count_every_hit_from_concurrent_stages(gen_ref_docs):
+    gen_ref_docs.enable_rule_stats()
+    rule = gen_ref_docs.API_DOC_RULES["uint-self-link"]
+    content = "| `a` | _[uint32](#uint32)_ | | |\n"
+
+    def apply():
+        for _ in range(2000):
+            rule(content)
+
+    threads = [threading.Thread(target=apply) for _ in range(4)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads often, so unlocked updates would be lost
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert rule.hits == 8000 and rule.seconds > 0
+    gen_ref_docs.enable_rule_stats()
+    assert (rule.hits, rule.seconds) == (0, 0.0)
+
+
+def test_trace_records_nested_spans_with_child_rusage(gen_ref_docs, tmp_path):
+    gen_ref_docs.enable_trace()
+    with gen_ref_docs.trace_span("api docs"):
+        gen_ref_docs.traced_run([sys.executable, "-c", "sum(range(3_000_000))"], check=True)
+    events = gen_ref_docs.take_trace_events()
+
+    child, stage = events  # A span is recorded when it ends
+    assert (stage["name"], stage["cat"], stage["ph"]) == ("api docs", "stage", "X")
+    assert child["cat"] == "subprocess" and child["args"]["cmd"].startswith(sys.executable)
+    assert stage["ts"] <= child["ts"] and child["ts"] + child["dur"] <= stage["ts"] + stage["dur"]
+    assert child["args"]["child_cpu_s"] > 0 and child["args"]["child_max_rss_kb"] > 0
+    assert gen_ref_docs.take_trace_events() == []
+
+    trace_file = tmp_path / "trace.json"
+    gen_ref_docs.write_trace(trace_file, events)
+    assert json.loads(trace_file.read_text())["traceEvents"] == events
+    summary = gen_ref_docs.format_trace_summary(events).splitlines()
+    assert summary[0].split()[:2] == ["stage", "count"]
+    assert summary[1].startswith("api docs") and " 1 " in summary[1]
+
+
+def test_version_stages_run_side_by_side_with_ordered_logs_and_isolated_errors(gen_ref_docs, capsys):
+    both_started = threading.Barrier(2, timeout=5)
+
+    def slow_stage(name):
+        def run():
+            print(f"{name} started")
+            both_started.wait()  # Times out unless the two stages overlap
+            print(f"{name} done")
+            return True
+        return run
+
+    def failing_stage():
+        print("metrics started")
+        raise RuntimeError("findmetrics exited 1")
+
+    stages = [("api docs", slow_stage("api")), ("helm docs", slow_stage("helm")), ("metrics docs", failing_stage)]
+    results = list(gen_ref_docs.run_version_stages(stages, jobs=2))
+
+    assert [(name, result, str(error) if error else None) for name, result, error, _ in results] == [
+        ("api docs", True, None),
+        ("helm docs", True, None),
+        ("metrics docs", None, "findmetrics exited 1"),
+    ]
+    assert [log for *_, log in results] == ["api started\napi done\n", "helm started\nhelm done\n",
+                                            "metrics started\n"]
+    assert capsys.readouterr().out == ""
+    assert not isinstance(sys.stdout, gen_ref_docs._StageLogs)
+
+
+def test_version_stages_capture_child_process_output_in_their_logs(gen_ref_docs, capfd):
+    def stage(name, check):
+        def run():
+            print(f"{name} started")
+            gen_ref_docs.traced_run([sys.executable, "-c", f"import sys; print('{name} out'); "
+                                     f"print('{name} err', file=sys.stderr); sys.exit({int(check)})"],
+                                    check=check)
+            captured = gen_ref_docs.traced_run([sys.executable, "-c", "print('kept')"],
+                                               capture_output=True, text=True)
+            return captured.stdout
+        return run
+
+    stages = [("api docs", stage("api", False)), ("metrics docs", stage("metrics", True))]
+    results = list(gen_ref_docs.run_version_stages(stages, jobs=2))
+
+    (_, api, api_error, api_log), (_, _, metrics_error, metrics_log) = results
+    assert (api, api_error) == ("kept\n", None)
+    assert api_log == "api started\napi out\napi err\n"
+    assert isinstance(metrics_error, subprocess.CalledProcessError)
+    assert metrics_log == "metrics started\nmetrics out\nmetrics err\n"
+    # Nothing reached the real stdout or stderr file descriptors
+    assert capfd.readouterr() == ("", "")
+
+
+def test_version_stages_respect_the_job_limit(gen_ref_docs):
+    running, peak = [], []
+    lock = threading.Lock()
+
+    def stage():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.pop()
+        return True
+
+    results = list(gen_ref_docs.run_version_stages([(f"stage {i}", stage) for i in range(4)], jobs=1))
+    assert [result for _, result, _, _ in results] == [True] * 4
+    assert max(peak) == 1
 
-    gen_ref_docs._generate_shared_types(str(api_file), kgateway_dir=str(kgateway_dir))
 
-    assert len(calls) == 1
-    assert calls[0][0:2] == ["python3", "scripts/generate-shared-types.py"]
-    assert calls[0][2] == str(shared_dir)
-    assert calls[0][3] == str(api_file)
-    assert calls[0][4] == str(source_dir)
+def test_command_name_keeps_the_git_or_go_subcommand(gen_ref_docs):
+    assert gen_ref_docs._command_name(["git", "-C", "/tmp/m", "worktree", "add", "x"]) == "git worktree"
+    assert gen_ref_docs._command_name(["go", "run", "main.go"]) == "go run"
+    assert gen_ref_docs._command_name(["/cache/tools/crd-ref-docs", "--renderer=markdown"]) == "crd-ref-docs"
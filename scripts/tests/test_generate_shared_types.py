@@ -1,5 +1,10 @@
+import dataclasses
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import pytest
+
 
 def test_extract_doc_comment_skips_kubebuilder_annotations(gen_shared_types):
     lines = [
@@ -61,6 +66,44 @@ def test_parse_go_file_extracts_struct_and_alias(gen_shared_types, tmp_path):
     assert alias_type.underlying_type == "string"
 
 
+def test_line_index_maps_offsets_to_lines(gen_shared_types):
+    content = "ab\n\ncd\n"
+    index = gen_shared_types.LineIndex(content)
+    assert [index.line_of(pos) for pos in range(len(content) + 1)] == [0, 0, 0, 1, 2, 2, 2, 3]
+
+
+def test_parse_go_file_reads_each_field_comment_from_its_own_line(gen_shared_types, tmp_path):
+    '''A field named like one in an earlier nested struct must still get its
+    own doc comment.'''
+    go_file = tmp_path / "types.go"
+    go_file.write_text(
+        "\n".join(
+            [
+                "package shared",
+                "",
+                "type Outer struct {",
+                "    Inner struct {",
+                "        // Name of the inner thing.",
+                '        Name string `json:"name"`',
+                '    } `json:"inner"`',
+                "",
+                "    // Name of the outer thing.",
+                "    // +kubebuilder:validation:MinLength=1",
+                '    Name string `json:"name"`',
+                "}",
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    (outer,) = gen_shared_types.parse_go_file(go_file)
+    names = [(f.name, f.description, f.validation) for f in outer.fields]
+    assert names == [
+        ("Name", "Name of the inner thing.", ()),
+        ("Name", "Name of the outer thing.", ("MinLength=1",)),
+    ]
+
+
 def test_format_go_type_as_link_respects_documented_types(gen_shared_types):
     assert (
         gen_shared_types.format_go_type_as_link("AuthConfig", {"AuthConfig"})
@@ -115,7 +158,7 @@ def test_generate_markdown_adds_enterprise_suffix_for_duplicates(gen_shared_type
     assert "#### AuthConfig (Enterprise)" in markdown
 
 
-def test_find_documented_types_and_broken_links(gen_shared_types, tmp_path):
+def test_doc_index_finds_documented_types_and_broken_links(gen_shared_types, tmp_path):
     doc_file = Path(tmp_path / "api.md")
     doc_file.write_text(
         "\n".join(
@@ -129,8 +172,168 @@ def test_find_documented_types_and_broken_links(gen_shared_types, tmp_path):
         encoding="utf-8",
     )
 
-    documented = gen_shared_types.find_documented_types(doc_file)
-    broken = gen_shared_types.find_all_broken_links(doc_file)
+    content = doc_file.read_text(encoding="utf-8")
+    from_path = gen_shared_types.DocIndex(doc_file)
+    from_content = gen_shared_types.DocIndex(content)
+
+    for index in (from_path, from_content):
+        assert index.documented_types() == {"KnownType"}
+        assert index.broken_links() == {"MissingType"}
+    assert from_path.headings == {"KnownType": 0}
+    assert [(name, pos) for name, _, pos in from_path.links] == [
+        ("KnownType", content.index("[KnownType]")),
+        ("MissingType", content.index("[MissingType]")),
+    ]
+    assert gen_shared_types.DocIndex(tmp_path / "missing.md").links == []
+
+
+def test_pending_comments_match_backward_extraction(gen_shared_types):
+    lines = [
+        "// Old paragraph.",
+        "",
+        "// +kubebuilder:validation:MinLength=1",
+        "// Current",
+        "// paragraph.",
+        "// +optional",
+        "",
+        "Field string",
+    ]
+    pending = gen_shared_types.PendingComments()
+    for line in lines[:-1]:
+        pending.feed(line)
+
+    assert pending.description() == gen_shared_types.extract_doc_comment(lines, 7) == "Current paragraph."
+    assert pending.validation == gen_shared_types.extract_validation_annotations(lines, 7) == ["MinLength=1"]
+
+    pending.feed(lines[-1])
+    assert pending.description() == "" and pending.validation == []
+
+
+def test_parse_go_file_handles_one_line_and_unterminated_structs(gen_shared_types, tmp_path):
+    go_file = tmp_path / "types.go"
+    go_file.write_text(
+        "\n".join(
+            [
+                "package shared",
+                "",
+                "// Empty has its only field on the declaration line.",
+                'type Empty struct { Value string `json:"value,omitempty"` }',
+                "",
+                "type Broken struct {",
+                '    Lost string `json:"lost"`',
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    empty, broken = gen_shared_types.parse_go_file(go_file)
+    assert [(f.name, f.description, f.required) for f in empty.fields] == [
+        ("Value", "Empty has its only field on the declaration line.", False)
+    ]
+    assert broken.fields == ()
+
+
+def test_tokenize_go_keeps_braces_inside_comments_and_strings(gen_shared_types):
+    source = 'x := `{` + "}\\"{" // {\n/* } */ y{1.5e-3}'
+    tokens = [(kind, text) for kind, text, _ in gen_shared_types.tokenize_go(source)]
+    assert tokens == [
+        ("ident", "x"), ("op", ":"), ("op", "="), ("string", "`{`"), ("op", "+"),
+        ("string", '"}\\"{"'), ("comment", "// {"), ("comment", "/* } */"),
+        ("ident", "y"), ("op", "{"), ("number", "1.5e-3"), ("op", "}"),
+    ]
+
+
+def test_parse_go_file_ignores_braces_in_comments_and_tags(gen_shared_types, tmp_path):
+    go_file = tmp_path / "types.go"
+    go_file.write_text(
+        "\n".join(
+            [
+                "package shared",
+                "",
+                "type Matcher struct {",
+                "    // Pattern is a regex; a literal { must be escaped.",
+                "    // +kubebuilder:validation:Pattern=`^[a-z]{1,3}$`",
+                '    Pattern string `json:"pattern" example:"}"`',
+                '    Weight int `json:"weight,omitempty"`',
+                "}",
+                "",
+                "type Other string",
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    matcher, other = gen_shared_types.parse_go_file(go_file)
+    assert [f.name for f in matcher.fields] == ["Pattern", "Weight"]
+    assert matcher.fields[0].validation == ("Pattern=`^[a-z]{1,3}$`",)
+    assert other.name == "Other" and other.underlying_type == "string"
+
+
+def _write_go_files(directory, count):
+    directory.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        (directory / f"types{i}.go").write_text(
+            f"package shared\n\n// Type{i} is type {i}.\ntype Type{i} struct {{\n"
+            f'    // Name of {i}.\n    Name string `json:"name"`\n}}\n',
+            encoding="utf-8",
+        )
+    return sorted(directory.glob("*.go"))
+
+
+def test_parse_go_files_reuses_cache_for_unchanged_content(gen_shared_types, monkeypatch, tmp_path, capsys):
+    files = _write_go_files(tmp_path / "src", 3)
+    cache_dir = tmp_path / "cache"
+
+    first = gen_shared_types.parse_go_files(files, cache_dir, jobs=1)
+    assert "0/3 files unchanged" in capsys.readouterr().out
+
+    parsed = []
+    real_parse = gen_shared_types.parse_go_source
+    monkeypatch.setattr(gen_shared_types, "parse_go_source", lambda c: parsed.append(c) or real_parse(c))
+    files[1].write_text(files[1].read_text(encoding="utf-8").replace("Name of 1.", "Changed."), encoding="utf-8")
+
+    second = gen_shared_types.parse_go_files(files, cache_dir, jobs=1)
+    assert "2/3 files unchanged (67% hit rate), parsed 1" in capsys.readouterr().out
+    assert len(parsed) == 1, "only the edited file is parsed again"
+    assert second[0] == first[0] and second[2] == first[2]
+    assert second[1][0].fields[0].description == "Changed."
+
+
+def test_parse_go_files_in_a_process_pool_matches_serial(gen_shared_types, monkeypatch, tmp_path, capsys):
+    # Pool workers unpickle the parse function by module name.
+    monkeypatch.setitem(sys.modules, gen_shared_types.__name__, gen_shared_types)
+    files = _write_go_files(tmp_path / "src", gen_shared_types.PARALLEL_PARSE_MIN_FILES)
+
+    parallel = gen_shared_types.parse_go_files(files, jobs=2)
+    serial = gen_shared_types.parse_go_files(files, jobs=1)
+
+    assert "Warning" not in capsys.readouterr().out
+    assert parallel == serial
+    assert [types[0].name for types in parallel] == [f"Type{i}" for i in range(len(files))]
+
+
+def test_parse_go_files_off_the_main_thread_parses_serially(gen_shared_types, monkeypatch, tmp_path):
+    '''A doc stage thread must not fork a process pool while sibling stages run.'''
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool started off the main thread")
+
+    monkeypatch.setattr(gen_shared_types, "ProcessPoolExecutor", no_pool)
+    files = _write_go_files(tmp_path / "src", gen_shared_types.PARALLEL_PARSE_MIN_FILES)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        parsed = pool.submit(gen_shared_types.parse_go_files, files, jobs=2).result()
+
+    assert [types[0].name for types in parsed] == [f"Type{i}" for i in range(len(files))]
+
+
+def test_parsed_types_are_compact_and_share_names(gen_shared_types, tmp_path):
+    files = _write_go_files(tmp_path / "src", 2)
+    parsed = gen_shared_types.parse_go_source(files[0].read_text(encoding="utf-8"))
+    (cached,), _ = gen_shared_types.parse_go_files(files, tmp_path / "cache", jobs=1)
+    (type_info,) = parsed
 
-    assert documented == {"KnownType"}
-    assert broken == {"MissingType"}
+    assert not hasattr(type_info, "__dict__") and not hasattr(type_info.fields[0], "__dict__")
+    assert type_info.validation == () and type_info.fields[0].validation == ()
+    assert cached == type_info
+    assert cached.name is type_info.name and cached.fields[0].json_name is type_info.fields[0].json_name
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        type_info.source = "shared"
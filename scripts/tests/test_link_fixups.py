@@ -1,4 +1,5 @@
 import json
+import random
 
 
 def test_shipped_fixups_rewrite_known_broken_links(gen_ref_docs):
@@ -44,28 +45,6 @@ def test_apply_link_fixups_deletes_when_new_is_empty(gen_ref_docs, monkeypatch):
     assert result == "| field | Real description |"
 
 
-def test_apply_link_fixups_to_file_rewrites_appended_content(
-    gen_ref_docs, monkeypatch, tmp_path
-):
-    '''generate-shared-types.py appends raw Go doc comments after the first
-    fix-up pass, so the file-level pass has to catch them.'''
-    monkeypatch.setattr(
-        gen_ref_docs,
-        "_LINK_FIXUPS_CACHE",
-        [{"old": "http://old.example/x", "new": "http://new.example/y"}],
-    )
-    api_file = tmp_path / "api.md"
-    api_file.write_text("appended type doc: http://old.example/x\n", encoding="utf-8")
-
-    gen_ref_docs._apply_link_fixups_to_file(str(api_file))
-
-    assert api_file.read_text(encoding="utf-8") == "appended type doc: http://new.example/y\n"
-
-
-def test_apply_link_fixups_to_file_tolerates_missing_file(gen_ref_docs, tmp_path):
-    gen_ref_docs._apply_link_fixups_to_file(str(tmp_path / "does-not-exist.md"))
-
-
 def test_apply_link_fixups_is_substring_replacement(gen_ref_docs, monkeypatch):
     monkeypatch.setattr(
         gen_ref_docs,
@@ -100,3 +79,55 @@ def test_apply_link_fixups_skips_incomplete_entries(gen_ref_docs, monkeypatch):
 def test_load_link_fixups_missing_file_returns_empty(gen_ref_docs, monkeypatch):
     monkeypatch.setattr(gen_ref_docs, "_LINK_FIXUPS_CACHE", None)
     assert gen_ref_docs._load_link_fixups("scripts/does-not-exist.json") == []
+
+
+def _replace_sequentially(content, pairs):
+    for old, new in pairs:
+        content = content.replace(old, new)
+    return content
+
+
+def test_matcher_matches_sequential_replacement(gen_ref_docs):
+    '''Grouping fix-ups into single-pass regexes must not change the result,
+    even when entries overlap, cascade into each other, or delete text.'''
+    rng = random.Random(0)
+    for _ in range(2000):
+        pairs = [
+            ("".join(rng.choice("abc") for _ in range(rng.randint(1, 3))),
+             "".join(rng.choice("abc") for _ in range(rng.randint(0, 3))))
+            for _ in range(rng.randint(1, 4))
+        ]
+        content = "".join(rng.choice("abcx") for _ in range(rng.randint(0, 20)))
+        matcher = gen_ref_docs.LinkFixupMatcher(pairs)
+        result, _ = matcher.rewrite(content)
+        assert result == _replace_sequentially(content, pairs), (pairs, content)
+
+
+def test_independent_fixups_share_one_pass(gen_ref_docs):
+    matcher = gen_ref_docs.LinkFixupMatcher([
+        ("https://example.com/docs/a/specific", "https://example.com/new/a"),
+        ("https://example.com/docs/a", "https://example.com/new"),
+        ("https://other.example/x", "https://other.example/y"),
+        ("internal note<br />", ""),
+        ("https://late.example/", "https://late.example/new/"),
+    ])
+    # A deletion can join the text around it into a later 'old', so it has to
+    # finish its group; everything before it fits in one pass.
+    assert [sorted(index_of.values()) for _, index_of in matcher._groups] == [[0, 1, 2, 3], [4]]
+
+
+def test_matcher_counts_hits_and_reports_stale_fixups(gen_ref_docs, capsys):
+    matcher = gen_ref_docs.LinkFixupMatcher(
+        [("http://old.example/x", "http://new.example/x"), ("http://gone.example", "http://new.example")]
+    )
+    assert matcher.hit_counts() == {}, "nothing scanned yet"
+
+    _, total = matcher.rewrite("http://old.example/x and http://old.example/x")
+    assert total == 2
+    hits = matcher.hit_counts()
+    assert hits == {"http://old.example/x": 2, "http://gone.example": 0}
+
+    gen_ref_docs.report_stale_link_fixups(hits)
+    out = capsys.readouterr().out
+    assert "1 link fix-up(s) matched nothing" in out
+    assert "http://gone.example" in out and "http://old.example/x" not in out
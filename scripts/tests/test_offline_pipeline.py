@@ -0,0 +1,281 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def offline_run(gen_ref_docs, offline_kit, tmp_path, monkeypatch):
+    '''Run main() against the offline kit in a fresh docs root.
+
+    main() exports its settings to the environment for parallel workers, so
+    every variable it sets is put back afterwards.
+    '''
+    for name in ["REF_DOCS_CACHE_DIR", "KGATEWAY_REPO_URL", "REF_DOCS_TRACE", "REF_DOCS_RULE_STATS",
+                 "REF_DOCS_STAGE_JOBS", "REF_DOCS_SPARSE", "REF_DOCS_STRICT",
+                 "GITHUB_EVENT_NAME", "GITHUB_RELEASE_TAG", "INPUT_VERSION"]:
+        monkeypatch.delenv(name, raising=False)
+    for tool in gen_ref_docs.DOC_TOOLS:
+        monkeypatch.delenv(gen_ref_docs._tool_env_var(tool), raising=False)
+    # Pool workers unpickle process functions by module name.
+    monkeypatch.setitem(sys.modules, gen_ref_docs.__name__, gen_ref_docs)
+
+    repo_url = offline_kit.make_repo(tmp_path / "repo")
+    monkeypatch.chdir(offline_kit.make_docs_root(tmp_path / "docs"))
+
+    def run(*extra):
+        gen_ref_docs.main(offline_kit.pipeline_args(repo_url, tmp_path / "cache", *extra))
+
+    run.repo_url = repo_url
+    return run
+
+
+def _outputs(gen_ref_docs, versions):
+    paths = [p for v in versions for p in gen_ref_docs.version_output_paths(v["version"], v["linkVersion"], v["url"])]
+    return {p: Path(p).read_text(encoding="utf-8") for p in paths}
+
+
+def _assert_every_version_generated(out, versions):
+    '''Fail on a dropped version with its log, rather than later on a missing output file'''
+    assert "Failed to clone" not in out, out
+    for version_info in versions:
+        assert f"Completed version {version_info['version']} - generated 3/3 doc types" in out, out
+
+
+def test_offline_pipeline_generates_every_version_then_restores_from_cache(
+        gen_ref_docs, offline_kit, offline_run, tmp_path, capsys):
+    offline_run()
+    out = capsys.readouterr().out
+    assert out.count("generated 3/3 doc types") == len(offline_kit.VERSIONS)
+
+    outputs = _outputs(gen_ref_docs, offline_kit.VERSIONS)
+    split_api = outputs["content/docs/envoy/main/reference/api.md"]
+    assert split_api.startswith(gen_ref_docs.API_DOC_FRONT_MATTER)
+    assert "#### CELExpression" in split_api and "#### HeaderModifiers" in split_api
+    assert "AgentgatewayPolicy" not in split_api
+    assert "AgentgatewayPolicy" in outputs["content/docs/envoy/2.1.x/reference/api.md"]
+    helm = outputs["assets/kgw-docs/pages/reference/helm/2.2.x/kgateway.md"]
+    assert helm.startswith("\n## Values\n\n| Key | Type | Description | Default |\n")
+    assert "| controller.replicaCount | int | Set the number of controller pod replicas. | `1` |\n" in helm
+    assert "https://kgateway.dev/docs/envoy/latest/install/advanced/#namespace-discovery" in helm
+    assert "No configurable values" in outputs["assets/kgw-docs/pages/reference/helm/2.2.x/kgateway-crds.md"]
+    assert outputs["assets/kgw-docs/snippets/latest/metrics-control-plane.md"].startswith("Name|Type|Labels|Help")
+
+    manifest = json.loads((tmp_path / "cache" / "output-manifest.json").read_text())["files"]
+    assert sorted(manifest) == sorted(outputs)
+    assert all(entry["changed"] for entry in manifest.values())
+    for path in outputs:
+        os.utime(path, ns=(1, 1))
+
+    # A new commit on one branch regenerates that version alone, and output
+    # that comes out the same is left untouched.
+    offline_kit.push_change(offline_run.repo_url, "v2.2.x", {"VERSION": "2.2.1\n"})
+    offline_run("--manifest", str(tmp_path / "manifest.json"))
+    out = capsys.readouterr().out
+    assert out.count("restored 3/3 doc types from cache") == len(offline_kit.VERSIONS) - 1
+    assert "Completed version 2.2.x - generated 3/3 doc types" in out
+    assert f"0 of {len(outputs)} output files changed" in out
+    assert _outputs(gen_ref_docs, offline_kit.VERSIONS) == outputs
+    assert all(Path(path).stat().st_mtime_ns == 1 for path in outputs)
+    rerun = json.loads((tmp_path / "manifest.json").read_text())["files"]
+    assert rerun == {path: {**entry, "changed": False} for path, entry in manifest.items()}
+
+
+def test_offline_pipeline_checks_a_cached_ref_listing_before_restoring(
+        gen_ref_docs, offline_kit, offline_run, tmp_path, capsys):
+    '''A ref that moved after the listing was cached must not restore the
+    output of the commit it was listed at.'''
+    offline_run("--ref-cache-ttl", "600")
+    capsys.readouterr()
+    before = _outputs(gen_ref_docs, offline_kit.VERSIONS)
+
+    head = offline_kit.push_change(offline_run.repo_url, "v2.2.x", {"VERSION": "2.2.1\n"})
+    offline_run("--ref-cache-ttl", "600")
+    out = capsys.readouterr().out
+    assert "Using cached ref listing" in out
+    assert f"v2.2.x is now at {head[:12]}" in out and "the ref listing is stale" in out
+    assert "Completed version 2.2.x - generated 3/3 doc types" in out
+    assert out.count("restored 3/3 doc types from cache") == len(offline_kit.VERSIONS) - 1
+    assert _outputs(gen_ref_docs, offline_kit.VERSIONS) == before
+
+
+def test_offline_pipeline_in_parallel_from_a_mirror_matches_serial(
+        gen_ref_docs, offline_kit, offline_run, tmp_path, capsys):
+    offline_run("--jobs", "2", "--git-cache", str(tmp_path / "git"))
+    out = capsys.readouterr().out
+    assert "Running with 2 parallel jobs" in out and "Cloned kgateway mirror" in out
+    _assert_every_version_generated(out, offline_kit.VERSIONS)
+    parallel = _outputs(gen_ref_docs, offline_kit.VERSIONS)
+
+    for path in parallel:
+        Path(path).unlink()
+    offline_run("--no-generation-cache", "--stage-jobs", "1", "--git-cache", str(tmp_path / "git"))
+    out = capsys.readouterr().out
+    assert "Updated kgateway mirror" in out
+    _assert_every_version_generated(out, offline_kit.VERSIONS)
+    assert _outputs(gen_ref_docs, offline_kit.VERSIONS) == parallel
+
+
+def test_offline_pipeline_parses_go_types_in_a_process_pool(
+        gen_ref_docs, offline_kit, offline_run, monkeypatch, capsys):
+    '''The stages run on threads, where parse_go_files never starts its pool,
+    so the types must be parsed on the main thread before the stages start.'''
+    shared_types = gen_ref_docs._shared_types_module()
+    pool_threads = []
+    real_pool = shared_types.ProcessPoolExecutor
+
+    def recording_pool(*args, **kwargs):
+        pool_threads.append(threading.current_thread().name)
+        return real_pool(*args, **kwargs)
+
+    monkeypatch.setattr(shared_types, "ProcessPoolExecutor", recording_pool)
+    monkeypatch.setattr(shared_types, "PARALLEL_PARSE_MIN_FILES", 2)
+    monkeypatch.setenv("REF_DOCS_PARSE_JOBS", "2")
+    offline_run("--no-generation-cache")
+    out = capsys.readouterr().out
+
+    _assert_every_version_generated(out, offline_kit.VERSIONS)
+    assert "Warning: parallel parsing failed" not in out
+    assert pool_threads and set(pool_threads) == {"MainThread"}
+    # Each version parses on the main thread, then in the API stage and for
+    # the type database, which only read what the main thread parsed.
+    parses = [line for line in out.splitlines() if line.startswith("Parse cache:")]
+    assert len(parses) == 3 * len(offline_kit.VERSIONS)
+    for _, api_stage, type_db in zip(*[iter(parses)] * 3):
+        assert "(100% hit rate), parsed 0 " in api_stage and "(100% hit rate), parsed 0 " in type_db
+
+
+def test_offline_sparse_run_matches_a_full_checkout(gen_ref_docs, offline_kit, offline_run, tmp_path, capsys):
+    offline_run("--no-generation-cache")
+    full = _outputs(gen_ref_docs, offline_kit.VERSIONS)
+    for path in full:
+        Path(path).unlink()
+
+    offline_run("--no-generation-cache", "--sparse")
+    assert capsys.readouterr().out.count("(sparse) in") == len(offline_kit.VERSIONS)
+    assert _outputs(gen_ref_docs, offline_kit.VERSIONS) == full
+    for path in full:
+        Path(path).unlink()
+
+    offline_run("--no-generation-cache", "--sparse", "--git-cache", str(tmp_path / "git"))
+    assert capsys.readouterr().out.count("from mirror (sparse) in") == len(offline_kit.VERSIONS)
+    assert _outputs(gen_ref_docs, offline_kit.VERSIONS) == full
+
+
+def test_concurrent_worktrees_on_one_mirror_do_not_race(gen_ref_docs, offline_kit, tmp_path, capsys):
+    '''Many checkouts added and removed at once on one mirror, as --jobs
+    workers do, every one with the same kind of name and half of them sparse.'''
+    mirror = gen_ref_docs.ensure_mirror(str(tmp_path / "git"), offline_kit.make_repo(tmp_path / "repo"))
+    patterns = gen_ref_docs.sparse_patterns(gen_ref_docs.STAGE_SPARSE_PATTERNS)
+
+    def checkout(i):
+        version_info = offline_kit.VERSIONS[i % len(offline_kit.VERSIONS)]
+        kgateway_dir = tmp_path / f"work-{i}" / f"kgateway-{version_info['version']}"
+        for _ in range(3):
+            gen_ref_docs.clone_repository(offline_kit.branch_for(version_info), str(kgateway_dir), mirror,
+                                          patterns if i % 2 else None)
+            assert (kgateway_dir / "install" / "helm" / "kgateway" / "Chart.yaml").read_text().endswith(
+                f"version: {version_info['version']}\n")
+            gen_ref_docs.remove_checkout(str(kgateway_dir), mirror)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(checkout, range(16)))  # Re-raises the first failure
+
+    capsys.readouterr()
+    listing = subprocess.run(["git", "-C", mirror, "worktree", "list", "--porcelain"], capture_output=True,
+                             text=True, check=True).stdout
+    assert listing.count("worktree ") == 1, listing  # Just the mirror itself
+    assert subprocess.run(["git", "-C", mirror, "rev-parse", "--is-bare-repository"], capture_output=True,
+                          text=True, check=True).stdout.strip() == "true"
+
+
+def _checkout_files(root):
+    return sorted(str(p.relative_to(root)) for p in root.rglob("*") if p.is_file() and ".git" not in p.parts)
+
+
+def test_sparse_clone_is_blobless_and_writes_only_stage_paths(gen_ref_docs, offline_kit, tmp_path, monkeypatch):
+    monkeypatch.setattr(gen_ref_docs, "KGATEWAY_REPO_URL", offline_kit.make_repo(tmp_path / "repo"))
+    patterns = gen_ref_docs.sparse_patterns(["api docs", "helm docs"])
+    assert patterns == ["/api/v1alpha1/", "/go.mod", "/go.sum", "/install/helm/kgateway/",
+                        "/install/helm/kgateway-crds/"]
+
+    gen_ref_docs.clone_repository("v2.2.1", str(tmp_path / "full"))
+    gen_ref_docs.clone_repository("v2.2.1", str(tmp_path / "sparse"), sparse=patterns)
+
+    full, sparse = _checkout_files(tmp_path / "full"), _checkout_files(tmp_path / "sparse")
+    assert "README.md" in full and "pkg/metrics/cmd/findmetrics/main.go" in full
+    assert sparse == [f for f in full if f.startswith(("api/", "install/")) or f == "go.mod"]
+    # Blobs outside the patterns were never downloaded.
+    objects = subprocess.run(["git", "-C", str(tmp_path / "sparse"), "rev-list", "--objects", "--missing=print",
+                              "HEAD"], capture_output=True, text=True, check=True).stdout.splitlines()
+    assert sum(line.startswith("?") for line in objects) == len(full) - len(sparse)
+    assert gen_ref_docs.checkout_stats(str(tmp_path / "sparse"))[0] == len(sparse)
+    assert gen_ref_docs.checkout_stats(str(tmp_path / "full"))[0] == len(full)
+
+
+def test_sparse_metrics_checkout_leaves_out_go_tests_and_e2e_suites(gen_ref_docs, offline_kit, tmp_path,
+                                                                      monkeypatch):
+    monkeypatch.setattr(gen_ref_docs, "KGATEWAY_REPO_URL", offline_kit.make_repo(tmp_path / "repo"))
+    gen_ref_docs.clone_repository("v2.2.1", str(tmp_path / "full"))
+    gen_ref_docs.clone_repository("v2.2.1", str(tmp_path / "sparse"),
+                                  sparse=gen_ref_docs.sparse_patterns(["metrics docs"]))
+
+    full = _checkout_files(tmp_path / "full")
+    assert "test/e2e/gateway_test.go" in full and "pkg/metrics/metrics_test.go" in full
+    assert _checkout_files(tmp_path / "sparse") == [
+        "go.mod", "pkg/metrics/cmd/findmetrics/main.go", "pkg/metrics/metrics.go"]
+
+
+def test_offline_stale_ref_listing_stores_output_under_the_checked_out_commit(
+        gen_ref_docs, offline_kit, offline_run, tmp_path, capsys):
+    offline_run("--ref-cache-ttl", "3600")
+    # The branch moves while the cached listing still has the old commit.
+    new_sha = offline_kit.push_change(offline_run.repo_url, "v2.2.x", {"VERSION": "2.2.1\n"})
+    shutil.rmtree(tmp_path / "cache" / "generated" / "2.2.x")
+    capsys.readouterr()
+
+    offline_run("--ref-cache-ttl", "3600")
+    assert f"v2.2.x is at {new_sha[:12]}" in capsys.readouterr().out
+
+    entry = json.loads((tmp_path / "cache" / "generated" / "2.2.x" / "manifest.json").read_text())
+    version_info = next(v for v in offline_kit.VERSIONS if v["version"] == "2.2.x")
+    assert entry["key"] == gen_ref_docs.generation_cache_key(version_info, new_sha)
+
+
+def test_offline_release_trigger_uses_the_newest_stable_tag(gen_ref_docs, offline_run, monkeypatch, capsys):
+    monkeypatch.setenv("GITHUB_EVENT_NAME", "release")
+    monkeypatch.setenv("GITHUB_RELEASE_TAG", "v2.2.1")
+    offline_run()
+    out = capsys.readouterr().out
+    assert "Processing 1 version(s): ['2.2.x']" in out
+    assert "Using tag: v2.2.1" in out and "generated 3/3 doc types" in out
+
+
+@pytest.mark.parametrize("extra", [(), ("--jobs", "2", "--git-cache", "git")], ids=["sequential", "parallel"])
+def test_offline_run_skips_a_version_that_cannot_be_checked_out(
+        gen_ref_docs, offline_kit, offline_run, tmp_path, capsys, extra):
+    versions = [*offline_kit.VERSIONS, {"version": "2.0.x", "linkVersion": "2.0.x", "url": "2.0.x"}]
+    Path("versions.json").write_text(json.dumps(versions), encoding="utf-8")
+    offline_run(*extra)
+    out = capsys.readouterr().out
+    assert "Failed to clone repository for version 2.0.x" in out
+    assert "1 version(s) failed and were skipped: ['2.0.x']" in out
+    assert out.count("generated 3/3 doc types") == len(offline_kit.VERSIONS)
+    assert "All versions processed" not in out
+    manifest = json.loads((tmp_path / "cache" / "output-manifest.json").read_text())["files"]
+    assert sorted(manifest) == sorted(_outputs(gen_ref_docs, offline_kit.VERSIONS))
+
+    with pytest.raises(SystemExit, match=r"1 version\(s\) failed and were skipped: \['2.0.x'\]"):
+        offline_run(*extra, "--strict", "--no-generation-cache")
+    assert capsys.readouterr().out.count("generated 3/3 doc types") == len(offline_kit.VERSIONS)
+
+
+def test_tool_option_rejects_unknown_tools(gen_ref_docs, offline_run):
+    with pytest.raises(SystemExit, match="--tool expects NAME=COMMAND"):
+        offline_run("--tool", "kubectl=true")
@@ -0,0 +1,118 @@
+def _write_api(directory, weight_type, extra_field=""):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "policy.go").write_text(
+        "package shared\n\n"
+        "// PolicyStatus is the status of a policy.\n"
+        "type PolicyStatus struct {\n"
+        '    Ready bool `json:"ready"`\n'
+        f'    Weight {weight_type} `json:"weight,omitempty"`\n'
+        f"{extra_field}"
+        "}\n\n"
+        "type Route struct {\n"
+        '    Statuses []*PolicyStatus `json:"statuses"`\n'
+        "}\n",
+        encoding="utf-8",
+    )
+    return directory
+
+
+def _record(type_db, conn, version, commit, directory):
+    return type_db.record_sources(conn, version, commit, [(directory, "shared")])
+
+
+def test_record_and_query_types_across_versions(type_db, tmp_path):
+    conn = type_db.connect(tmp_path / "types.sqlite")
+    old_dir = _write_api(tmp_path / "2.1.x", "int32")
+    new_dir = _write_api(tmp_path / "2.2.x", "int64", '    Reason string `json:"reason"`\n')
+
+    assert _record(type_db, conn, "2.1.x", "a" * 40, old_dir)
+    assert _record(type_db, conn, "2.2.x", "b" * 40, new_dir)
+    assert not _record(type_db, conn, "2.2.x", "b" * 40, new_dir), "same commit is recorded once"
+
+    definitions = type_db.lookup(conn, "PolicyStatus")
+    assert [(d["version"], d["source"], d["kind"]) for d in definitions] == [
+        ("2.1.x", "shared", "struct"),
+        ("2.2.x", "shared", "struct"),
+    ]
+    assert [f["json_name"] for f in definitions[1]["fields"]] == ["ready", "weight", "reason"]
+
+    diff = type_db.diff_fields(conn, "PolicyStatus", "2.1.x", "2.2.x")
+    assert [f["name"] for f in diff["added"]] == ["Reason"]
+    assert diff["removed"] == []
+    assert [(old["go_type"], new["go_type"]) for old, new in diff["changed"]] == [("int32", "int64")]
+
+    refs = type_db.references(conn, "PolicyStatus", version="2.2.x")
+    assert refs == [
+        {"version": "2.2.x", "source": "shared", "type": "Route", "field": "Statuses", "go_type": "[]*PolicyStatus"}
+    ]
+
+
+def test_queries_use_the_latest_commit_of_each_version(type_db, tmp_path):
+    conn = type_db.connect(tmp_path / "types.sqlite")
+    _record(type_db, conn, "main", "a" * 40, _write_api(tmp_path / "old", "int32"))
+    _record(type_db, conn, "main", "b" * 40, _write_api(tmp_path / "new", "int64"))
+
+    (definition,) = type_db.lookup(conn, "PolicyStatus")
+    assert definition["commit"] == "b" * 40
+    assert definition["fields"][1]["go_type"] == "int64"
+
+
+def test_latest_commit_is_the_last_one_seen_after_a_rollback(type_db, tmp_path):
+    conn = type_db.connect(tmp_path / "types.sqlite")
+    old_dir = _write_api(tmp_path / "old", "int32")
+    _record(type_db, conn, "main", "a" * 40, old_dir)
+    _record(type_db, conn, "main", "b" * 40, _write_api(tmp_path / "new", "int64"))
+
+    assert not _record(type_db, conn, "main", "a" * 40, old_dir), "a recorded commit is not parsed again"
+    (definition,) = type_db.lookup(conn, "PolicyStatus")
+    assert definition["commit"] == "a" * 40
+    assert definition["fields"][1]["go_type"] == "int32"
+
+
+def test_only_the_most_recently_seen_commits_of_a_version_are_kept(type_db, tmp_path):
+    conn = type_db.connect(tmp_path / "types.sqlite")
+    api_dir = _write_api(tmp_path / "api", "int32")
+    commits = [f"{i:040d}" for i in range(4)]
+    for commit in commits:
+        type_db.record_sources(conn, "main", commit, [(api_dir, "shared")])
+    _record(type_db, conn, "2.2.x", "f" * 40, api_dir)
+    type_db.mark_seen(conn, "main", commits[0])
+
+    type_db.record_types(conn, "main", "e" * 40, [], keep=3)
+    kept = {commit for (commit,) in conn.execute("SELECT commit_sha FROM versions WHERE version = 'main'")}
+    assert kept == {"e" * 40, commits[0], commits[3]}
+    assert {commit for (commit,) in conn.execute("SELECT DISTINCT commit_sha FROM types")} == {
+        commits[0], commits[3], "f" * 40}
+    assert conn.execute("SELECT COUNT(*) FROM fields WHERE type_id NOT IN (SELECT id FROM types)").fetchone() == (0,)
+
+
+def test_connect_adds_last_seen_to_an_older_database(type_db, tmp_path):
+    db = tmp_path / "types.sqlite"
+    conn = type_db.connect(db)
+    conn.executescript(
+        "DROP VIEW latest;"
+        " ALTER TABLE versions DROP COLUMN last_seen;"
+        " INSERT INTO versions VALUES ('main', 'aaa', 1.0), ('main', 'bbb', 2.0);"
+        " CREATE VIEW latest AS SELECT version, commit_sha FROM versions AS v"
+        " WHERE rowid = (SELECT MAX(rowid) FROM versions WHERE version = v.version);"
+    )
+    conn.close()
+
+    conn = type_db.connect(db)
+    assert conn.execute("SELECT commit_sha FROM latest").fetchall() == [("bbb",)]
+    type_db.mark_seen(conn, "main", "aaa")
+    assert conn.execute("SELECT commit_sha FROM latest").fetchall() == [("aaa",)]
+
+
+def test_cli_lookup_and_diff(type_db, tmp_path, capsys):
+    db = tmp_path / "types.sqlite"
+    assert type_db.main(["--db", str(db), "record", "2.1.x", "a" * 40, str(_write_api(tmp_path / "shared", "int32"))]) == 0
+    capsys.readouterr()
+
+    assert type_db.main(["--db", str(db), "lookup", "PolicyStatus"]) == 0
+    out = capsys.readouterr().out
+    assert "2.1.x (aaaaaaaaaaaa) shared: struct" in out
+    assert "weight: int32 (optional)" in out
+
+    assert type_db.main(["--db", str(db), "diff", "PolicyStatus", "2.1.x", "2.9.x"]) == 1
+    assert "not recorded for version(s) 2.9.x" in capsys.readouterr().out
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Cross-version database of the Go API types parsed by generate-shared-types.py.
+
+generate-ref-docs.py records the types of every version it generates into a
+SQLite file, keyed by (version, commit, source directory, type name), so
+questions such as "which versions define PolicyStatus, and with which
+fields?" are answered by an indexed lookup instead of a re-clone and
+re-parse of every version.
+
+Usage:
+    type-db.py [--db PATH] lookup <Type>
+    type-db.py [--db PATH] diff <Type> <old version> <new version>
+    type-db.py [--db PATH] refs <Type> [--version VERSION]
+    type-db.py [--db PATH] record <version> <commit> <source dir>...
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from script_modules import import_script
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    version TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (version, commit_sha)
+);
+CREATE TABLE IF NOT EXISTS types (
+    id INTEGER PRIMARY KEY,
+    version TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    underlying_type TEXT,
+    description TEXT NOT NULL,
+    validation TEXT NOT NULL,
+    is_enterprise INTEGER NOT NULL,
+    UNIQUE (version, commit_sha, source, name)
+);
+CREATE INDEX IF NOT EXISTS types_by_name ON types (name);
+CREATE TABLE IF NOT EXISTS fields (
+    type_id INTEGER NOT NULL REFERENCES types (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    go_type TEXT NOT NULL,
+    ref_type TEXT NOT NULL,
+    json_name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    required INTEGER NOT NULL,
+    validation TEXT NOT NULL,
+    PRIMARY KEY (type_id, position)
+);
+CREATE INDEX IF NOT EXISTS fields_by_ref_type ON fields (ref_type);
+"""
+
+# The commit each version was last generated at, which after a rollback is
+# not the most recently added one
+LATEST_VIEW = """
+CREATE VIEW IF NOT EXISTS latest AS
+    SELECT version, commit_sha FROM versions AS v
+    WHERE rowid = (SELECT rowid FROM versions WHERE version = v.version
+                   ORDER BY last_seen DESC, rowid DESC LIMIT 1);
+"""
+
+# Commits kept per version. Queries only read the latest one; the others let
+# a rollback skip re-recording, and the bound keeps nightly main runs from
+# growing the database without end.
+COMMITS_PER_VERSION = 5
+
+
+def default_db_path() -> Path:
+    """$REF_DOCS_TYPE_DB, else types.sqlite in the generate-ref-docs.py cache dir."""
+    if os.environ.get("REF_DOCS_TYPE_DB"):
+        return Path(os.environ["REF_DOCS_TYPE_DB"])
+    cache_dir = os.environ.get("REF_DOCS_CACHE_DIR")
+    if not cache_dir:
+        xdg = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(xdg, "kgateway-ref-docs")
+    return Path(cache_dir) / "types.sqlite"
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    """Open (creating if needed) the type database.
+
+    WAL mode and a busy timeout let parallel generate-ref-docs.py workers
+    record their versions into the same file.
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    _add_last_seen(conn)
+    conn.executescript(LATEST_VIEW)
+    return conn
+
+
+def _add_last_seen(conn: sqlite3.Connection) -> None:
+    """Add last_seen to a database made before it existed, and drop its rowid-based latest view."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(versions)")]
+    if "last_seen" in columns:
+        return
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        # Another worker may have migrated the file since the check above
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(versions)")]
+        if "last_seen" not in columns:
+            conn.execute("ALTER TABLE versions ADD COLUMN last_seen REAL NOT NULL DEFAULT 0")
+            conn.execute("UPDATE versions SET last_seen = recorded_at")
+            conn.execute("DROP VIEW IF EXISTS latest")
+
+
+def ref_type(go_type: str) -> str:
+    """The type a field refers to, as generate-shared-types.py resolves nested types."""
+    return go_type.replace("[]", "").replace("*", "")
+
+
+def mark_seen(conn: sqlite3.Connection, version: str, commit: str) -> bool:
+    """Make an already recorded commit the latest of its version.
+
+    Returns False if the commit is not recorded for the version.
+    """
+    with conn:
+        cursor = conn.execute("UPDATE versions SET last_seen = ? WHERE version = ? AND commit_sha = ?",
+                              (time.time(), version, commit))
+    return cursor.rowcount > 0
+
+
+def record_types(conn: sqlite3.Connection, version: str, commit: str, types: list,
+                 keep: int = COMMITS_PER_VERSION) -> bool:
+    """Store the TypeInfo list of one version at one commit, making it the latest.
+
+    A (version, commit) pair that is already recorded is only marked as the
+    latest, so recording is incremental across runs. Only the `keep` most
+    recently seen commits of the version are kept. Returns True if rows
+    were added.
+    """
+    if mark_seen(conn, version, commit):
+        return False
+    with conn:
+        now = time.time()
+        conn.execute("INSERT INTO versions VALUES (?, ?, ?, ?)", (version, commit, now, now))
+        for t in types:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO types (version, commit_sha, source, name, kind, underlying_type,"
+                " description, validation, is_enterprise) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (version, commit, t.source, t.name, t.kind, t.underlying_type, t.description,
+                 json.dumps(t.validation), int(t.is_enterprise)),
+            )
+            if not cursor.rowcount:
+                continue  # Same name twice in one source directory: first wins
+            conn.executemany(
+                "INSERT INTO fields VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, i, f.name, f.go_type, ref_type(f.go_type), f.json_name,
+                  f.description, int(f.required), json.dumps(f.validation))
+                 for i, f in enumerate(t.fields)],
+            )
+        stale = conn.execute(
+            "SELECT commit_sha FROM versions WHERE version = ? ORDER BY last_seen DESC, rowid DESC LIMIT -1 OFFSET ?",
+            (version, keep),
+        ).fetchall()
+        for (stale_commit,) in stale:
+            # Their fields go with them (ON DELETE CASCADE)
+            conn.execute("DELETE FROM types WHERE version = ? AND commit_sha = ?", (version, stale_commit))
+            conn.execute("DELETE FROM versions WHERE version = ? AND commit_sha = ?", (version, stale_commit))
+    return True
+
+
+def record_sources(conn: sqlite3.Connection, version: str, commit: str, sources: list[tuple[Path, str]],
+                   cache_dir: Path | None = None) -> bool:
+    """Parse the Go files of (directory, source label) pairs and record them.
+
+    Parsing goes through generate-shared-types.py's parse_go_files, so with
+    its cache_dir the files already parsed for the API docs are not parsed
+    again. A commit that is already recorded is not parsed, only marked as
+    the latest of its version. Returns True if rows were added.
+    """
+    if mark_seen(conn, version, commit):
+        print(f"Type database already has {version} at {commit[:12]}")
+        return False
+    shared_types = import_script("generate-shared-types.py")
+    go_files = []
+    for source_dir, source in sources:
+        if source_dir.exists():
+            go_files += [(f, source) for f in sorted(source_dir.glob("*.go"))
+                         if not f.name.startswith("zz_generated")]
+    types = []
+    parsed = shared_types.parse_go_files([f for f, _ in go_files], cache_dir)
+    for (_, source), file_types in zip(go_files, parsed):
+        types += [replace(t, source=source) for t in file_types]
+    added = record_types(conn, version, commit, types)
+    if added:
+        print(f"Recorded {len(types)} types for {version} in the type database")
+    return added
+
+
+def lookup(conn: sqlite3.Connection, name: str) -> list[dict]:
+    """Every definition of a type in the latest commit of each version."""
+    definitions = {}
+    for (type_id, version, commit, source, kind, underlying, description,
+         field_name, go_type, json_name, required) in conn.execute(
+        "SELECT t.id, t.version, t.commit_sha, t.source, t.kind, t.underlying_type, t.description,"
+        " f.name, f.go_type, f.json_name, f.required"
+        " FROM types AS t JOIN latest USING (version, commit_sha)"
+        " LEFT JOIN fields AS f ON f.type_id = t.id"
+        " WHERE t.name = ? ORDER BY t.version, t.source, f.position",
+        (name,),
+    ):
+        definition = definitions.setdefault(type_id, {
+            "version": version,
+            "commit": commit,
+            "source": source,
+            "kind": kind,
+            "underlying_type": underlying,
+            "description": description,
+            "fields": [],
+        })
+        if field_name is not None:
+            definition["fields"].append(
+                {"name": field_name, "go_type": go_type, "json_name": json_name, "required": bool(required)}
+            )
+    return list(definitions.values())
+
+
+def diff_fields(conn: sqlite3.Connection, name: str, old_version: str, new_version: str) -> dict:
+    """Fields of a type added, removed or changed between two versions.
+
+    Fields are matched by Go name; a field is changed when its type, JSON
+    name or required flag differ. With the type defined in several source
+    directories of one version, the first source (by name) is compared.
+    """
+    by_version = {}
+    for definition in lookup(conn, name):
+        by_version.setdefault(definition["version"], definition)
+    missing = [v for v in (old_version, new_version) if v not in by_version]
+    if missing:
+        raise KeyError(f"{name} is not recorded for version(s) {', '.join(missing)}")
+    old = {f["name"]: f for f in by_version[old_version]["fields"]}
+    new = {f["name"]: f for f in by_version[new_version]["fields"]}
+    return {
+        "added": [new[f] for f in new if f not in old],
+        "removed": [old[f] for f in old if f not in new],
+        "changed": [(old[f], new[f]) for f in new if f in old and old[f] != new[f]],
+    }
+
+
+def references(conn: sqlite3.Connection, name: str, version: str | None = None) -> list[dict]:
+    """Fields whose type refers to `name`, in the latest commit of each version."""
+    query = (
+        "SELECT t.version, t.source, t.name, f.name, f.go_type"
+        " FROM fields AS f JOIN types AS t ON t.id = f.type_id"
+        " JOIN latest USING (version, commit_sha)"
+        " WHERE f.ref_type = ?"
+    )
+    params = [name]
+    if version:
+        query += " AND t.version = ?"
+        params.append(version)
+    query += " ORDER BY t.version, t.name, f.position"
+    return [
+        {"version": v, "source": source, "type": type_name, "field": field_name, "go_type": go_type}
+        for v, source, type_name, field_name, go_type in conn.execute(query, params)
+    ]
+
+
+def _print_lookup(conn, args):
+    definitions = lookup(conn, args.type)
+    if not definitions:
+        print(f"{args.type} is not defined in any recorded version")
+        return 1
+    for d in definitions:
+        kind = d["kind"] if d["kind"] == "struct" else f"{d['kind']} of {d['underlying_type']}"
+        print(f"{d['version']} ({d['commit'][:12]}) {d['source']}: {kind}")
+        for f in d["fields"]:
+            required = "required" if f["required"] else "optional"
+            print(f"    {f['json_name']}: {f['go_type']} ({required})")
+    return 0
+
+
+def _print_diff(conn, args):
+    try:
+        diff = diff_fields(conn, args.type, args.old, args.new)
+    except KeyError as e:
+        print(e.args[0])
+        return 1
+    for f in diff["added"]:
+        print(f"+ {f['json_name']}: {f['go_type']}")
+    for f in diff["removed"]:
+        print(f"- {f['json_name']}: {f['go_type']}")
+    for old, new in diff["changed"]:
+        print(f"~ {new['json_name']}: {old['go_type']} -> {new['go_type']}"
+              + ("" if old["required"] == new["required"] else
+                 f" ({'required' if new['required'] else 'optional'} now)"))
+    if not any(diff.values()):
+        print(f"{args.type} has the same fields in {args.old} and {args.new}")
+    return 0
+
+
+def _print_refs(conn, args):
+    refs = references(conn, args.type, args.version)
+    if not refs:
+        print(f"No recorded field refers to {args.type}")
+        return 1
+    for r in refs:
+        print(f"{r['version']} {r['source']}: {r['type']}.{r['field']} ({r['go_type']})")
+    return 0
+
+
+def _record(conn, args):
+    sources = [(Path(d), Path(d).name) for d in args.source_dirs]
+    record_sources(conn, args.version, args.commit, sources)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the cross-version API type database.")
+    parser.add_argument("--db", type=Path, default=None,
+                        help="Database file (default: $REF_DOCS_TYPE_DB, else types.sqlite in the "
+                             "generate-ref-docs.py cache directory).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("lookup", help="Show every version that defines a type, with its fields.")
+    p.add_argument("type")
+    p.set_defaults(run=_print_lookup)
+    p = commands.add_parser("diff", help="Show the field changes of a type between two versions.")
+    p.add_argument("type")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.set_defaults(run=_print_diff)
+    p = commands.add_parser("refs", help="Show the fields that refer to a type.")
+    p.add_argument("type")
+    p.add_argument("--version")
+    p.set_defaults(run=_print_refs)
+    p = commands.add_parser("record", help="Parse Go source directories and record their types.")
+    p.add_argument("version")
+    p.add_argument("commit")
+    p.add_argument("source_dirs", nargs="+")
+    p.set_defaults(run=_record)
+    args = parser.parse_args(argv)
+
+    db_path = args.db or default_db_path()
+    if args.command != "record" and not db_path.exists():
+        print(f"No type database at {db_path}; run generate-ref-docs.py first")
+        return 1
+    conn = connect(db_path)
+    try:
+        return args.run(conn, args)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())